@@ -0,0 +1,29 @@
+"""add_overdue_lookup_indexes
+
+Revision ID: a7c1e2d4f5b6
+Revises: 96d83a58877c
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7c1e2d4f5b6'
+down_revision: Union[str, None] = '96d83a58877c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Índices para localizar o ciclo mais recente e a última sessão de cada ciclo
+    op.create_index('ix_cycles_patient_id_cycle_date', 'cycles', ['patient_id', 'cycle_date'], unique=False)
+    op.create_index('ix_sessions_cycle_id_session_date', 'sessions', ['cycle_id', 'session_date'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_sessions_cycle_id_session_date', table_name='sessions')
+    op.drop_index('ix_cycles_patient_id_cycle_date', table_name='cycles')
@@ -0,0 +1,27 @@
+"""add_cycle_listing_index
+
+Revision ID: a9c3e5f7b2d4
+Revises: f6b8d2e4a1c3
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a9c3e5f7b2d4'
+down_revision: Union[str, None] = 'f6b8d2e4a1c3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Índice da paginação keyset de GET /cycles sem filtro de paciente (cycle_date, id)
+    op.create_index('ix_cycles_cycle_date_id', 'cycles', ['cycle_date', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_cycles_cycle_date_id', table_name='cycles')
@@ -0,0 +1,33 @@
+"""add_dashboard_snapshots
+
+Revision ID: b3d9f1a2c4e7
+Revises: a7c1e2d4f5b6
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3d9f1a2c4e7'
+down_revision: Union[str, None] = 'a7c1e2d4f5b6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('dashboard_snapshots',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('payload', sa.JSON(), nullable=False),
+    sa.Column('computed_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_dashboard_snapshots_computed_at'), 'dashboard_snapshots', ['computed_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_dashboard_snapshots_computed_at'), table_name='dashboard_snapshots')
+    op.drop_table('dashboard_snapshots')
@@ -0,0 +1,51 @@
+"""add_dashboard_counters
+
+Revision ID: c5e8a9b1d2f3
+Revises: b3d9f1a2c4e7
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5e8a9b1d2f3'
+down_revision: Union[str, None] = 'b3d9f1a2c4e7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('dashboard_counters',
+    sa.Column('metric', sa.String(), nullable=False),
+    sa.Column('key', sa.String(), nullable=False),
+    sa.Column('value', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('metric', 'key')
+    )
+
+    # Carga inicial dos contadores a partir dos dados existentes
+    op.execute("""
+        INSERT INTO dashboard_counters (metric, key, value)
+        SELECT 'patients', 'total', count(*) FROM patients
+        UNION ALL
+        SELECT 'birth_year_sum', 'total', COALESCE(sum(extract(year FROM birth_date)), 0)::bigint FROM patients
+        UNION ALL
+        SELECT 'birthday', to_char(birth_date, 'MM-DD'), count(*) FROM patients GROUP BY to_char(birth_date, 'MM-DD')
+        UNION ALL
+        SELECT 'gender', gender::text, count(*) FROM patients GROUP BY gender
+        UNION ALL
+        SELECT 'treatment_location', treatment_location::text, count(*) FROM patients GROUP BY treatment_location
+        UNION ALL
+        SELECT 'preferred_medication', preferred_medication_id::text, count(*) FROM patients
+        WHERE preferred_medication_id IS NOT NULL GROUP BY preferred_medication_id
+        UNION ALL
+        SELECT 'activator', activator_id::text, count(*) FROM sessions
+        WHERE activator_id IS NOT NULL GROUP BY activator_id
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('dashboard_counters')
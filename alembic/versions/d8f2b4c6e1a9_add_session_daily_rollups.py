@@ -0,0 +1,78 @@
+"""add_session_daily_rollups
+
+Revision ID: d8f2b4c6e1a9
+Revises: c5e8a9b1d2f3
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd8f2b4c6e1a9'
+down_revision: Union[str, None] = 'c5e8a9b1d2f3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('session_daily_rollups',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('medication_id', sa.UUID(), nullable=False),
+    sa.Column('dosage_mg', sa.Numeric(precision=10, scale=2), nullable=True),
+    sa.Column('activator_id', sa.UUID(), nullable=True),
+    sa.Column('treatment_location', postgresql.ENUM('clinic', 'home', name='treatmentlocationenum', create_type=False), nullable=False),
+    sa.Column('sessions_count', sa.Integer(), nullable=False),
+    sa.Column('patient_ids', sa.JSON(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_session_daily_rollups_day'), 'session_daily_rollups', ['day'], unique=False)
+    # Uma linha por grupo do dia; coalesce porque NULLs contariam como valores distintos
+    op.create_index(
+        'uq_session_daily_rollups_group',
+        'session_daily_rollups',
+        [
+            'day',
+            'medication_id',
+            sa.text('coalesce(dosage_mg, -1)'),
+            sa.text("coalesce(activator_id, '00000000-0000-0000-0000-000000000000')"),
+            'treatment_location',
+        ],
+        unique=True,
+    )
+    # O regroup do agregado diário filtra sessions só por session_date
+    op.create_index('ix_sessions_session_date', 'sessions', ['session_date'], unique=False)
+
+    # Carga inicial do agregado a partir das sessões existentes (dia em UTC).
+    # Para bases grandes, prefira `python -m app.jobs backfill-session-rollups` em lotes.
+    op.execute("""
+        INSERT INTO session_daily_rollups (
+            id, day, medication_id, dosage_mg, activator_id, treatment_location,
+            sessions_count, patient_ids
+        )
+        SELECT
+            gen_random_uuid(),
+            (s.session_date AT TIME ZONE 'UTC')::date,
+            s.medication_id,
+            s.dosage_mg,
+            s.activator_id,
+            p.treatment_location,
+            count(*),
+            to_json(array_agg(DISTINCT c.patient_id::text ORDER BY c.patient_id::text))
+        FROM sessions s
+        JOIN cycles c ON c.id = s.cycle_id
+        JOIN patients p ON p.id = c.patient_id
+        GROUP BY 2, s.medication_id, s.dosage_mg, s.activator_id, p.treatment_location
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_sessions_session_date', table_name='sessions')
+    op.drop_index('uq_session_daily_rollups_group', table_name='session_daily_rollups')
+    op.drop_index(op.f('ix_session_daily_rollups_day'), table_name='session_daily_rollups')
+    op.drop_table('session_daily_rollups')
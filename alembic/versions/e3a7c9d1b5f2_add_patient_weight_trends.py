@@ -0,0 +1,36 @@
+"""add_patient_weight_trends
+
+Revision ID: e3a7c9d1b5f2
+Revises: d8f2b4c6e1a9
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e3a7c9d1b5f2'
+down_revision: Union[str, None] = 'd8f2b4c6e1a9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Tabela preenchida pelo job `python -m app.jobs refresh-weight-trends`
+    op.create_table('patient_weight_trends',
+    sa.Column('patient_id', sa.UUID(), nullable=False),
+    sa.Column('slope_kg_per_week', sa.Numeric(precision=7, scale=3), nullable=False),
+    sa.Column('projected_weight_kg', sa.Numeric(precision=7, scale=2), nullable=True),
+    sa.Column('projected_for', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('sessions_count', sa.Integer(), nullable=False),
+    sa.Column('computed_at', sa.DateTime(timezone=True), nullable=False),
+    sa.ForeignKeyConstraint(['patient_id'], ['patients.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('patient_id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('patient_weight_trends')
@@ -0,0 +1,36 @@
+"""add_cohort_percentiles
+
+Revision ID: f6b8d2e4a1c3
+Revises: e3a7c9d1b5f2
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f6b8d2e4a1c3'
+down_revision: Union[str, None] = 'e3a7c9d1b5f2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Tabela preenchida pelo job `python -m app.jobs refresh-cohort-percentiles`
+    op.create_table('cohort_percentiles',
+    sa.Column('gender', postgresql.ENUM('male', 'female', name='genderenum', create_type=False), nullable=False),
+    sa.Column('age_band_start', sa.Integer(), nullable=False),
+    sa.Column('metric', sa.String(), nullable=False),
+    sa.Column('cutpoints', sa.JSON(), nullable=False),
+    sa.Column('sample_size', sa.Integer(), nullable=False),
+    sa.Column('computed_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('gender', 'age_band_start', 'metric')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('cohort_percentiles')
@@ -0,0 +1,52 @@
+from typing import Dict, List, Tuple, TypeVar
+from uuid import UUID
+
+from fastapi import HTTPException, status
+
+# Comentário em pt-BR: máximo de ids resolvidos por requisição nos endpoints /batch
+MAX_BATCH_IDS = 200
+
+T = TypeVar("T")
+
+
+def parse_ids(raw: str) -> List[UUID]:
+    """
+    Comentário em pt-BR: interpreta ``?ids=a,b,c`` mantendo a ordem pedida e sem repetições
+    """
+    ids: List[UUID] = []
+    seen = set()
+    for part in raw.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        try:
+            value = UUID(part)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid id: {part}",
+            )
+        if value not in seen:
+            seen.add(value)
+            ids.append(value)
+
+    if not ids:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="At least one id is required",
+        )
+    if len(ids) > MAX_BATCH_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {MAX_BATCH_IDS} ids per request",
+        )
+    return ids
+
+
+def in_request_order(ids: List[UUID], found: Dict[UUID, T]) -> Tuple[List[T], List[UUID]]:
+    """
+    Comentário em pt-BR: devolve os registros na ordem dos ids pedidos e os ids não encontrados
+    """
+    items = [found[identifier] for identifier in ids if identifier in found]
+    missing = [identifier for identifier in ids if identifier not in found]
+    return items, missing
@@ -0,0 +1,309 @@
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import Float, cast, func, select
+from sqlalchemy.orm import Session
+
+from app.models.body_composition import BodyComposition
+from app.models.cycle import Cycle
+from app.models.session import Session as SessionModel
+from app.schemas.body_composition import (
+    BodyCompositionOutlierItem,
+    BodyCompositionOutliersResponse,
+    QualityFlag,
+)
+
+# Comentário em pt-BR: limites da validação
+WEIGHT_JUMP_RATIO = 0.2  # variação relativa entre pesagens consecutivas do paciente
+FAT_KG_TOLERANCE_KG = 1.0  # diferença absoluta aceita entre fat_kg e peso × % de gordura
+FAT_KG_TOLERANCE_RATIO = 0.05  # ... ou relativa, o que for maior
+ZSCORE_THRESHOLD = 4.0
+MIN_COHORT_SIZE = 30  # abaixo disso o z-score da coorte não é confiável
+COHORT_STATS_TTL_SECONDS = 600
+
+# Linhas lidas do cursor do servidor por vez na varredura completa
+SCAN_BATCH_SIZE = 50_000
+
+ZSCORE_FIELDS = ("weight_kg", "fat_percentage", "muscle_mass_percentage", "h2o_percentage")
+_VALUE_FIELDS = ("weight_kg", "fat_percentage", "fat_kg", "muscle_mass_percentage", "h2o_percentage")
+
+CohortStats = Dict[str, Tuple[int, float, float]]  # campo -> (quantidade, média, desvio padrão)
+
+# Estatísticas da coorte usadas na validação incremental: (expira_em, estatísticas)
+_cohort_cache: Dict[str, Tuple[float, CohortStats]] = {}
+
+
+def _columns(rows: Sequence[tuple], names: Sequence[str]) -> Dict[str, np.ndarray]:
+    values = list(zip(*rows)) if rows else [()] * len(names)
+    columns = {}
+    for name, column in zip(names, values):
+        dtype = float if name in _VALUE_FIELDS else object
+        columns[name] = np.asarray(column, dtype=dtype)
+    return columns
+
+
+def detect_outliers(
+    columns: Dict[str, np.ndarray], cohort: CohortStats
+) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+    """
+    Comentário em pt-BR: aplica todas as regras de uma vez sobre arrays alinhados, com as
+    linhas ordenadas por paciente e data. Retorna, por código, a máscara das linhas
+    sinalizadas e o valor de referência de cada linha.
+
+    - weight_jump: a pesagem difere mais de WEIGHT_JUMP_RATIO das vizinhas do mesmo paciente
+      (um pico isolado sinaliza só a linha errada, não a seguinte);
+    - fat_kg_inconsistent: fat_kg distante de weight_kg × fat_percentage / 100;
+    - zscore_<campo>: |z| acima de ZSCORE_THRESHOLD em relação à coorte inteira.
+    """
+    patient_ids = columns["patient_id"]
+    weight = columns["weight_kg"]
+    size = weight.size
+    results: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+
+    has_previous = np.zeros(size, dtype=bool)
+    has_second_previous = np.zeros(size, dtype=bool)
+    has_next = np.zeros(size, dtype=bool)
+    if size > 1:
+        same_patient = patient_ids[1:] == patient_ids[:-1]
+        has_previous[1:] = same_patient
+        has_next[:-1] = same_patient
+        has_second_previous[2:] = same_patient[1:] & same_patient[:-1]
+    previous_weight = np.where(has_previous, np.roll(weight, 1), np.nan)
+    second_previous_weight = np.where(has_second_previous, np.roll(weight, 2), np.nan)
+    next_weight = np.where(has_next, np.roll(weight, -1), np.nan)
+
+    def jumped(reference: np.ndarray) -> np.ndarray:
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.abs(weight - reference) / reference > WEIGHT_JUMP_RATIO
+
+    # A pesagem que volta ao patamar anterior ao pico não é sinalizada
+    recovered = has_second_previous & ~jumped(second_previous_weight)
+    weight_jump = (
+        (jumped(previous_weight) | ~has_previous)
+        & (jumped(next_weight) | ~has_next)
+        & (has_previous | has_next)
+        & ~recovered
+    )
+    results["weight_jump"] = (weight_jump, np.where(has_previous, previous_weight, next_weight))
+
+    expected_fat_kg = weight * columns["fat_percentage"] / 100
+    tolerance = np.maximum(FAT_KG_TOLERANCE_KG, FAT_KG_TOLERANCE_RATIO * expected_fat_kg)
+    results["fat_kg_inconsistent"] = (
+        np.abs(columns["fat_kg"] - expected_fat_kg) > tolerance,
+        expected_fat_kg,
+    )
+
+    for field in ZSCORE_FIELDS:
+        count, mean, std = cohort.get(field, (0, 0.0, 0.0))
+        if count < MIN_COHORT_SIZE or std <= 0:
+            continue
+        zscores = (columns[field] - mean) / std
+        results[f"zscore_{field}"] = (np.abs(zscores) > ZSCORE_THRESHOLD, np.full(size, mean))
+
+    return results
+
+
+def _field_of(code: str) -> str:
+    if code == "weight_jump":
+        return "weight_kg"
+    if code == "fat_kg_inconsistent":
+        return "fat_kg"
+    return code[len("zscore_"):]
+
+
+def _flags_for_row(
+    columns: Dict[str, np.ndarray], results: Dict[str, Tuple[np.ndarray, np.ndarray]], row: int
+) -> List[QualityFlag]:
+    flags = []
+    for code, (mask, reference) in results.items():
+        if mask[row]:
+            field = _field_of(code)
+            flags.append(
+                QualityFlag(
+                    code=code,
+                    field=field,
+                    value=round(float(columns[field][row]), 2),
+                    reference=round(float(reference[row]), 2),
+                )
+            )
+    return flags
+
+
+def _cohort_from_columns(columns: Dict[str, np.ndarray]) -> CohortStats:
+    return {
+        field: (
+            int(columns[field].size),
+            float(columns[field].mean()) if columns[field].size else 0.0,
+            float(columns[field].std()) if columns[field].size else 0.0,
+        )
+        for field in ZSCORE_FIELDS
+    }
+
+
+def cohort_stats(db: Session) -> CohortStats:
+    """
+    Comentário em pt-BR: média e desvio padrão da coorte calculados no banco (média dos
+    quadrados, portável) e mantidos em cache por COHORT_STATS_TTL_SECONDS neste processo
+    """
+    cached = _cohort_cache.get("cohort")
+    if cached is not None and cached[0] > time.monotonic():
+        return cached[1]
+
+    aggregates = []
+    for field in ZSCORE_FIELDS:
+        column = getattr(BodyComposition, field)
+        aggregates.extend([func.avg(column), func.avg(column * column)])
+    row = db.query(func.count(BodyComposition.id), *aggregates).one()
+
+    count = int(row[0] or 0)
+    stats: CohortStats = {}
+    for index, field in enumerate(ZSCORE_FIELDS):
+        mean = float(row[1 + 2 * index] or 0)
+        mean_of_squares = float(row[2 + 2 * index] or 0)
+        stats[field] = (count, mean, max(mean_of_squares - mean * mean, 0.0) ** 0.5)
+
+    _cohort_cache["cohort"] = (time.monotonic() + COHORT_STATS_TTL_SECONDS, stats)
+    return stats
+
+
+_ROW_NAMES = ("body_composition_id", "session_id", "patient_id", "session_date") + _VALUE_FIELDS
+
+
+def _row_columns():
+    return (
+        BodyComposition.id,
+        BodyComposition.session_id,
+        Cycle.patient_id,
+        SessionModel.session_date,
+        *(getattr(BodyComposition, field) for field in _VALUE_FIELDS),
+    )
+
+
+def _weighings_statement():
+    return (
+        select(*_row_columns())
+        .select_from(BodyComposition)
+        .join(SessionModel, SessionModel.id == BodyComposition.session_id)
+        .join(Cycle, Cycle.id == SessionModel.cycle_id)
+    )
+
+
+# Comentário em pt-BR: ordem da varredura completa (por paciente e data; o id desempata)
+_SCAN_ORDER = (Cycle.patient_id, SessionModel.session_date, BodyComposition.id)
+
+
+def _scan_statement():
+    """
+    Comentário em pt-BR: só colunas numéricas; o paciente vira um código inteiro
+    (dense_rank) no próprio banco e os valores já chegam como float, então nenhum UUID
+    ou Decimal é criado na varredura
+    """
+    return (
+        select(
+            func.dense_rank().over(order_by=Cycle.patient_id),
+            *(cast(getattr(BodyComposition, field), Float) for field in _VALUE_FIELDS),
+        )
+        .select_from(BodyComposition)
+        .join(SessionModel, SessionModel.id == BodyComposition.session_id)
+        .join(Cycle, Cycle.id == SessionModel.cycle_id)
+        .order_by(*_SCAN_ORDER)
+    )
+
+
+def _scan_columns(db: Session, batch_size: int) -> Dict[str, np.ndarray]:
+    result = db.execute(_scan_statement().execution_options(yield_per=batch_size))
+    batches = [np.array([tuple(row) for row in rows], dtype=float) for rows in result.partitions()]
+    matrix = np.concatenate(batches) if batches else np.empty((0, 1 + len(_VALUE_FIELDS)))
+    columns = {"patient_id": matrix[:, 0].astype(np.int64)}
+    for index, field in enumerate(_VALUE_FIELDS, start=1):
+        columns[field] = matrix[:, index]
+    return columns
+
+
+def _rows_at(db: Session, positions: Sequence[int]) -> Dict[int, tuple]:
+    """
+    Comentário em pt-BR: identificadores das linhas sinalizadas, pela posição na varredura
+    """
+    numbered = (
+        _weighings_statement()
+        .add_columns(func.row_number().over(order_by=_SCAN_ORDER).label("position"))
+        .subquery()
+    )
+    rows = db.execute(
+        select(numbered).where(numbered.c.position.in_([position + 1 for position in positions]))
+    ).all()
+    return {row.position - 1: row for row in rows}
+
+
+def scan_outliers(
+    db: Session, limit: int = 100, code: Optional[str] = None, batch_size: int = SCAN_BATCH_SIZE
+) -> BodyCompositionOutliersResponse:
+    """
+    Comentário em pt-BR: valida todas as composições corporais numa leitura colunar em
+    lotes; os identificadores são buscados depois, só para as linhas devolvidas
+    """
+    columns = _scan_columns(db, batch_size)
+    results = detect_outliers(columns, _cohort_from_columns(columns))
+    if code is not None:
+        results = {name: result for name, result in results.items() if name == code}
+
+    flagged_mask = np.zeros(columns["weight_kg"].size, dtype=bool)
+    counts_by_code: Counter = Counter()
+    for name, (mask, _) in results.items():
+        flagged_mask |= mask
+        counts_by_code[name] = int(mask.sum())
+    flagged_rows = np.flatnonzero(flagged_mask)
+
+    returned_rows = flagged_rows[:limit].tolist()
+    details = _rows_at(db, returned_rows) if returned_rows else {}
+    items = [
+        BodyCompositionOutlierItem(
+            body_composition_id=details[row].id,
+            session_id=details[row].session_id,
+            patient_id=details[row].patient_id,
+            session_date=details[row].session_date,
+            flags=_flags_for_row(columns, results, row),
+        )
+        for row in returned_rows
+    ]
+    return BodyCompositionOutliersResponse(
+        checked=int(columns["weight_kg"].size),
+        flagged=int(flagged_rows.size),
+        counts_by_code={name: count for name, count in counts_by_code.items() if count},
+        items=items,
+    )
+
+
+def check_session(db: Session, session: SessionModel) -> List[QualityFlag]:
+    """
+    Comentário em pt-BR: validação incremental de uma sessão recém gravada. Usa as mesmas
+    regras da varredura completa sobre as duas pesagens anteriores, a atual e a seguinte do
+    paciente, com as estatísticas da coorte em cache.
+    """
+    if session.body_composition is None:
+        return []
+
+    patient_id = session.cycle.patient_id
+    neighbours = _weighings_statement().where(
+        Cycle.patient_id == patient_id, SessionModel.id != session.id
+    )
+    previous_rows = db.execute(
+        neighbours.where(SessionModel.session_date <= session.session_date)
+        .order_by(SessionModel.session_date.desc())
+        .limit(2)
+    ).all()
+    next_row = db.execute(
+        neighbours.where(SessionModel.session_date > session.session_date)
+        .order_by(SessionModel.session_date)
+        .limit(1)
+    ).first()
+    current_row = db.execute(
+        _weighings_statement().where(BodyComposition.id == session.body_composition.id)
+    ).one()
+
+    rows = list(reversed(previous_rows)) + [current_row] + ([next_row] if next_row is not None else [])
+    columns = _columns(rows, _ROW_NAMES)
+    results = detect_outliers(columns, cohort_stats(db))
+    return _flags_for_row(columns, results, len(previous_rows))
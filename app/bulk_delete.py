@@ -0,0 +1,204 @@
+import os
+from typing import List, Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy import func, select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from app import dashboard_counters, session_rollups
+from app.models.body_composition import BodyComposition
+from app.models.cycle import Cycle
+from app.models.patient import Patient
+from app.models.patient_weight_trend import PatientWeightTrend
+from app.models.session import Session as SessionModel
+from app.models.user import User
+from app.schemas.bulk_delete import BulkDeleteResponse
+
+
+# Comentário em pt-BR: a remoção em massa é irreversível e qualquer token válido chega aos
+# endpoints, então eles ficam desligados a menos que o ambiente (ex.: staging) os habilite
+ENABLED = os.getenv("ENABLE_BULK_DELETE", "false").strip().lower() in ("1", "true", "yes")
+
+
+def require_enabled() -> None:
+    """
+    Comentário em pt-BR: dependência dos endpoints de remoção em massa; 403 quando desligados
+    """
+    if not ENABLED:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Bulk delete is disabled (set ENABLE_BULK_DELETE=true to enable it)",
+        )
+
+
+def require_scope(criteria: List, delete_all: bool) -> None:
+    """
+    Comentário em pt-BR: evita apagar a tabela inteira por engano; sem filtros é preciso
+    pedir ``all=true`` explicitamente
+    """
+    if not criteria and not delete_all:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Provide at least one filter or all=true",
+        )
+
+
+def _cascades_in_db(db: Session) -> bool:
+    # O SQLite só aplica ON DELETE CASCADE com PRAGMA foreign_keys ligado; fora do
+    # Postgres os dependentes são removidos explicitamente, também em conjunto
+    return db.get_bind().dialect.name == "postgresql"
+
+
+def _count(db: Session, model, *criteria) -> int:
+    return db.query(model).filter(*criteria).count()
+
+
+def _begin_consistent_delete(db: Session) -> None:
+    """
+    Comentário em pt-BR: no Postgres a remoção roda em REPEATABLE READ, então contadores,
+    dias afetados e o DELETE enxergam o mesmo conjunto de linhas; um paciente ou sessão que
+    passe a atender aos filtros depois do início não é apagado sem ser descontado
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        # O nível de isolamento só pode ser escolhido antes da transação começar
+        db.rollback()
+        db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+
+
+def _lock(db: Session, model, *criteria) -> int:
+    # SELECT ... FOR UPDATE nas linhas do conjunto: escritas concorrentes nelas (ou novas
+    # sessões/ciclos apontando para elas) esperam o fim da remoção em vez de escapar da conta
+    locked = select(model.id).where(*criteria).with_for_update().subquery()
+    return db.execute(select(func.count()).select_from(locked)).scalar_one()
+
+
+def _conflict(exc: OperationalError) -> Optional[HTTPException]:
+    # 40001/40P01: outra transação alterou as linhas do conjunto depois do snapshot
+    if getattr(exc.orig, "pgcode", None) in ("40001", "40P01"):
+        return HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Matched rows changed concurrently; retry the bulk delete",
+        )
+    return None
+
+
+def _delete_sessions_of(db: Session, cycle_ids) -> None:
+    session_ids = select(SessionModel.id).where(SessionModel.cycle_id.in_(cycle_ids))
+    db.query(BodyComposition).filter(BodyComposition.session_id.in_(session_ids)).delete(
+        synchronize_session=False
+    )
+    db.query(SessionModel).filter(SessionModel.cycle_id.in_(cycle_ids)).delete(synchronize_session=False)
+
+
+def delete_patients(db: Session, criteria: List, dry_run: bool = False) -> BulkDeleteResponse:
+    """
+    Comentário em pt-BR: remove os pacientes que atendem aos filtros com um único DELETE;
+    ciclos, sessões, composições corporais e tendências de peso saem pelas cascatas do banco.
+
+    Os contadores do dashboard e os agregados diários são ajustados na mesma transação com
+    consultas agrupadas sobre o conjunto, sem carregar os pacientes; pacientes e ciclos do
+    conjunto ficam bloqueados antes dessas contas. Com ``dry_run`` apenas as contagens são
+    devolvidas. Conflito com escrita concorrente vira 409 e nada é removido.
+    """
+    patient_ids = select(Patient.id).where(*criteria)
+    cycle_ids = select(Cycle.id).where(Cycle.patient_id.in_(patient_ids))
+
+    if dry_run:
+        matched = _count(db, Patient, *criteria)
+        related = {
+            "cycles": _count(db, Cycle, Cycle.id.in_(cycle_ids)),
+            "sessions": _count(db, SessionModel, SessionModel.cycle_id.in_(cycle_ids)),
+        }
+        db.rollback()
+        return BulkDeleteResponse(dry_run=True, matched=matched, related=related)
+
+    _begin_consistent_delete(db)
+    try:
+        _lock(db, Patient, *criteria)
+        related = {
+            "cycles": _lock(db, Cycle, Cycle.patient_id.in_(patient_ids)),
+            "sessions": _count(db, SessionModel, SessionModel.cycle_id.in_(cycle_ids)),
+        }
+        dashboard_counters.apply_deltas(db, dashboard_counters.patient_set_deltas(db, patient_ids, cycle_ids))
+        affected_days = session_rollups.days_for_cycles(db, cycle_ids)
+
+        if not _cascades_in_db(db):
+            db.query(BodyComposition).filter(BodyComposition.patient_id.in_(patient_ids)).delete(
+                synchronize_session=False
+            )
+            db.query(PatientWeightTrend).filter(PatientWeightTrend.patient_id.in_(patient_ids)).delete(
+                synchronize_session=False
+            )
+            _delete_sessions_of(db, cycle_ids)
+            db.query(Cycle).filter(Cycle.patient_id.in_(patient_ids)).delete(synchronize_session=False)
+        matched = db.query(Patient).filter(*criteria).delete(synchronize_session=False)
+
+        db.flush()
+        session_rollups.refresh_days(db, affected_days)
+        db.commit()
+    except OperationalError as exc:
+        db.rollback()
+        raise _conflict(exc) or exc
+    except Exception:
+        db.rollback()
+        raise
+    # Objetos já carregados na sessão podem ter sido removidos pelo DELETE em conjunto
+    db.expire_all()
+    return BulkDeleteResponse(dry_run=False, matched=matched, related=related)
+
+
+def delete_cycles(db: Session, criteria: List, dry_run: bool = False) -> BulkDeleteResponse:
+    """
+    Comentário em pt-BR: remove os ciclos que atendem aos filtros com um único DELETE; as
+    sessões e suas composições corporais saem pelas cascatas do banco
+    """
+    cycle_ids = select(Cycle.id).where(*criteria)
+
+    if dry_run:
+        matched = _count(db, Cycle, *criteria)
+        related = {"sessions": _count(db, SessionModel, SessionModel.cycle_id.in_(cycle_ids))}
+        db.rollback()
+        return BulkDeleteResponse(dry_run=True, matched=matched, related=related)
+
+    _begin_consistent_delete(db)
+    try:
+        _lock(db, Cycle, *criteria)
+        related = {"sessions": _count(db, SessionModel, SessionModel.cycle_id.in_(cycle_ids))}
+        dashboard_counters.apply_deltas(db, dashboard_counters.session_activator_deltas_for_cycles(db, cycle_ids))
+        affected_days = session_rollups.days_for_cycles(db, cycle_ids)
+
+        if not _cascades_in_db(db):
+            _delete_sessions_of(db, cycle_ids)
+        matched = db.query(Cycle).filter(*criteria).delete(synchronize_session=False)
+
+        db.flush()
+        session_rollups.refresh_days(db, affected_days)
+        db.commit()
+    except OperationalError as exc:
+        db.rollback()
+        raise _conflict(exc) or exc
+    except Exception:
+        db.rollback()
+        raise
+    db.expire_all()
+    return BulkDeleteResponse(dry_run=False, matched=matched, related=related)
+
+
+def delete_users(db: Session, criteria: List, dry_run: bool = False) -> BulkDeleteResponse:
+    """
+    Comentário em pt-BR: remove os usuários que atendem aos filtros com um único DELETE
+    """
+    if dry_run:
+        matched = _count(db, User, *criteria)
+        db.rollback()
+        return BulkDeleteResponse(dry_run=True, matched=matched)
+
+    try:
+        matched = db.query(User).filter(*criteria).delete(synchronize_session=False)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    db.expire_all()
+    return BulkDeleteResponse(dry_run=False, matched=matched)
@@ -0,0 +1,313 @@
+from collections import Counter
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import extract, func
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.models.activator import Activator
+from app.models.cycle import Cycle
+from app.models.dashboard_counter import DashboardCounter
+from app.models.medication import Medication
+from app.models.patient import Patient, GenderEnum, TreatmentLocationEnum
+from app.models.session import Session as SessionModel
+from app.schemas.dashboard import (
+    ActivatorUsageItem,
+    GenderDistributionItem,
+    MedicationPreferenceItem,
+    TreatmentLocationDistributionItem,
+)
+
+# Comentário em pt-BR: métricas mantidas na tabela dashboard_counters
+PATIENTS = "patients"
+BIRTH_YEAR_SUM = "birth_year_sum"
+BIRTHDAY = "birthday"
+GENDER = "gender"
+TREATMENT_LOCATION = "treatment_location"
+PREFERRED_MEDICATION = "preferred_medication"
+ACTIVATOR = "activator"
+
+CounterKey = Tuple[str, str]
+
+
+def _enum_value(value) -> str:
+    return value.value if hasattr(value, "value") else str(value)
+
+
+def patient_deltas(patient: Patient, sign: int = 1) -> Counter:
+    """
+    Comentário em pt-BR: contribuição de um paciente para os contadores do dashboard.
+
+    A idade média é derivada da soma dos anos de nascimento e da contagem por dia de
+    aniversário (MM-DD), o que mantém o cálculo exato sem depender da data atual.
+    """
+    deltas: Counter = Counter()
+    birth_date: date = patient.birth_date
+    deltas[(PATIENTS, "total")] += sign
+    deltas[(BIRTH_YEAR_SUM, "total")] += sign * birth_date.year
+    deltas[(BIRTHDAY, birth_date.strftime("%m-%d"))] += sign
+    deltas[(GENDER, _enum_value(patient.gender))] += sign
+    deltas[(TREATMENT_LOCATION, _enum_value(patient.treatment_location))] += sign
+    if patient.preferred_medication_id is not None:
+        deltas[(PREFERRED_MEDICATION, str(patient.preferred_medication_id))] += sign
+    return deltas
+
+
+def activator_deltas(activator_ids: Iterable[Optional[UUID]], sign: int = 1) -> Counter:
+    """
+    Comentário em pt-BR: contribuição de sessões para o contador de uso de ativadores
+    """
+    deltas: Counter = Counter()
+    for activator_id in activator_ids:
+        if activator_id is not None:
+            deltas[(ACTIVATOR, str(activator_id))] += sign
+    return deltas
+
+
+def apply_deltas(db: Session, deltas: Counter) -> None:
+    """
+    Comentário em pt-BR: aplica os incrementos com upsert na mesma transação da escrita
+    """
+    rows = [
+        {"metric": metric, "key": key, "value": value}
+        for (metric, key), value in deltas.items()
+        if value != 0
+    ]
+    if not rows:
+        return
+
+    dialect = postgresql if db.get_bind().dialect.name == "postgresql" else sqlite
+    statement = dialect.insert(DashboardCounter)
+    statement = statement.on_conflict_do_update(
+        index_elements=[DashboardCounter.metric, DashboardCounter.key],
+        set_={"value": DashboardCounter.value + statement.excluded.value},
+    )
+    # Ordenar as chaves evita deadlocks entre transações concorrentes
+    for row in sorted(rows, key=lambda item: (item["metric"], item["key"])):
+        db.execute(statement, row)
+
+
+def session_activator_deltas_for_patient(db: Session, patient_id: UUID, sign: int = -1) -> Counter:
+    """
+    Comentário em pt-BR: contribuição das sessões de um paciente, usada antes de removê-lo
+    """
+    rows = (
+        db.query(SessionModel.activator_id, func.count(SessionModel.id))
+        .join(Cycle, Cycle.id == SessionModel.cycle_id)
+        .filter(Cycle.patient_id == patient_id, SessionModel.activator_id.isnot(None))
+        .group_by(SessionModel.activator_id)
+        .all()
+    )
+    return Counter({(ACTIVATOR, str(activator_id)): sign * count for activator_id, count in rows})
+
+
+def session_activator_deltas_for_cycle(db: Session, cycle_id: UUID, sign: int = -1) -> Counter:
+    """
+    Comentário em pt-BR: contribuição das sessões de um ciclo, usada antes de removê-lo
+    """
+    rows = (
+        db.query(SessionModel.activator_id, func.count(SessionModel.id))
+        .filter(SessionModel.cycle_id == cycle_id, SessionModel.activator_id.isnot(None))
+        .group_by(SessionModel.activator_id)
+        .all()
+    )
+    return Counter({(ACTIVATOR, str(activator_id)): sign * count for activator_id, count in rows})
+
+
+def drop_preferred_medication(db: Session, medication_id: UUID) -> None:
+    """
+    Comentário em pt-BR: a remoção da medicação anula a preferência dos pacientes (SET NULL)
+    """
+    db.query(DashboardCounter).filter(
+        DashboardCounter.metric == PREFERRED_MEDICATION,
+        DashboardCounter.key == str(medication_id),
+    ).delete(synchronize_session=False)
+
+
+def _load(db: Session) -> Dict[CounterKey, int]:
+    return {
+        (metric, key): value
+        for metric, key, value in db.query(
+            DashboardCounter.metric, DashboardCounter.key, DashboardCounter.value
+        ).all()
+    }
+
+
+def _average_age(counters: Dict[CounterKey, int], today: date) -> Optional[float]:
+    total = counters.get((PATIENTS, "total"), 0)
+    if total <= 0:
+        return None
+    today_key = today.strftime("%m-%d")
+    birthdays_ahead = sum(
+        value
+        for (metric, key), value in counters.items()
+        if metric == BIRTHDAY and key > today_key
+    )
+    age_sum = total * today.year - counters.get((BIRTH_YEAR_SUM, "total"), 0) - birthdays_ahead
+    return age_sum / total
+
+
+def _ranked_names(db: Session, model, counters: Dict[CounterKey, int], metric: str) -> List[Tuple[str, int]]:
+    counts = {
+        UUID(key): value
+        for (counter_metric, key), value in counters.items()
+        if counter_metric == metric and value > 0
+    }
+    if not counts:
+        return []
+    names = dict(db.query(model.id, model.name).filter(model.id.in_(list(counts))).all())
+    ranked = [(names[item_id], count) for item_id, count in counts.items() if item_id in names]
+    return sorted(ranked, key=lambda item: item[1], reverse=True)
+
+
+def read_counter_stats(db: Session) -> dict:
+    """
+    Comentário em pt-BR: monta os campos do dashboard mantidos pelos contadores incrementais
+    """
+    counters = _load(db)
+    average_age = _average_age(counters, date.today())
+
+    return {
+        "total_patients": counters.get((PATIENTS, "total"), 0),
+        "average_age": round(average_age, 1) if average_age is not None else None,
+        "activators_usage": [
+            ActivatorUsageItem(name=name, count=count)
+            for name, count in _ranked_names(db, Activator, counters, ACTIVATOR)
+        ],
+        "medications_preference": [
+            MedicationPreferenceItem(name=name, count=count)
+            for name, count in _ranked_names(db, Medication, counters, PREFERRED_MEDICATION)
+        ],
+        "gender_distribution": [
+            GenderDistributionItem(
+                gender="Masculino" if gender == GenderEnum.male else "Feminino",
+                count=counters.get((GENDER, gender.value), 0),
+            )
+            for gender in GenderEnum
+        ],
+        "treatment_location_distribution": [
+            TreatmentLocationDistributionItem(
+                location="Clínica" if location == TreatmentLocationEnum.clinic else "Domicílio",
+                count=counters.get((TREATMENT_LOCATION, location.value), 0),
+            )
+            for location in TreatmentLocationEnum
+        ],
+    }
+
+
+def _patient_counts(db: Session, *criteria) -> Counter:
+    counts: Counter = Counter()
+
+    total, birth_year_sum = (
+        db.query(func.count(Patient.id), func.sum(extract("year", Patient.birth_date)))
+        .filter(*criteria)
+        .one()
+    )
+    counts[(PATIENTS, "total")] = total or 0
+    counts[(BIRTH_YEAR_SUM, "total")] = int(birth_year_sum or 0)
+
+    birthdays = (
+        db.query(
+            extract("month", Patient.birth_date),
+            extract("day", Patient.birth_date),
+            func.count(Patient.id),
+        )
+        .filter(*criteria)
+        .group_by(extract("month", Patient.birth_date), extract("day", Patient.birth_date))
+        .all()
+    )
+    for month, day, count in birthdays:
+        counts[(BIRTHDAY, f"{int(month):02d}-{int(day):02d}")] = count
+
+    for column, metric in (
+        (Patient.gender, GENDER),
+        (Patient.treatment_location, TREATMENT_LOCATION),
+        (Patient.preferred_medication_id, PREFERRED_MEDICATION),
+    ):
+        for value, count in (
+            db.query(column, func.count(Patient.id))
+            .filter(column.isnot(None), *criteria)
+            .group_by(column)
+            .all()
+        ):
+            counts[(metric, _enum_value(value))] = count
+    return counts
+
+
+def _activator_counts(db: Session, *criteria) -> Counter:
+    return Counter(
+        {
+            (ACTIVATOR, str(activator_id)): count
+            for activator_id, count in db.query(SessionModel.activator_id, func.count(SessionModel.id))
+            .filter(SessionModel.activator_id.isnot(None), *criteria)
+            .group_by(SessionModel.activator_id)
+            .all()
+        }
+    )
+
+
+def patient_set_deltas(db: Session, patient_ids, cycle_ids, sign: int = -1) -> Counter:
+    """
+    Comentário em pt-BR: contribuição de um conjunto de pacientes (e das sessões dos seus
+    ciclos) calculada com consultas agrupadas, usada antes da remoção em massa.
+    ``patient_ids`` e ``cycle_ids`` são subconsultas ``select(...id)``.
+    """
+    counts = _patient_counts(db, Patient.id.in_(patient_ids))
+    counts.update(_activator_counts(db, SessionModel.cycle_id.in_(cycle_ids)))
+    return Counter({key: sign * value for key, value in counts.items() if value != 0})
+
+
+def session_activator_deltas_for_cycles(db: Session, cycle_ids, sign: int = -1) -> Counter:
+    """
+    Comentário em pt-BR: contribuição das sessões de um conjunto de ciclos (subconsulta
+    ``select(Cycle.id)``), usada antes da remoção em massa
+    """
+    counts = _activator_counts(db, SessionModel.cycle_id.in_(cycle_ids))
+    return Counter({key: sign * value for key, value in counts.items()})
+
+
+def recompute_counters(db: Session) -> Dict[CounterKey, int]:
+    """
+    Comentário em pt-BR: recalcula todos os contadores do zero com consultas agrupadas
+    """
+    expected = _patient_counts(db)
+    expected.update(_activator_counts(db))
+    return {key: value for key, value in expected.items() if value != 0}
+
+
+def reconcile_counters(db: Session, fix: bool = False) -> List[Tuple[str, str, int, int]]:
+    """
+    Comentário em pt-BR: compara os contadores gravados com o recálculo completo.
+
+    Retorna a lista de divergências (metric, key, gravado, esperado). Com ``fix`` a tabela
+    é regravada; no Postgres ela fica bloqueada para escrita durante o recálculo, então
+    escritas concorrentes aguardam e aplicam seus incrementos sobre o valor corrigido.
+    """
+    if fix and db.get_bind().dialect.name == "postgresql":
+        db.connection().exec_driver_sql("LOCK TABLE dashboard_counters IN EXCLUSIVE MODE")
+
+    stored = {key: value for key, value in _load(db).items() if value != 0}
+    expected = recompute_counters(db)
+
+    drift = [
+        (metric, key, stored.get((metric, key), 0), expected.get((metric, key), 0))
+        for metric, key in sorted(set(stored) | set(expected))
+        if stored.get((metric, key), 0) != expected.get((metric, key), 0)
+    ]
+
+    if fix and drift:
+        db.query(DashboardCounter).delete(synchronize_session=False)
+        db.bulk_insert_mappings(
+            DashboardCounter,
+            [
+                {"metric": metric, "key": key, "value": value}
+                for (metric, key), value in expected.items()
+            ],
+        )
+        db.commit()
+    else:
+        db.rollback()
+
+    return drift
@@ -0,0 +1,50 @@
+from typing import Dict
+
+import numpy as np
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Comentário em pt-BR: Largest-Triangle-Three-Buckets. Mantém o primeiro e o último ponto e,
+    em cada balde intermediário, o ponto que forma o maior triângulo com o ponto escolhido no
+    balde anterior e a média do próximo balde. Retorna os índices escolhidos, em ordem.
+    """
+    size = x.size
+    if threshold >= size or threshold < 3:
+        return np.arange(size)
+
+    edges = np.linspace(1, size - 1, threshold - 1).astype(int)
+    selected = np.empty(threshold, dtype=int)
+    selected[0], selected[-1] = 0, size - 1
+
+    previous = 0
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        next_start, next_end = edges[bucket + 1], (edges[bucket + 2] if bucket + 2 < edges.size else size)
+        average_x = x[next_start:next_end].mean()
+        average_y = y[next_start:next_end].mean()
+        # Área (dobrada) dos triângulos de todos os candidatos do balde de uma vez
+        areas = np.abs(
+            (x[previous] - average_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (average_y - y[previous])
+        )
+        previous = start + int(np.argmax(areas))
+        selected[bucket + 1] = previous
+    return selected
+
+
+def bucket_means(x: np.ndarray, columns: Dict[str, np.ndarray], buckets: int) -> Dict[str, np.ndarray]:
+    """
+    Comentário em pt-BR: divide a série em baldes de tamanho igual (por posição) e devolve a
+    média de x e de cada coluna por balde, calculadas com bincount
+    """
+    size = x.size
+    if buckets >= size:
+        return {"x": x, **columns}
+
+    codes = (np.arange(size) * buckets) // size
+    counts = np.bincount(codes, minlength=buckets)
+    result = {"x": np.bincount(codes, weights=x, minlength=buckets) / counts}
+    for name, values in columns.items():
+        result[name] = np.bincount(codes, weights=values, minlength=buckets) / counts
+    return result
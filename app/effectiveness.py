@@ -0,0 +1,216 @@
+from datetime import date, datetime
+from typing import Dict, List, Tuple
+
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.models.activator import Activator
+from app.models.body_composition import BodyComposition
+from app.models.medication import Medication
+from app.models.session import Session as SessionModel
+from app.schemas.dashboard import (
+    ActivatorEffectivenessItem,
+    EffectivenessResponse,
+    EffectivenessStats,
+    MedicationEffectivenessItem,
+)
+
+
+def _load_deltas(db: Session, start_date: date, end_date: date) -> Dict[str, np.ndarray]:
+    """
+    Comentário em pt-BR: uma única passada no banco. Para cada pesagem do período, o lag()
+    traz a pesagem anterior do paciente e o tratamento aplicado naquela sessão, ao qual a
+    variação é atribuída. O resultado volta em colunas (arrays).
+
+    A janela não percorre o histórico inteiro: para cada paciente com pesagem no período ela
+    começa na última pesagem anterior ao início (quando existe), que é a única linha antiga
+    de que o lag() precisa.
+    """
+    start_datetime = datetime.combine(start_date, datetime.min.time())
+    end_datetime = datetime.combine(end_date, datetime.max.time())
+
+    patients_in_period = (
+        db.query(BodyComposition.patient_id)
+        .join(SessionModel, SessionModel.id == BodyComposition.session_id)
+        .filter(SessionModel.session_date >= start_datetime, SessionModel.session_date <= end_datetime)
+    )
+    previous_weighing = (
+        db.query(
+            BodyComposition.patient_id.label("patient_id"),
+            func.max(SessionModel.session_date).label("since"),
+        )
+        .join(SessionModel, SessionModel.id == BodyComposition.session_id)
+        .filter(
+            BodyComposition.patient_id.in_(patients_in_period),
+            SessionModel.session_date < start_datetime,
+        )
+        .group_by(BodyComposition.patient_id)
+        .subquery()
+    )
+
+    def previous(column):
+        return func.lag(column, type_=column.type).over(
+            partition_by=BodyComposition.patient_id, order_by=SessionModel.session_date
+        )
+
+    weighings = (
+        db.query(
+            SessionModel.session_date.label("session_date"),
+            (previous(BodyComposition.weight_kg) - BodyComposition.weight_kg).label("weight_loss"),
+            (previous(BodyComposition.fat_percentage) - BodyComposition.fat_percentage).label("fat_loss"),
+            previous(SessionModel.activator_id).label("activator_id"),
+            previous(SessionModel.medication_id).label("medication_id"),
+            previous(SessionModel.dosage_mg).label("dosage_mg"),
+        )
+        .select_from(SessionModel)
+        .join(BodyComposition, BodyComposition.session_id == SessionModel.id)
+        .outerjoin(previous_weighing, previous_weighing.c.patient_id == BodyComposition.patient_id)
+        .filter(
+            SessionModel.session_date >= func.coalesce(previous_weighing.c.since, start_datetime),
+            SessionModel.session_date <= end_datetime,
+        )
+        .subquery()
+    )
+
+    rows = (
+        db.query(
+            weighings.c.weight_loss,
+            weighings.c.fat_loss,
+            weighings.c.activator_id,
+            weighings.c.medication_id,
+            weighings.c.dosage_mg,
+        )
+        .filter(
+            weighings.c.session_date >= start_datetime,
+            weighings.c.weight_loss.isnot(None),
+        )
+        .all()
+    )
+
+    weight_loss, fat_loss, activator_ids, medication_ids, dosages = zip(*rows) if rows else ((),) * 5
+    return {
+        "weight_loss": np.asarray(weight_loss, dtype=float),
+        "fat_loss": np.asarray(fat_loss, dtype=float),
+        "activator_id": np.asarray(activator_ids, dtype=object),
+        "medication_id": np.asarray(medication_ids, dtype=object),
+        "dosage_mg": np.asarray(dosages, dtype=object),
+    }
+
+
+def _grouped_quantile(sorted_values: np.ndarray, starts: np.ndarray, counts: np.ndarray, q: float) -> np.ndarray:
+    # Interpolação linear (mesmo critério do np.quantile) calculada para todos os grupos de uma vez
+    position = starts + q * (counts - 1)
+    lower = np.floor(position).astype(int)
+    upper = np.ceil(position).astype(int)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def _grouped_stats(codes: np.ndarray, group_count: int, values: np.ndarray) -> List[EffectivenessStats]:
+    """
+    Comentário em pt-BR: média, mediana e p90 de cada grupo sem laço por grupo: bincount
+    para as médias e uma ordenação única (grupo, valor) para os quantis
+    """
+    counts = np.bincount(codes, minlength=group_count)
+    means = np.bincount(codes, weights=values, minlength=group_count) / counts
+
+    order = np.lexsort((values, codes))
+    sorted_values = values[order]
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    medians = _grouped_quantile(sorted_values, starts, counts, 0.5)
+    p90s = _grouped_quantile(sorted_values, starts, counts, 0.9)
+
+    return [
+        EffectivenessStats(
+            mean=round(float(mean), 2),
+            median=round(float(median), 2),
+            p90=round(float(p90), 2),
+        )
+        for mean, median, p90 in zip(means, medians, p90s)
+    ]
+
+
+def _cohorts(key_columns: List[np.ndarray], deltas: Dict[str, np.ndarray], mask: np.ndarray):
+    """
+    Comentário em pt-BR: agrupa as variações pela chave do tratamento (apenas linhas em ``mask``).
+    Cada coluna da chave vira códigos inteiros com np.unique e a combinação das colunas é
+    agrupada por um np.unique(axis=0), sem dicionário montado linha a linha.
+    """
+    if not mask.any():
+        return []
+    columns = [column[mask] for column in key_columns]
+    # str() deixa comparáveis UUIDs, Decimals e None na mesma coluna
+    column_codes = np.stack(
+        [np.unique(column.astype(str), return_inverse=True)[1] for column in columns], axis=1
+    )
+    _, first_rows, codes = np.unique(column_codes, axis=0, return_index=True, return_inverse=True)
+    codes = codes.reshape(-1)
+    unique_keys = [tuple(column[row] for column in columns) for row in first_rows]
+
+    counts = np.bincount(codes, minlength=len(unique_keys))
+    weight_stats = _grouped_stats(codes, len(unique_keys), deltas["weight_loss"][mask])
+    fat_stats = _grouped_stats(codes, len(unique_keys), deltas["fat_loss"][mask])
+    return list(zip(unique_keys, counts.tolist(), weight_stats, fat_stats))
+
+
+def compute_effectiveness(db: Session, start_date: date, end_date: date) -> EffectivenessResponse:
+    """
+    Comentário em pt-BR: estatísticas de perda de peso e de % de gordura por ativador e por
+    medicação/dosagem. Valores positivos indicam perda entre uma pesagem e a seguinte.
+    """
+    deltas = _load_deltas(db, start_date, end_date)
+
+    activator_cohorts = _cohorts(
+        [deltas["activator_id"]],
+        deltas,
+        np.not_equal(deltas["activator_id"], None),
+    )
+    medication_cohorts = _cohorts(
+        [deltas["medication_id"], deltas["dosage_mg"]],
+        deltas,
+        np.not_equal(deltas["medication_id"], None),
+    )
+
+    activator_names = dict(
+        db.query(Activator.id, Activator.name)
+        .filter(Activator.id.in_([key[0] for key, *_ in activator_cohorts]))
+        .all()
+    ) if activator_cohorts else {}
+    medication_names = dict(
+        db.query(Medication.id, Medication.name)
+        .filter(Medication.id.in_([key[0] for key, *_ in medication_cohorts]))
+        .all()
+    ) if medication_cohorts else {}
+
+    activators = [
+        ActivatorEffectivenessItem(
+            activator_id=activator_id,
+            activator_name=activator_names.get(activator_id, ""),
+            observations=observations,
+            weight_loss_kg=weight_stats,
+            fat_percentage_loss=fat_stats,
+        )
+        for (activator_id,), observations, weight_stats, fat_stats in activator_cohorts
+    ]
+    medications = [
+        MedicationEffectivenessItem(
+            medication_id=medication_id,
+            medication_name=medication_names.get(medication_id, ""),
+            dosage_mg=float(dosage_mg) if dosage_mg is not None else None,
+            observations=observations,
+            weight_loss_kg=weight_stats,
+            fat_percentage_loss=fat_stats,
+        )
+        for (medication_id, dosage_mg), observations, weight_stats, fat_stats in medication_cohorts
+    ]
+
+    def ranking_key(item) -> Tuple[float, int]:
+        return (-item.weight_loss_kg.mean, -item.observations)
+
+    return EffectivenessResponse(
+        start_date=start_date,
+        end_date=end_date,
+        observations=int(deltas["weight_loss"].size),
+        activators=sorted(activators, key=ranking_key),
+        medications=sorted(medications, key=ranking_key),
+    )
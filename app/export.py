@@ -0,0 +1,136 @@
+import csv
+import enum
+import io
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Callable, Dict, Iterator, List
+from uuid import UUID
+
+from sqlalchemy import Select, select
+from sqlalchemy.orm import Session
+
+from app.models.body_composition import BodyComposition
+from app.models.cycle import Cycle
+from app.models.patient import Patient
+from app.models.session import Session as SessionModel
+
+# Comentário em pt-BR: linhas buscadas do cursor do servidor por vez. Cada lote vira um
+# único pedaço da resposta, então a memória do processo não depende do total exportado.
+EXPORT_BATCH_SIZE = 2000
+
+
+def _patients_statement() -> Select:
+    return select(
+        Patient.id.label("patient_id"),
+        Patient.name,
+        Patient.process_number,
+        Patient.gender,
+        Patient.birth_date,
+        Patient.treatment_location,
+        Patient.status,
+        Patient.preferred_medication_id,
+        Patient.created_at,
+    ).order_by(Patient.id)
+
+
+def _cycles_statement() -> Select:
+    return select(
+        Cycle.id.label("cycle_id"),
+        Cycle.patient_id,
+        Cycle.cycle_date,
+        Cycle.max_sessions,
+        Cycle.periodicity,
+        Cycle.type,
+        Cycle.created_at,
+    ).order_by(Cycle.patient_id, Cycle.cycle_date)
+
+
+def _sessions_statement() -> Select:
+    """
+    Comentário em pt-BR: uma linha por sessão com o ciclo e a composição corporal achatados,
+    para que a auditoria não precise de uma chamada por paciente
+    """
+    return (
+        select(
+            SessionModel.id.label("session_id"),
+            Cycle.patient_id,
+            SessionModel.cycle_id,
+            SessionModel.session_date,
+            SessionModel.medication_id,
+            SessionModel.dosage_mg,
+            SessionModel.activator_id,
+            SessionModel.notes,
+            BodyComposition.weight_kg,
+            BodyComposition.fat_percentage,
+            BodyComposition.fat_kg,
+            BodyComposition.muscle_mass_percentage,
+            BodyComposition.h2o_percentage,
+            BodyComposition.metabolic_age,
+            BodyComposition.visceral_fat,
+        )
+        .select_from(SessionModel)
+        .join(Cycle, Cycle.id == SessionModel.cycle_id)
+        .outerjoin(BodyComposition, BodyComposition.session_id == SessionModel.id)
+        .order_by(Cycle.patient_id, SessionModel.session_date)
+    )
+
+
+DATASETS: Dict[str, Callable[[], Select]] = {
+    "patients": _patients_statement,
+    "cycles": _cycles_statement,
+    "sessions": _sessions_statement,
+}
+
+
+def _plain(value):
+    if value is None:
+        return None
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (UUID, Decimal)):
+        # Decimal como texto para não perder precisão, igual às respostas da API
+        return str(value)
+    return value
+
+
+def stream_batches(db: Session, dataset: str, batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[List[tuple]]:
+    """
+    Comentário em pt-BR: percorre o conjunto com yield_per, que no Postgres abre um cursor
+    no servidor (stream_results) em vez de carregar todas as linhas no cliente
+    """
+    statement = DATASETS[dataset]().execution_options(yield_per=batch_size)
+    result = db.execute(statement)
+    try:
+        yield list(result.keys())
+        for partition in result.partitions():
+            yield partition
+    finally:
+        result.close()
+
+
+def ndjson_chunks(db: Session, dataset: str, batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[str]:
+    batches = stream_batches(db, dataset, batch_size)
+    columns = next(batches)
+    for rows in batches:
+        yield "".join(
+            json.dumps(dict(zip(columns, map(_plain, row))), ensure_ascii=False) + "\n"
+            for row in rows
+        )
+
+
+def csv_chunks(db: Session, dataset: str, batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[str]:
+    batches = stream_batches(db, dataset, batch_size)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(next(batches))
+    for rows in batches:
+        writer.writerows([_plain(value) for value in row] for row in rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    # Cabeçalho sozinho quando o conjunto está vazio
+    if buffer.tell():
+        yield buffer.getvalue()
@@ -0,0 +1,200 @@
+import csv
+from datetime import date, datetime
+from typing import Optional
+
+import typer
+
+from app import scale_import, session_rollups
+from app.dashboard_counters import reconcile_counters
+from app.database import SessionLocal
+from app.jobs.cohort_percentiles import refresh_cohort_percentiles
+from app.jobs.dashboard_snapshot import refresh_dashboard_snapshot
+from app.jobs.parquet_snapshot import write_parquet_snapshot
+from app.jobs.patient_status import PatientStatusJobError, update_patient_statuses
+from app.jobs.weight_trends import refresh_weight_trends
+
+app = typer.Typer(help="Rotinas administrativas executadas fora da API")
+
+
+@app.command("update-patient-status")
+def update_patient_status(
+    inactive_after_days: int = typer.Option(90, min=1, help="Dias sem sessão até inativar"),
+    batch_size: int = typer.Option(500, min=1, help="Pacientes atualizados por transação"),
+    pause_seconds: float = typer.Option(0.0, min=0.0, help="Pausa entre lotes"),
+    dry_run: bool = typer.Option(False, help="Apenas conta os pacientes afetados"),
+) -> None:
+    """Marca pacientes como concluídos ou inativos conforme suas sessões."""
+
+    def report(target_status: str, updated: int, total: int) -> None:
+        typer.echo(f"[{target_status}] lote com {updated} pacientes (total: {total})")
+
+    db = SessionLocal()
+    try:
+        results = update_patient_statuses(
+            db,
+            inactive_after_days=inactive_after_days,
+            batch_size=batch_size,
+            pause_seconds=pause_seconds,
+            dry_run=dry_run,
+            on_progress=report,
+        )
+    except PatientStatusJobError as exc:
+        typer.echo(f"Erro: {exc}", err=True)
+        raise typer.Exit(code=1)
+    finally:
+        db.close()
+
+    prefix = "Pacientes elegíveis" if dry_run else "Pacientes atualizados"
+    for target_status, total in results.items():
+        typer.echo(f"{prefix} para '{target_status}': {total}")
+
+
+@app.command("refresh-dashboard-snapshot")
+def refresh_dashboard() -> None:
+    """Recalcula o snapshot das estatísticas do dashboard."""
+    db = SessionLocal()
+    try:
+        snapshot = refresh_dashboard_snapshot(db)
+    finally:
+        db.close()
+
+    if snapshot is None:
+        typer.echo("Outro processo já está atualizando o snapshot.")
+    else:
+        typer.echo(f"Snapshot atualizado em {snapshot.computed_at.isoformat()}")
+
+
+@app.command("reconcile-dashboard-counters")
+def reconcile_dashboard_counters(
+    fix: bool = typer.Option(False, help="Regrava os contadores com os valores recalculados"),
+) -> None:
+    """Recalcula os contadores do dashboard do zero e reporta divergências."""
+    db = SessionLocal()
+    try:
+        drift = reconcile_counters(db, fix=fix)
+    finally:
+        db.close()
+
+    if not drift:
+        typer.echo("Contadores consistentes.")
+        return
+
+    for metric, key, stored, expected in drift:
+        typer.echo(f"{metric}[{key}]: gravado={stored} esperado={expected} (diferença {stored - expected:+d})")
+    typer.echo(f"Divergências: {len(drift)}" + (" (corrigidas)" if fix else ""))
+
+
+@app.command("backfill-session-rollups")
+def backfill_session_rollups(
+    start_date: Optional[datetime] = typer.Option(None, formats=["%Y-%m-%d"], help="Primeiro dia (padrão: sessão mais antiga)"),
+    end_date: Optional[datetime] = typer.Option(None, formats=["%Y-%m-%d"], help="Último dia (padrão: sessão mais recente)"),
+    days_per_batch: int = typer.Option(30, min=1, help="Dias recalculados por transação"),
+) -> None:
+    """Reconstrói o agregado diário de sessões (idempotente)."""
+
+    def report(last_day: date, processed: int) -> None:
+        typer.echo(f"Agregado atualizado até {last_day.isoformat()} ({processed} dias)")
+
+    db = SessionLocal()
+    try:
+        processed = session_rollups.backfill(
+            db,
+            start_date=start_date.date() if start_date else None,
+            end_date=end_date.date() if end_date else None,
+            days_per_batch=days_per_batch,
+            on_progress=report,
+        )
+    finally:
+        db.close()
+
+    typer.echo(f"Dias recalculados: {processed}")
+
+
+@app.command("refresh-weight-trends")
+def refresh_weight_trends_command() -> None:
+    """Ajusta a tendência de peso (kg/semana) de todos os pacientes."""
+    db = SessionLocal()
+    try:
+        result = refresh_weight_trends(db)
+    finally:
+        db.close()
+
+    if result is None:
+        typer.echo("Outro processo já está recalculando as tendências.")
+    else:
+        fitted, computed_at = result
+        typer.echo(f"Tendências ajustadas para {fitted} pacientes em {computed_at.isoformat()}")
+
+
+@app.command("refresh-cohort-percentiles")
+def refresh_cohort_percentiles_command(
+    min_sample_size: int = typer.Option(20, min=1, help="Pacientes mínimos por gênero e faixa etária"),
+) -> None:
+    """Recalcula as tabelas de percentis por gênero, faixa etária e métrica."""
+    db = SessionLocal()
+    try:
+        tables = refresh_cohort_percentiles(db, min_sample_size=min_sample_size)
+    finally:
+        db.close()
+
+    if tables is None:
+        typer.echo("Outro processo já está recalculando os percentis.")
+    else:
+        typer.echo(f"Tabelas de percentis gravadas: {tables}")
+
+
+@app.command("export-parquet-snapshot")
+def export_parquet_snapshot(
+    output_dir: Optional[str] = typer.Option(None, help="Diretório base (padrão: PARQUET_SNAPSHOT_DIR)"),
+    batch_size: int = typer.Option(10_000, min=1, help="Linhas lidas do banco por vez"),
+    row_group_size: int = typer.Option(128_000, min=1, help="Linhas por row group nos arquivos"),
+) -> None:
+    """Grava um snapshot consistente das tabelas clínicas em arquivos Parquet."""
+    db = SessionLocal()
+    try:
+        snapshot = write_parquet_snapshot(
+            db, output_dir=output_dir, batch_size=batch_size, row_group_size=row_group_size
+        )
+    finally:
+        db.close()
+
+    typer.echo(f"Snapshot gravado em {snapshot['directory']} ({snapshot['taken_at'].isoformat()})")
+    for table, rows in snapshot["rows"].items():
+        typer.echo(f"{table}: {rows} linhas")
+
+
+@app.command("import-scale-readings")
+def import_scale_readings_command(
+    path: str = typer.Argument(..., help="CSV exportado pela balança de bioimpedância"),
+    dry_run: bool = typer.Option(False, help="Apenas valida e gera o relatório, sem gravar"),
+    batch_size: int = typer.Option(5000, min=1, help="Linhas validadas e carregadas por lote"),
+    errors_out: Optional[str] = typer.Option(None, help="Grava o relatório de erros neste CSV"),
+) -> None:
+    """Importa leituras da balança em lote (COPY no Postgres)."""
+    db = SessionLocal()
+    try:
+        with open(path, encoding="utf-8-sig", newline="") as stream:
+            result = scale_import.import_scale_readings(db, stream, dry_run=dry_run, batch_size=batch_size)
+    except scale_import.ScaleImportError as exc:
+        typer.echo(str(exc), err=True)
+        raise typer.Exit(code=1)
+    finally:
+        db.close()
+
+    action = "válidas" if dry_run else "importadas"
+    typer.echo(f"{result.total_rows} linhas lidas, {result.imported} {action}, {result.rejected} rejeitadas")
+    if errors_out:
+        with open(errors_out, "w", encoding="utf-8", newline="") as report:
+            writer = csv.writer(report)
+            writer.writerow(["line", "field", "message"])
+            writer.writerows([error.line, error.field or "", error.message] for error in result.errors)
+        typer.echo(f"Relatório de erros gravado em {errors_out}")
+    else:
+        for error in result.errors[:20]:
+            typer.echo(f"linha {error.line}: {error.field or '-'}: {error.message}")
+    if result.errors_truncated:
+        typer.echo(f"Relatório limitado aos primeiros {len(result.errors)} erros")
+
+
+if __name__ == "__main__":
+    app()
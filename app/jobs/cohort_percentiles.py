@@ -0,0 +1,176 @@
+import os
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.jobs.locks import try_refresh_lock
+from app.models.body_composition import BodyComposition
+from app.models.cohort_percentile import CohortPercentile
+from app.models.cycle import Cycle
+from app.models.patient import GenderEnum, Patient, age_in_years
+from app.models.session import Session as SessionModel
+
+# Comentário em pt-BR: intervalo de recálculo das tabelas (0 desativa o agendador)
+REFRESH_INTERVAL_MINUTES = int(os.getenv("COHORT_PERCENTILES_REFRESH_MINUTES", "360"))
+
+# Tempo máximo que cada worker mantém as tabelas em memória antes de recarregar
+CACHE_TTL_SECONDS = 300
+
+# Chave do advisory lock que garante um único recálculo simultâneo entre os workers
+_REFRESH_LOCK_KEY = 728_039
+
+AGE_BAND_YEARS = 10
+MIN_SAMPLE_SIZE = 20
+METRICS = ("fat_percentage", "muscle_mass_percentage", "visceral_fat", "metabolic_age")
+
+_PERCENTILE_POINTS = np.linspace(0, 1, 101)
+
+CutpointTable = Dict[Tuple[GenderEnum, int, str], Tuple[List[float], int]]
+
+_cache_lock = threading.Lock()
+_cache: Dict[str, object] = {"expires_at": 0.0, "tables": {}}
+
+
+def age_band_start(age: int) -> int:
+    return (age // AGE_BAND_YEARS) * AGE_BAND_YEARS
+
+
+def _latest_compositions(db: Session):
+    """
+    Comentário em pt-BR: a composição mais recente de cada paciente (cada paciente conta
+    uma vez na coorte), com gênero e idade calculados no banco
+    """
+    ranked = (
+        db.query(
+            Cycle.patient_id.label("patient_id"),
+            *(getattr(BodyComposition, metric).label(metric) for metric in METRICS),
+            func.row_number()
+            .over(partition_by=Cycle.patient_id, order_by=SessionModel.session_date.desc())
+            .label("recency"),
+        )
+        .select_from(BodyComposition)
+        .join(SessionModel, SessionModel.id == BodyComposition.session_id)
+        .join(Cycle, Cycle.id == SessionModel.cycle_id)
+        .subquery()
+    )
+    return (
+        db.query(
+            Patient.gender,
+            age_in_years(Patient.birth_date, date.today()),
+            *(getattr(ranked.c, metric) for metric in METRICS),
+        )
+        .join(ranked, ranked.c.patient_id == Patient.id)
+        .filter(ranked.c.recency == 1)
+        .all()
+    )
+
+
+def refresh_cohort_percentiles(db: Session, min_sample_size: int = MIN_SAMPLE_SIZE) -> Optional[int]:
+    """
+    Comentário em pt-BR: recalcula as tabelas de percentis e regrava a tabela numa única
+    transação. Grupos com menos de ``min_sample_size`` pacientes ficam de fora.
+    Retorna quantas tabelas (gênero, faixa, métrica) foram gravadas ou None quando outro
+    processo já está recalculando.
+    """
+    if not try_refresh_lock(db, _REFRESH_LOCK_KEY):
+        db.rollback()
+        return None
+
+    rows = _latest_compositions(db)
+    computed_at = datetime.now(timezone.utc)
+
+    tables = []
+    if rows:
+        genders = np.asarray([row[0].value for row in rows])
+        bands = (np.asarray([row[1] for row in rows], dtype=int) // AGE_BAND_YEARS) * AGE_BAND_YEARS
+        values = np.asarray([row[2:] for row in rows], dtype=float)
+
+        for gender in GenderEnum:
+            for band in np.unique(bands):
+                members = (genders == gender.value) & (bands == band)
+                sample_size = int(members.sum())
+                if sample_size < min_sample_size:
+                    continue
+                # Todos os percentis de todas as métricas do grupo de uma vez
+                cutpoints = np.quantile(values[members], _PERCENTILE_POINTS, axis=0)
+                for index, metric in enumerate(METRICS):
+                    tables.append(
+                        {
+                            "gender": gender,
+                            "age_band_start": int(band),
+                            "metric": metric,
+                            "cutpoints": [round(float(value), 2) for value in cutpoints[:, index]],
+                            "sample_size": sample_size,
+                            "computed_at": computed_at,
+                        }
+                    )
+
+    db.query(CohortPercentile).delete(synchronize_session=False)
+    db.bulk_insert_mappings(CohortPercentile, tables)
+    db.commit()
+    invalidate_cache()
+    return len(tables)
+
+
+def invalidate_cache() -> None:
+    with _cache_lock:
+        _cache["expires_at"] = 0.0
+
+
+def _load_tables(db: Session) -> CutpointTable:
+    with _cache_lock:
+        if _cache["expires_at"] > time.monotonic():
+            return _cache["tables"]
+
+    tables: CutpointTable = {
+        (row.gender, row.age_band_start, row.metric): (row.cutpoints, row.sample_size)
+        for row in db.query(CohortPercentile).all()
+    }
+    with _cache_lock:
+        _cache["tables"] = tables
+        _cache["expires_at"] = time.monotonic() + CACHE_TTL_SECONDS
+    return tables
+
+
+def percentile_of(cutpoints: List[float], value: float) -> float:
+    """
+    Comentário em pt-BR: posição do valor na tabela por busca binária. Entre dois pontos de
+    corte o percentil é interpolado; empates recebem o percentil médio dos pontos iguais.
+    """
+    lower = bisect_left(cutpoints, value)
+    upper = bisect_right(cutpoints, value)
+    if lower < upper:
+        return (lower + upper - 1) / 2
+    if lower == 0:
+        return 0.0
+    if lower == len(cutpoints):
+        return 100.0
+    below, above = cutpoints[lower - 1], cutpoints[lower]
+    return round(lower - 1 + (value - below) / (above - below), 1)
+
+
+def lookup_percentiles(
+    db: Session, gender: GenderEnum, age: int, measurements: Dict[str, float]
+) -> Optional[Tuple[int, List[Tuple[str, float, float, int]]]]:
+    """
+    Comentário em pt-BR: percentis das medidas do paciente na coorte de mesmo gênero e faixa
+    etária, sem consultar body_compositions. Retorna (início da faixa, [(métrica, valor,
+    percentil, tamanho da amostra)]) ou None se a coorte não tiver tabela.
+    """
+    tables = _load_tables(db)
+    band = age_band_start(age)
+    items = []
+    for metric in METRICS:
+        table = tables.get((gender, band, metric))
+        value = measurements.get(metric)
+        if table is None or value is None:
+            continue
+        cutpoints, sample_size = table
+        items.append((metric, float(value), percentile_of(cutpoints, float(value)), sample_size))
+    return (band, items) if items else None
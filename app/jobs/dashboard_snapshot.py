@@ -0,0 +1,195 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, date, timezone
+from typing import Callable, Dict, Tuple, Optional
+
+from sqlalchemy import case, func
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app import session_rollups
+from app.jobs.locks import try_refresh_lock
+from app.models.session import Session as SessionModel
+from app.models.body_composition import BodyComposition
+from app.models.cycle import Cycle
+from app.models.dashboard_snapshot import DashboardSnapshot
+from app.schemas.dashboard import DashboardStatsResponse
+
+# Comentário em pt-BR: intervalo de atualização do snapshot (0 desativa o agendador)
+REFRESH_INTERVAL_MINUTES = int(os.getenv("DASHBOARD_SNAPSHOT_REFRESH_MINUTES", "5"))
+
+# Unidades do cálculo executadas em paralelo (cada uma usa uma conexão do pool)
+STATS_CONCURRENCY = int(os.getenv("DASHBOARD_STATS_CONCURRENCY", "3"))
+
+# Limite do processo, compartilhado entre requisições: no máximo STATS_CONCURRENCY conexões
+# extras do pool ficam com as unidades, mesmo com vários recálculos simultâneos
+_UNIT_CONNECTIONS = threading.BoundedSemaphore(max(STATS_CONCURRENCY, 1))
+
+# Chave do advisory lock que garante um único refresh simultâneo entre os workers
+_REFRESH_LOCK_KEY = 728_028
+
+
+def _sessions_last_30_days_unit(db: Session) -> dict:
+    # Sessões nos últimos 30 dias, somadas a partir do agregado diário
+    thirty_days_ago = date.today() - timedelta(days=30)
+    sessions_last_30_days = session_rollups.sessions_since(db, thirty_days_ago)
+    return {"sessions_last_30_days": sessions_last_30_days}
+
+
+def _total_weight_lost_unit(db: Session) -> dict:
+    # Total de kilos perdidos: soma, entre pacientes com ao menos duas pesagens, da diferença
+    # entre a última e a primeira pesagem, numa única consulta agrupada
+    ranked = (
+        db.query(
+            Cycle.patient_id.label("patient_id"),
+            BodyComposition.weight_kg.label("weight_kg"),
+            func.row_number()
+            .over(partition_by=Cycle.patient_id, order_by=SessionModel.session_date)
+            .label("first_rank"),
+            func.row_number()
+            .over(partition_by=Cycle.patient_id, order_by=SessionModel.session_date.desc())
+            .label("last_rank"),
+        )
+        .select_from(SessionModel)
+        .join(Cycle, Cycle.id == SessionModel.cycle_id)
+        .join(BodyComposition, BodyComposition.session_id == SessionModel.id)
+        .subquery()
+    )
+    per_patient = (
+        db.query(
+            (
+                func.sum(case((ranked.c.last_rank == 1, ranked.c.weight_kg), else_=0))
+                - func.sum(case((ranked.c.first_rank == 1, ranked.c.weight_kg), else_=0))
+            ).label("weight_diff")
+        )
+        .group_by(ranked.c.patient_id)
+        .having(func.count() > 1)
+        .subquery()
+    )
+    total_weight_lost = db.query(func.sum(per_patient.c.weight_diff)).scalar()
+    return {"total_weight_lost_kg": float(total_weight_lost or 0)}
+
+
+# Comentário em pt-BR: unidades independentes que compõem as estatísticas do snapshot; os
+# totais e distribuições por paciente vêm dos contadores incrementais (dashboard_counters)
+STATS_UNITS: Dict[str, Callable[[Session], dict]] = {
+    "sessions_30d": _sessions_last_30_days_unit,
+    "weight_lost": _total_weight_lost_unit,
+}
+
+
+def _fan_out_width(engine: Engine) -> int:
+    """
+    Comentário em pt-BR: quantas unidades rodam em paralelo sem esgotar o pool.
+    Reserva uma conexão para a própria requisição; pools sem tamanho (ex.: StaticPool)
+    rodam tudo em sequência na sessão atual.
+    """
+    pool_size = getattr(engine.pool, "size", None)
+    if STATS_CONCURRENCY <= 1 or not callable(pool_size):
+        return 1
+    return max(1, min(STATS_CONCURRENCY, pool_size() - 1, len(STATS_UNITS)))
+
+
+def _timed_unit(name: str, unit: Callable[[Session], dict], db: Session) -> Tuple[str, dict, float]:
+    started_at = time.perf_counter()
+    result = unit(db)
+    return name, result, (time.perf_counter() - started_at) * 1000
+
+
+def _run_unit_on_own_connection(engine: Engine, name: str, unit: Callable[[Session], dict]):
+    with _UNIT_CONNECTIONS, Session(bind=engine) as unit_db:
+        return _timed_unit(name, unit, unit_db)
+
+
+def compute_dashboard_stats(db: Session, timings: Optional[Dict[str, float]] = None) -> dict:
+    """
+    Comentário em pt-BR: recalcula as estatísticas do snapshot a partir das tabelas; os
+    campos mantidos pelos contadores incrementais são lidos na hora de montar a resposta.
+
+    As unidades independentes rodam em paralelo, cada uma em sua própria conexão do pool;
+    DASHBOARD_STATS_CONCURRENCY limita as conexões extras no processo inteiro, não por
+    requisição. Se ``timings`` for informado, recebe a duração (ms) de cada unidade.
+
+    Cada unidade lê o seu próprio snapshot do banco, então o payload pode misturar estados
+    separados por alguns milissegundos (ex.: uma sessão criada no meio do cálculo conta nas
+    sessões dos últimos 30 dias mas ainda não no peso perdido). Isso é aceito para o dashboard, que já é
+    servido de um snapshot com alguns minutos de atraso; cada número, isoladamente, é exato.
+    """
+    engine = db.get_bind()
+    width = _fan_out_width(engine)
+
+    if width <= 1:
+        results = [_timed_unit(name, unit, db) for name, unit in STATS_UNITS.items()]
+    else:
+        with ThreadPoolExecutor(max_workers=width) as executor:
+            futures = [
+                executor.submit(_run_unit_on_own_connection, engine, name, unit)
+                for name, unit in STATS_UNITS.items()
+            ]
+            results = [future.result() for future in futures]
+
+    fields: dict = {}
+    for name, result, elapsed_ms in results:
+        fields.update(result)
+        if timings is not None:
+            timings[name] = elapsed_ms
+
+    return fields
+
+
+def format_server_timing(timings: Dict[str, float]) -> str:
+    """
+    Comentário em pt-BR: formata as durações por unidade no padrão do header Server-Timing
+    """
+    return ", ".join(f"{name};dur={elapsed_ms:.1f}" for name, elapsed_ms in timings.items())
+
+
+def refresh_dashboard_snapshot(
+    db: Session, timings: Optional[Dict[str, float]] = None
+) -> Optional[DashboardSnapshot]:
+    """
+    Comentário em pt-BR: recalcula e grava um novo snapshot, removendo os anteriores.
+    Retorna None quando outro processo já está atualizando o snapshot.
+    """
+    if not try_refresh_lock(db, _REFRESH_LOCK_KEY):
+        db.rollback()
+        return None
+
+    snapshot = DashboardSnapshot(
+        payload=compute_dashboard_stats(db, timings),
+        computed_at=datetime.now(timezone.utc),
+    )
+    db.add(snapshot)
+    db.flush()
+    db.query(DashboardSnapshot).filter(DashboardSnapshot.id != snapshot.id).delete(
+        synchronize_session=False
+    )
+    db.commit()
+    db.refresh(snapshot)
+    return snapshot
+
+
+def get_latest_snapshot(db: Session) -> Optional[DashboardSnapshot]:
+    """
+    Comentário em pt-BR: busca o snapshot mais recente pelo índice de computed_at
+    """
+    return (
+        db.query(DashboardSnapshot)
+        .order_by(DashboardSnapshot.computed_at.desc())
+        .first()
+    )
+
+
+def build_stats_response(snapshot: DashboardSnapshot, counter_stats: dict) -> DashboardStatsResponse:
+    """
+    Comentário em pt-BR: monta a resposta do dashboard a partir do snapshot gravado e dos
+    campos dos contadores incrementais (que prevalecem sobre snapshots antigos completos)
+    """
+    interval = timedelta(minutes=REFRESH_INTERVAL_MINUTES or 5)
+    return DashboardStatsResponse(
+        **{**snapshot.payload, **counter_stats},
+        snapshot_at=snapshot.computed_at,
+        stale_after=snapshot.computed_at + interval,
+    )
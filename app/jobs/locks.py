@@ -0,0 +1,12 @@
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+
+def try_refresh_lock(db: Session, key: int) -> bool:
+    """
+    Comentário em pt-BR: advisory lock da transação atual que garante um único recálculo
+    simultâneo entre os workers; fora do Postgres não há concorrência entre processos
+    """
+    if db.get_bind().dialect.name != "postgresql":
+        return True
+    return bool(db.execute(text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": key}).scalar())
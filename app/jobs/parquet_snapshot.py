@@ -0,0 +1,134 @@
+import enum
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+from uuid import UUID, uuid4
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlalchemy import Date, DateTime, Enum, Float, Integer, Numeric, String, Table, select
+from sqlalchemy.orm import Session
+
+from app.models.activator_composition import ActivatorComposition
+from app.models.body_composition import BodyComposition
+from app.models.cycle import Cycle
+from app.models.patient import Patient
+from app.models.session import Session as SessionModel
+
+# Comentário em pt-BR: diretório padrão dos snapshots (um subdiretório por execução)
+SNAPSHOT_DIR = os.getenv("PARQUET_SNAPSHOT_DIR", "snapshots")
+
+# Linhas lidas do cursor do servidor por vez e linhas por row group nos arquivos.
+# Row groups grandes favorecem a leitura colunar no pandas; a memória fica limitada a um row group.
+BATCH_SIZE = 10_000
+ROW_GROUP_SIZE = 128_000
+
+SNAPSHOT_TABLES: List[Table] = [
+    Patient.__table__,
+    Cycle.__table__,
+    SessionModel.__table__,
+    BodyComposition.__table__,
+    ActivatorComposition.__table__,
+]
+
+
+def _arrow_type(column_type):
+    if isinstance(column_type, Enum):
+        # Enums viram colunas dicionário: poucos valores distintos, índices de 1 byte
+        return pa.dictionary(pa.int8(), pa.string())
+    if isinstance(column_type, DateTime):
+        return pa.timestamp("us", tz="UTC")
+    if isinstance(column_type, Date):
+        return pa.date32()
+    if isinstance(column_type, Numeric) and not isinstance(column_type, Float):
+        return pa.decimal128(column_type.precision or 18, column_type.scale or 0)
+    if isinstance(column_type, Float):
+        return pa.float64()
+    if isinstance(column_type, Integer):
+        return pa.int32()
+    if isinstance(column_type, String):
+        return pa.string()
+    # UUIDs e demais tipos seguem como texto
+    return pa.string()
+
+
+def _plain(value):
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, UUID):
+        return str(value)
+    return value
+
+
+def _begin_snapshot(db: Session) -> None:
+    """
+    Comentário em pt-BR: no Postgres todas as tabelas são lidas na mesma transação
+    REPEATABLE READ somente leitura, então o snapshot é consistente entre arquivos
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        # O nível de isolamento só pode ser escolhido antes da transação começar
+        db.rollback()
+        db.connection(
+            execution_options={"isolation_level": "REPEATABLE READ", "postgresql_readonly": True}
+        )
+
+
+def _write_table(db: Session, table: Table, path: Path, batch_size: int, row_group_size: int) -> int:
+    schema = pa.schema(
+        [pa.field(column.name, _arrow_type(column.type), nullable=column.nullable) for column in table.columns]
+    )
+    dictionary_columns = [column.name for column in table.columns if isinstance(column.type, Enum)]
+
+    result = db.execute(
+        select(table).order_by(*table.primary_key.columns).execution_options(yield_per=batch_size)
+    )
+    written = 0
+    pending: List = []
+    pending_rows = 0
+    with pq.ParquetWriter(
+        path, schema, compression="zstd", use_dictionary=dictionary_columns or False
+    ) as writer:
+        for rows in result.partitions():
+            columns = list(zip(*rows))
+            pending.append(
+                pa.record_batch(
+                    [pa.array([_plain(value) for value in values], type=field.type) for values, field in zip(columns, schema)],
+                    schema=schema,
+                )
+            )
+            pending_rows += len(rows)
+            if pending_rows >= row_group_size:
+                writer.write_table(pa.Table.from_batches(pending, schema=schema), row_group_size=row_group_size)
+                written += pending_rows
+                pending, pending_rows = [], 0
+        if pending_rows:
+            writer.write_table(pa.Table.from_batches(pending, schema=schema), row_group_size=row_group_size)
+            written += pending_rows
+    return written
+
+
+def write_parquet_snapshot(
+    db: Session,
+    output_dir: Optional[str] = None,
+    batch_size: int = BATCH_SIZE,
+    row_group_size: int = ROW_GROUP_SIZE,
+) -> Dict[str, object]:
+    """
+    Comentário em pt-BR: grava um arquivo Parquet por tabela num diretório novo
+    (``snapshot-AAAAMMDDTHHMMSSZ-<sufixo>``); o sufixo aleatório evita colisão entre
+    execuções no mesmo segundo. Retorna o diretório, o instante e as linhas por tabela.
+    """
+    taken_at = datetime.now(timezone.utc)
+    directory = Path(output_dir or SNAPSHOT_DIR) / f"snapshot-{taken_at:%Y%m%dT%H%M%SZ}-{uuid4().hex[:8]}"
+    directory.mkdir(parents=True, exist_ok=False)
+
+    _begin_snapshot(db)
+    try:
+        rows = {
+            table.name: _write_table(db, table, directory / f"{table.name}.parquet", batch_size, row_group_size)
+            for table in SNAPSHOT_TABLES
+        }
+    finally:
+        db.rollback()
+    return {"directory": str(directory), "taken_at": taken_at, "rows": rows}
@@ -0,0 +1,168 @@
+import time
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import String, bindparam, text
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import Session
+
+from app.models.cycle import CycleTypeEnum
+from app.models.patient import PatientStatusEnum
+
+ProgressCallback = Callable[[str, int, int], None]
+
+
+class PatientStatusJobError(RuntimeError):
+    """
+    Comentário em pt-BR: o banco configurado não suporta a rotina (SQL específico do Postgres)
+    """
+
+
+# Comentário em pt-BR: filtro aplicado nos lotes para reavaliar só os pacientes do lote
+_BATCH_FILTER = "AND {column} = ANY(CAST(:patient_ids AS uuid[]))"
+
+# Comentário em pt-BR: pacientes ativos cujo último ciclo normal atingiu max_sessions
+_COMPLETED_CANDIDATES = """
+    WITH last_normal_cycle AS (
+        SELECT DISTINCT ON (cycles.patient_id)
+            cycles.patient_id, cycles.id, cycles.max_sessions
+        FROM cycles
+        WHERE cycles.type = :normal_type {cycles_filter}
+        ORDER BY cycles.patient_id, cycles.cycle_date DESC, cycles.created_at DESC
+    )
+    SELECT patients.id
+    FROM patients
+    JOIN last_normal_cycle ON last_normal_cycle.patient_id = patients.id
+    WHERE patients.status = :source_status {patients_filter}
+      AND (
+          SELECT count(*) FROM sessions WHERE sessions.cycle_id = last_normal_cycle.id
+      ) >= last_normal_cycle.max_sessions
+"""
+
+# Comentário em pt-BR: pacientes ativos sem sessões (ou sem cadastro recente) há N dias
+_DORMANT_CANDIDATES = """
+    SELECT patients.id
+    FROM patients
+    WHERE patients.status = :source_status {patients_filter}
+      AND COALESCE(
+          (
+              SELECT max(sessions.session_date)
+              FROM sessions
+              JOIN cycles ON cycles.id = sessions.cycle_id
+              WHERE cycles.patient_id = patients.id
+          ),
+          patients.created_at
+      ) < now() - make_interval(days => :inactive_after_days)
+"""
+
+# Os candidatos do lote são reavaliados (só para os ids do lote) no momento da atualização,
+# então um paciente que recebeu sessão depois da listagem não é inativado
+_BATCH_UPDATE = """
+    WITH batch AS (
+        SELECT patients.id
+        FROM ({candidates}) AS candidates
+        JOIN patients ON patients.id = candidates.id
+        ORDER BY patients.id
+        FOR UPDATE OF patients SKIP LOCKED
+    )
+    UPDATE patients
+    SET status = :target_status
+    FROM batch
+    WHERE patients.id = batch.id
+"""
+
+TRANSITIONS = {
+    PatientStatusEnum.completed: _COMPLETED_CANDIDATES,
+    PatientStatusEnum.inactive: _DORMANT_CANDIDATES,
+}
+
+
+def _candidates_sql(candidates: str, batch: bool) -> str:
+    return candidates.format(
+        cycles_filter=_BATCH_FILTER.format(column="cycles.patient_id") if batch else "",
+        patients_filter=_BATCH_FILTER.format(column="patients.id") if batch else "",
+    )
+
+
+def list_candidates_statement(candidates: str):
+    """
+    Comentário em pt-BR: consulta completa dos candidatos, avaliada uma única vez por transição
+    """
+    return text(f"SELECT candidates.id FROM ({_candidates_sql(candidates, batch=False)}) AS candidates ORDER BY 1")
+
+
+def batch_update_statement(candidates: str):
+    """
+    Comentário em pt-BR: UPDATE de um lote de ids já listados; valores só via parâmetros
+    """
+    statement = text(_BATCH_UPDATE.format(candidates=_candidates_sql(candidates, batch=True)))
+    return statement.bindparams(bindparam("patient_ids", type_=ARRAY(String)))
+
+
+def _params(inactive_after_days: int) -> Dict:
+    return {
+        "inactive_after_days": inactive_after_days,
+        "normal_type": CycleTypeEnum.normal.value,
+        "source_status": PatientStatusEnum.active.value,
+    }
+
+
+def update_patient_statuses(
+    db: Session,
+    inactive_after_days: int,
+    batch_size: int = 500,
+    pause_seconds: float = 0.0,
+    lock_timeout_ms: int = 2000,
+    dry_run: bool = False,
+    on_progress: Optional[ProgressCallback] = None,
+) -> Dict[str, int]:
+    """
+    Comentário em pt-BR: aplica as transições automáticas de status em lotes set-based.
+
+    Primeiro marca como ``completed`` quem concluiu o último ciclo normal e depois como
+    ``inactive`` quem está sem sessões há ``inactive_after_days`` dias. Os candidatos de cada
+    transição são listados uma única vez (ordenados por id) e atualizados em lotes de
+    ``batch_size`` ids, cada um em uma transação curta com ``FOR UPDATE SKIP LOCKED`` e
+    ``lock_timeout``, para não disputar linhas com edições manuais feitas pela API; linhas
+    bloqueadas no momento ficam para a próxima execução.
+    """
+    if db.get_bind().dialect.name != "postgresql":
+        raise PatientStatusJobError("update_patient_statuses requires PostgreSQL")
+
+    params = _params(inactive_after_days)
+    results: Dict[str, int] = {}
+
+    for target_status, candidates in TRANSITIONS.items():
+        patient_ids: List[str] = [
+            str(patient_id) for (patient_id,) in db.execute(list_candidates_statement(candidates), params)
+        ]
+        db.rollback()
+        if dry_run:
+            results[target_status.value] = len(patient_ids)
+            continue
+
+        statement = batch_update_statement(candidates)
+        updated_total = 0
+        for start in range(0, len(patient_ids), batch_size):
+            db.execute(
+                text("SELECT set_config('lock_timeout', :lock_timeout, true)"),
+                {"lock_timeout": f"{int(lock_timeout_ms)}ms"},
+            )
+            updated = db.execute(
+                statement,
+                {
+                    **params,
+                    "patient_ids": patient_ids[start:start + batch_size],
+                    "target_status": target_status.value,
+                },
+            ).rowcount
+            db.commit()
+
+            updated_total += updated
+            if on_progress is not None:
+                on_progress(target_status.value, updated, updated_total)
+            if pause_seconds:
+                time.sleep(pause_seconds)
+
+        results[target_status.value] = updated_total
+
+    return results
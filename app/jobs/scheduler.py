@@ -0,0 +1,67 @@
+import asyncio
+import logging
+from typing import Any, Callable
+
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.jobs import cohort_percentiles, dashboard_snapshot, weight_trends
+
+logger = logging.getLogger(__name__)
+
+RefreshJob = Callable[[Session], Any]
+
+
+def _run_with_session(fn: RefreshJob) -> None:
+    db = SessionLocal()
+    try:
+        fn(db)
+    finally:
+        db.close()
+
+
+async def run_periodic(fn: RefreshJob, interval_minutes: int, label: str) -> None:
+    """
+    Comentário em pt-BR: executa a rotina em background a cada N minutos, cada execução com
+    uma sessão própria; falhas são registradas e a rotina segue no próximo intervalo
+    """
+    while True:
+        try:
+            await asyncio.to_thread(_run_with_session, fn)
+        except Exception:
+            logger.exception("Falha ao %s", label)
+        await asyncio.sleep(interval_minutes * 60)
+
+
+def start_scheduler() -> list[asyncio.Task]:
+    """
+    Comentário em pt-BR: inicia as rotinas periódicas habilitadas na configuração
+    """
+    jobs = [
+        (
+            dashboard_snapshot.refresh_dashboard_snapshot,
+            dashboard_snapshot.REFRESH_INTERVAL_MINUTES,
+            "atualizar o snapshot do dashboard",
+        ),
+        (
+            weight_trends.refresh_weight_trends,
+            weight_trends.REFRESH_INTERVAL_MINUTES,
+            "recalcular as tendências de peso",
+        ),
+        (
+            cohort_percentiles.refresh_cohort_percentiles,
+            cohort_percentiles.REFRESH_INTERVAL_MINUTES,
+            "recalcular os percentis da coorte",
+        ),
+    ]
+    return [
+        asyncio.create_task(run_periodic(fn, interval_minutes, label))
+        for fn, interval_minutes, label in jobs
+        if interval_minutes > 0
+    ]
+
+
+async def stop_scheduler(tasks: list[asyncio.Task]) -> None:
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
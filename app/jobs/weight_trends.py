@@ -0,0 +1,187 @@
+import calendar
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import extract, func
+from sqlalchemy.orm import Session
+
+from app.jobs.locks import try_refresh_lock
+from app.models.body_composition import BodyComposition
+from app.models.cycle import Cycle, PeriodicityEnum
+from app.models.patient_weight_trend import PatientWeightTrend
+from app.models.session import Session as SessionModel
+
+# Comentário em pt-BR: intervalo de recálculo das tendências (0 desativa o agendador)
+REFRESH_INTERVAL_MINUTES = int(os.getenv("WEIGHT_TRENDS_REFRESH_MINUTES", "60"))
+
+# Chave do advisory lock que garante um único recálculo simultâneo entre os workers
+_REFRESH_LOCK_KEY = 728_037
+
+SECONDS_PER_WEEK = 7 * 24 * 3600
+
+
+def load_weighings(db: Session) -> Dict[str, np.ndarray]:
+    """
+    Comentário em pt-BR: todas as pesagens em colunas (paciente, instante em segundos, peso),
+    ordenadas por paciente e data para que cada paciente ocupe um bloco contíguo
+    """
+    rows = (
+        db.query(
+            Cycle.patient_id,
+            extract("epoch", SessionModel.session_date),
+            BodyComposition.weight_kg,
+        )
+        .select_from(SessionModel)
+        .join(Cycle, Cycle.id == SessionModel.cycle_id)
+        .join(BodyComposition, BodyComposition.session_id == SessionModel.id)
+        .order_by(Cycle.patient_id, SessionModel.session_date)
+        .all()
+    )
+    patient_ids, seconds, weights = zip(*rows) if rows else ((),) * 3
+    return {
+        "patient_id": np.asarray(patient_ids, dtype=object),
+        "seconds": np.asarray(seconds, dtype=float),
+        "weight_kg": np.asarray(weights, dtype=float),
+    }
+
+
+def fit_weight_trends(
+    patient_ids: np.ndarray, seconds: np.ndarray, weights: np.ndarray
+) -> Dict[str, np.ndarray]:
+    """
+    Comentário em pt-BR: regressão linear (mínimos quadrados) de todos os pacientes de uma vez.
+
+    As somas por paciente saem de np.bincount sobre o código do grupo, sem laço por paciente.
+    O eixo x é medido em semanas desde a primeira pesagem de cada paciente; pacientes com
+    menos de um dia entre a primeira e a última pesagem ficam com inclinação NaN.
+    """
+    if patient_ids.size == 0:
+        empty = np.array([], dtype=float)
+        return {
+            "patient_id": patient_ids,
+            "count": np.array([], dtype=int),
+            "origin": empty,
+            "slope": empty,
+            "intercept": empty,
+        }
+
+    starts = np.concatenate(([0], np.flatnonzero(patient_ids[1:] != patient_ids[:-1]) + 1))
+    counts = np.diff(np.append(starts, patient_ids.size))
+    codes = np.repeat(np.arange(starts.size), counts)
+
+    origin = seconds[starts]
+    x = (seconds - origin[codes]) / SECONDS_PER_WEEK
+    sum_x = np.bincount(codes, weights=x)
+    sum_y = np.bincount(codes, weights=weights)
+    sum_xx = np.bincount(codes, weights=x * x)
+    sum_xy = np.bincount(codes, weights=x * weights)
+
+    denominator = counts * sum_xx - sum_x ** 2
+    span_weeks = x[starts + counts - 1]
+    valid = (counts >= 2) & (span_weeks >= 1 / 7)
+    slope = np.full(starts.size, np.nan)
+    slope[valid] = (counts * sum_xy - sum_x * sum_y)[valid] / denominator[valid]
+    intercept = (sum_y - np.nan_to_num(slope) * sum_x) / counts
+
+    return {
+        "patient_id": patient_ids[starts],
+        "count": counts,
+        "origin": origin,
+        "slope": slope,
+        "intercept": intercept,
+    }
+
+
+def _add_months(value: datetime, months: int) -> datetime:
+    month_index = value.month - 1 + months
+    year, month = value.year + month_index // 12, month_index % 12 + 1
+    return value.replace(year=year, month=month, day=min(value.day, calendar.monthrange(year, month)[1]))
+
+
+def last_planned_session(cycle_date: datetime, periodicity: PeriodicityEnum, max_sessions: int) -> datetime:
+    """
+    Comentário em pt-BR: data prevista da última sessão do ciclo conforme a periodicidade
+    """
+    remaining = max(max_sessions - 1, 0)
+    if periodicity == PeriodicityEnum.monthly:
+        return _add_months(cycle_date, remaining)
+    days = 14 if periodicity == PeriodicityEnum.biweekly else 7
+    return cycle_date + timedelta(days=days * remaining)
+
+
+def _current_cycle_ends(db: Session) -> Dict[object, datetime]:
+    latest_cycle = (
+        db.query(
+            Cycle.patient_id.label("patient_id"),
+            func.max(Cycle.cycle_date).label("cycle_date"),
+        )
+        .group_by(Cycle.patient_id)
+        .subquery()
+    )
+    cycles = (
+        db.query(Cycle.patient_id, Cycle.cycle_date, Cycle.periodicity, Cycle.max_sessions)
+        .join(
+            latest_cycle,
+            (latest_cycle.c.patient_id == Cycle.patient_id)
+            & (latest_cycle.c.cycle_date == Cycle.cycle_date),
+        )
+        .all()
+    )
+    ends = {}
+    for patient_id, cycle_date, periodicity, max_sessions in cycles:
+        if cycle_date.tzinfo is None:
+            cycle_date = cycle_date.replace(tzinfo=timezone.utc)
+        ends[patient_id] = last_planned_session(cycle_date, periodicity, max_sessions)
+    return ends
+
+
+def refresh_weight_trends(db: Session) -> Optional[Tuple[int, datetime]]:
+    """
+    Comentário em pt-BR: ajusta as tendências de todos os pacientes e regrava a tabela
+    numa única transação. Retorna (pacientes ajustados, instante do cálculo) ou None
+    quando outro processo já está recalculando.
+    """
+    if not try_refresh_lock(db, _REFRESH_LOCK_KEY):
+        db.rollback()
+        return None
+
+    weighings = load_weighings(db)
+    fitted = fit_weight_trends(weighings["patient_id"], weighings["seconds"], weighings["weight_kg"])
+    cycle_ends = _current_cycle_ends(db)
+    computed_at = datetime.now(timezone.utc)
+
+    valid = ~np.isnan(fitted["slope"])
+    patient_ids = fitted["patient_id"][valid]
+    slopes = fitted["slope"][valid]
+    intercepts = fitted["intercept"][valid]
+    origins = fitted["origin"][valid]
+    counts = fitted["count"][valid]
+
+    # Projeção vetorizada: semanas entre a primeira pesagem e a última sessão prevista
+    projected_for = [cycle_ends.get(patient_id) for patient_id in patient_ids]
+    end_seconds = np.array(
+        [end.timestamp() if end is not None else np.nan for end in projected_for], dtype=float
+    )
+    projected = intercepts + slopes * (end_seconds - origins) / SECONDS_PER_WEEK
+
+    db.query(PatientWeightTrend).delete(synchronize_session=False)
+    db.bulk_insert_mappings(
+        PatientWeightTrend,
+        [
+            {
+                "patient_id": patient_id,
+                "slope_kg_per_week": round(float(slope), 3),
+                "projected_weight_kg": None if np.isnan(weight) else round(float(weight), 2),
+                "projected_for": end,
+                "sessions_count": int(count),
+                "computed_at": computed_at,
+            }
+            for patient_id, slope, weight, end, count in zip(
+                patient_ids, slopes, projected, projected_for, counts
+            )
+        ],
+    )
+    db.commit()
+    return len(patient_ids), computed_at
@@ -7,6 +7,11 @@ from app.models.cycle import Cycle
 from app.models.session import Session
 from app.models.medication import Medication
 from app.models.body_composition import BodyComposition
+from app.models.dashboard_snapshot import DashboardSnapshot
+from app.models.dashboard_counter import DashboardCounter
+from app.models.session_daily_rollup import SessionDailyRollup
+from app.models.patient_weight_trend import PatientWeightTrend
+from app.models.cohort_percentile import CohortPercentile
 
 __all__ = [
     "User",
@@ -18,4 +23,9 @@ __all__ = [
     "Session",
     "Medication",
     "BodyComposition",
+    "DashboardSnapshot",
+    "DashboardCounter",
+    "SessionDailyRollup",
+    "PatientWeightTrend",
+    "CohortPercentile",
 ]
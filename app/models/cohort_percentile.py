@@ -0,0 +1,20 @@
+from sqlalchemy import Column, DateTime, Enum, Integer, JSON, String
+
+from app.database import Base
+from app.models.patient import GenderEnum
+
+
+class CohortPercentile(Base):
+    """
+    Tabela de percentis por gênero, faixa etária e métrica da composição corporal
+    """
+
+    __tablename__ = "cohort_percentiles"
+
+    gender = Column(Enum(GenderEnum), primary_key=True)
+    age_band_start = Column(Integer, primary_key=True)
+    metric = Column(String, primary_key=True)
+    # Comentário em pt-BR: 101 pontos de corte (percentis 0 a 100), em ordem crescente
+    cutpoints = Column(JSON, nullable=False)
+    sample_size = Column(Integer, nullable=False)
+    computed_at = Column(DateTime(timezone=True), nullable=False)
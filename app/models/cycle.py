@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, DateTime, Enum, ForeignKey
+from sqlalchemy import Column, String, Integer, DateTime, Enum, ForeignKey, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -29,6 +29,10 @@ class CycleTypeEnum(str, enum.Enum):
 
 class Cycle(Base):
     __tablename__ = "cycles"
+    __table_args__ = (
+        Index("ix_cycles_patient_id_cycle_date", "patient_id", "cycle_date"),
+        Index("ix_cycles_cycle_date_id", "cycle_date", "id"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     patient_id = Column(UUID(as_uuid=True), ForeignKey("patients.id", ondelete="CASCADE"), nullable=False)
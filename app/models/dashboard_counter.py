@@ -0,0 +1,15 @@
+from sqlalchemy import BigInteger, Column, String
+
+from app.database import Base
+
+
+class DashboardCounter(Base):
+    """
+    Contador agregado do dashboard mantido incrementalmente a cada escrita
+    """
+
+    __tablename__ = "dashboard_counters"
+
+    metric = Column(String, primary_key=True)
+    key = Column(String, primary_key=True)
+    value = Column(BigInteger, nullable=False, default=0)
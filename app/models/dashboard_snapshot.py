@@ -0,0 +1,17 @@
+from sqlalchemy import Column, DateTime, JSON
+from sqlalchemy.dialects.postgresql import UUID
+import uuid
+
+from app.database import Base
+
+
+class DashboardSnapshot(Base):
+    """
+    Snapshot materializado das estatísticas do dashboard
+    """
+
+    __tablename__ = "dashboard_snapshots"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    payload = Column(JSON, nullable=False)
+    computed_at = Column(DateTime(timezone=True), nullable=False, index=True)
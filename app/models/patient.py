@@ -1,4 +1,5 @@
-from sqlalchemy import Column, String, Date, DateTime, Enum, ForeignKey
+from datetime import date
+from sqlalchemy import Column, Integer, String, Date, DateTime, Enum, ForeignKey, cast, extract, literal
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -70,3 +71,17 @@ class Patient(Base):
         cascade="all, delete-orphan",
     )
 
+
+def age_in_years(birth_date_column, today: date):
+    """
+    Comentário em pt-BR: expressão SQL da idade em anos completos.
+    Compara datas no formato AAAAMMDD, o que funciona em qualquer banco sem carregar
+    as datas de nascimento no Python.
+    """
+    birth_as_number = (
+        cast(extract("year", birth_date_column), Integer) * 10000
+        + cast(extract("month", birth_date_column), Integer) * 100
+        + cast(extract("day", birth_date_column), Integer)
+    )
+    today_as_number = literal(today.year * 10000 + today.month * 100 + today.day, Integer)
+    return (today_as_number - birth_as_number) // 10000
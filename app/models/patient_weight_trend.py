@@ -0,0 +1,24 @@
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, Numeric
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.database import Base
+
+
+class PatientWeightTrend(Base):
+    """
+    Tendência de peso ajustada por regressão linear, recalculada em lote
+    """
+
+    __tablename__ = "patient_weight_trends"
+
+    patient_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("patients.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    slope_kg_per_week = Column(Numeric(7, 3), nullable=False)
+    # Comentário em pt-BR: projeção para a última sessão prevista do ciclo atual
+    projected_weight_kg = Column(Numeric(7, 2), nullable=True)
+    projected_for = Column(DateTime(timezone=True), nullable=True)
+    sessions_count = Column(Integer, nullable=False)
+    computed_at = Column(DateTime(timezone=True), nullable=False)
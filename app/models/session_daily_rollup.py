@@ -0,0 +1,37 @@
+from sqlalchemy import Column, Date, Enum, Index, Integer, JSON, Numeric, text
+from sqlalchemy.dialects.postgresql import UUID
+import uuid
+
+from app.database import Base
+from app.models.patient import TreatmentLocationEnum
+
+
+class SessionDailyRollup(Base):
+    """
+    Agregado diário de sessões por medicação, dosagem, ativador e local de atendimento
+    """
+
+    __tablename__ = "session_daily_rollups"
+    __table_args__ = (
+        # Comentário em pt-BR: uma linha por grupo do dia; coalesce porque NULLs seriam
+        # considerados distintos e permitiriam grupos duplicados
+        Index(
+            "uq_session_daily_rollups_group",
+            "day",
+            "medication_id",
+            text("coalesce(dosage_mg, -1)"),
+            text("coalesce(activator_id, '00000000-0000-0000-0000-000000000000')"),
+            "treatment_location",
+            unique=True,
+        ),
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    day = Column(Date, nullable=False, index=True)
+    medication_id = Column(UUID(as_uuid=True), nullable=False)
+    dosage_mg = Column(Numeric(precision=10, scale=2), nullable=True)
+    activator_id = Column(UUID(as_uuid=True), nullable=True)
+    treatment_location = Column(Enum(TreatmentLocationEnum), nullable=False)
+    sessions_count = Column(Integer, nullable=False)
+    # Comentário em pt-BR: conjunto exato de pacientes distintos do dia (poucos por chave)
+    patient_ids = Column(JSON, nullable=False)
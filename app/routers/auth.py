@@ -1,12 +1,14 @@
-from datetime import timedelta
-from typing import List
+from datetime import datetime, timedelta
+from typing import List, Optional
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 
+from app import bulk_delete
 from app.database import get_db
 from app.models.user import User
+from app.schemas.bulk_delete import BulkDeleteResponse
 from app.schemas.user import Token, UserCreate, UserResponse
 from app.auth import (
     verify_password,
@@ -96,6 +98,30 @@ async def list_users(
     return [UserResponse.model_validate(user) for user in users]
 
 
+@router.delete(
+    "/users",
+    response_model=BulkDeleteResponse,
+    dependencies=[Depends(bulk_delete.require_enabled)],
+)
+async def delete_users_bulk(
+    created_before: Optional[datetime] = Query(None, description="Usuários criados antes deste instante"),
+    delete_all: bool = Query(False, alias="all", description="Necessário para remover sem nenhum filtro"),
+    dry_run: bool = Query(False, description="Apenas conta o que seria removido"),
+    db: Session = Depends(get_db),
+    current_user: UserResponse = Depends(get_current_user),
+):
+    """
+    Remove usuários em massa (endpoint administrativo). O usuário autenticado nunca é
+    removido, para que a sessão de administração continue válida.
+    """
+    criteria = []
+    if created_before is not None:
+        criteria.append(User.created_at < created_before)
+    bulk_delete.require_scope(criteria, delete_all)
+
+    return bulk_delete.delete_users(db, criteria + [User.id != current_user.id], dry_run)
+
+
 @router.delete("/users/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_user(
     user_id: UUID,
@@ -0,0 +1,30 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+
+from app import body_composition_quality
+from app.auth import get_current_user
+from app.database import get_db
+from app.schemas.body_composition import BodyCompositionOutliersResponse
+from app.schemas.user import UserResponse
+
+router = APIRouter(prefix="/body-compositions", tags=["body-compositions"])
+
+
+@router.get("/outliers", response_model=BodyCompositionOutliersResponse)
+async def list_body_composition_outliers(
+    limit: int = Query(100, ge=1, le=1000, description="Máximo de composições sinalizadas retornadas"),
+    code: Optional[str] = Query(
+        None,
+        description="Filtra por regra: weight_jump, fat_kg_inconsistent ou zscore_<campo>",
+    ),
+    db: Session = Depends(get_db),
+    current_user: UserResponse = Depends(get_current_user),
+):
+    """
+    Comentário em pt-BR: valida todas as composições corporais (saltos por paciente,
+    consistência entre campos e z-score da coorte) e lista as sinalizadas
+    """
+    return await run_in_threadpool(body_composition_quality.scan_outliers, db, limit, code)
@@ -1,12 +1,24 @@
+from datetime import date, datetime
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import and_, or_
 from sqlalchemy.orm import Session
-from typing import List
+from typing import Optional
 
+from app import batch_get, bulk_delete, dashboard_counters, session_rollups
 from app.database import get_db
-from app.models.cycle import Cycle
+from app.models.cycle import Cycle, CycleTypeEnum, PeriodicityEnum
 from app.models.patient import Patient
-from app.schemas.cycle import CycleCreate, CycleUpdate, CycleResponse
+from app.pagination import decode_datetime_id_cursor, encode_cursor
+from app.schemas.cycle import (
+    CycleBatchResponse,
+    CycleCreate,
+    CycleResponse,
+    CyclesPageResponse,
+    CycleUpdate,
+)
+from app.schemas.bulk_delete import BulkDeleteResponse
 from app.auth import get_current_user
 from app.schemas.user import UserResponse
 
@@ -37,16 +49,111 @@ async def create_cycle(
     return CycleResponse.model_validate(new_cycle)
 
 
-@router.get("", response_model=List[CycleResponse])
+@router.get("", response_model=CyclesPageResponse)
 async def list_cycles(
+    patient_id: Optional[UUID] = Query(None, description="Filtra pelos ciclos do paciente"),
+    type: Optional[CycleTypeEnum] = Query(None),
+    periodicity: Optional[PeriodicityEnum] = Query(None),
+    start_date: Optional[date] = Query(None, description="Ciclos com cycle_date a partir desta data (YYYY-MM-DD)"),
+    end_date: Optional[date] = Query(None, description="Ciclos com cycle_date até esta data (YYYY-MM-DD)"),
+    limit: int = Query(50, gt=0, le=200),
+    cursor: Optional[str] = Query(None, description="Cursor retornado na página anterior"),
     db: Session = Depends(get_db),
     current_user: UserResponse = Depends(get_current_user),
 ):
     """
-    Listar todos os ciclos
+    Comentário em pt-BR: lista ciclos do mais recente para o mais antigo com paginação
+    keyset em (cycle_date, id), servida por ix_cycles_cycle_date_id ou, com patient_id,
+    por ix_cycles_patient_id_cycle_date
     """
-    cycles = db.query(Cycle).all()
-    return [CycleResponse.model_validate(cycle) for cycle in cycles]
+    query = db.query(Cycle)
+    if patient_id is not None:
+        query = query.filter(Cycle.patient_id == patient_id)
+    if type is not None:
+        query = query.filter(Cycle.type == type)
+    if periodicity is not None:
+        query = query.filter(Cycle.periodicity == periodicity)
+    if start_date is not None:
+        query = query.filter(Cycle.cycle_date >= datetime.combine(start_date, datetime.min.time()))
+    if end_date is not None:
+        query = query.filter(Cycle.cycle_date <= datetime.combine(end_date, datetime.max.time()))
+
+    cursor_values = decode_datetime_id_cursor(cursor)
+    if cursor_values is not None:
+        cursor_date, cursor_id = cursor_values
+        query = query.filter(
+            or_(
+                Cycle.cycle_date < cursor_date,
+                and_(Cycle.cycle_date == cursor_date, Cycle.id < cursor_id),
+            )
+        )
+
+    cycles = query.order_by(Cycle.cycle_date.desc(), Cycle.id.desc()).limit(limit + 1).all()
+    has_next = len(cycles) > limit
+    cycles = cycles[:limit]
+
+    next_cursor = None
+    if has_next and cycles:
+        next_cursor = encode_cursor([cycles[-1].cycle_date.isoformat(), str(cycles[-1].id)])
+
+    return CyclesPageResponse(
+        items=[CycleResponse.model_validate(cycle) for cycle in cycles],
+        next_cursor=next_cursor,
+        has_next=has_next,
+    )
+
+
+@router.delete(
+    "",
+    response_model=BulkDeleteResponse,
+    dependencies=[Depends(bulk_delete.require_enabled)],
+)
+async def delete_cycles_bulk(
+    patient_id: Optional[UUID] = Query(None, description="Remove os ciclos do paciente"),
+    type: Optional[CycleTypeEnum] = Query(None),
+    periodicity: Optional[PeriodicityEnum] = Query(None),
+    start_date: Optional[date] = Query(None, description="Ciclos com cycle_date a partir desta data (YYYY-MM-DD)"),
+    end_date: Optional[date] = Query(None, description="Ciclos com cycle_date até esta data (YYYY-MM-DD)"),
+    delete_all: bool = Query(False, alias="all", description="Necessário para remover sem nenhum filtro"),
+    dry_run: bool = Query(False, description="Apenas conta o que seria removido"),
+    db: Session = Depends(get_db),
+    current_user: UserResponse = Depends(get_current_user),
+):
+    """
+    Comentário em pt-BR: remove em massa os ciclos que atendem aos filtros (os mesmos do
+    GET /cycles) junto com suas sessões. Usado pela CLI administrativa.
+    """
+    criteria = []
+    if patient_id is not None:
+        criteria.append(Cycle.patient_id == patient_id)
+    if type is not None:
+        criteria.append(Cycle.type == type)
+    if periodicity is not None:
+        criteria.append(Cycle.periodicity == periodicity)
+    if start_date is not None:
+        criteria.append(Cycle.cycle_date >= datetime.combine(start_date, datetime.min.time()))
+    if end_date is not None:
+        criteria.append(Cycle.cycle_date <= datetime.combine(end_date, datetime.max.time()))
+    bulk_delete.require_scope(criteria, delete_all)
+
+    return await run_in_threadpool(bulk_delete.delete_cycles, db, criteria, dry_run)
+
+
+@router.get("/batch", response_model=CycleBatchResponse)
+async def get_cycles_batch(
+    ids: str = Query(..., description=f"Ids separados por vírgula (máximo {batch_get.MAX_BATCH_IDS})"),
+    db: Session = Depends(get_db),
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """
+    Comentário em pt-BR: busca vários ciclos numa única consulta IN
+    """
+    requested = batch_get.parse_ids(ids)
+    cycles = db.query(Cycle).filter(Cycle.id.in_(requested)).all()
+    items, missing = batch_get.in_request_order(
+        requested, {cycle.id: CycleResponse.model_validate(cycle) for cycle in cycles}
+    )
+    return CycleBatchResponse(items=items, missing_ids=missing)
 
 
 @router.get("/{cycle_id}", response_model=CycleResponse)
@@ -110,7 +217,13 @@ async def delete_cycle(
             detail="Cycle not found"
         )
     
+    dashboard_counters.apply_deltas(
+        db, dashboard_counters.session_activator_deltas_for_cycle(db, cycle_id)
+    )
+    affected_days = session_rollups.days_for_cycle(db, cycle_id)
     db.delete(cycle)
+    db.flush()
+    session_rollups.refresh_days(db, affected_days)
     db.commit()
     return None
 
@@ -1,309 +1,332 @@
-from datetime import datetime, timedelta, date
-from decimal import Decimal
-from typing import List, Tuple, Optional
-from fastapi import APIRouter, Depends, Query
+import os
+from datetime import datetime, time, timedelta, timezone, date
+from typing import Any, Callable, List, Tuple, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func, desc
+from sqlalchemy import DateTime, Interval, and_, bindparam, case, cast, desc, func, literal, literal_column, select
 
-from app.database import get_db
-from app.models.patient import Patient, GenderEnum, TreatmentLocationEnum
+from app import dashboard_counters, effectiveness, session_rollups
+from app.database import SessionLocal, get_db
+from app.models.patient import Patient, age_in_years
 from app.models.session import Session as SessionModel
 from app.models.body_composition import BodyComposition
 from app.models.cycle import Cycle
-from app.models.activator import Activator
-from app.models.medication import Medication
 from app.schemas.dashboard import (
-    DashboardStatsResponse, 
-    ActivatorUsageItem, 
-    MedicationPreferenceItem, 
-    GenderDistributionItem, 
-    TreatmentLocationDistributionItem,
+    AgeBucketItem,
+    AgeDistributionResponse,
+    CompareToEnum,
+    DashboardStatsResponse,
+    EffectivenessResponse,
     WeightLossRankingItem,
     WeightLossRankingResponse,
     WeightGainRankingItem,
     WeightGainRankingResponse,
     MedicationDosageItem,
     MedicationDosageResponse,
+    SingleFlightMetricsItem,
+    TrendBucketItem,
+    TrendGranularityEnum,
+    TrendsResponse,
 )
+from app.jobs import dashboard_snapshot
+from app.singleflight import SingleFlight, build_key
 from app.auth import get_current_user
 from app.schemas.user import UserResponse
 
 router = APIRouter(prefix="/dashboard", tags=["dashboard"])
 
+# Comentário em pt-BR: coalescência por worker das consultas analíticas mais caras
+analytics_flight = SingleFlight(
+    ttl_seconds=float(os.getenv("DASHBOARD_RESULT_CACHE_SECONDS", "0"))
+)
+
+# Estatísticas de efetividade mudam pouco: ficam em cache por intervalo de datas
+effectiveness_flight = SingleFlight(
+    ttl_seconds=float(os.getenv("DASHBOARD_EFFECTIVENESS_CACHE_SECONDS", "600"))
+)
+
+
+def _resolve_period(start_date: Optional[date], end_date: Optional[date]) -> Tuple[date, date]:
+    """
+    Comentário em pt-BR: aplica o período padrão (últimos 30 dias) quando não informado
+    """
+    if end_date is None:
+        end_date = date.today()
+    if start_date is None:
+        start_date = end_date - timedelta(days=30)
+    return start_date, end_date
+
+
+def _run_on_own_session(engine, compute: Callable[..., Any], *args):
+    with SessionLocal(bind=engine) as own_db:
+        return compute(own_db, *args)
+
+
+async def _coalesced(
+    response: Response,
+    key: str,
+    db: Session,
+    compute: Callable[..., Any],
+    *args,
+    flight: SingleFlight = analytics_flight,
+):
+    """
+    Comentário em pt-BR: executa o cálculo via single-flight e informa o resultado no header.
+
+    O cálculo roda numa sessão própria, aberta e fechada dentro da task compartilhada: a
+    sessão da requisição que iniciou a task é fechada pelo FastAPI se o cliente desconectar,
+    e os demais aguardando a mesma chave não podem depender dela.
+    """
+    engine = db.get_bind()
+    result, outcome = await flight.do(
+        key, lambda: run_in_threadpool(_run_on_own_session, engine, compute, *args)
+    )
+    response.headers["X-Singleflight"] = outcome
+    return result
+
+
+def _build_stats_response(db: Session, snapshot) -> DashboardStatsResponse:
+    """
+    Comentário em pt-BR: combina o snapshot (métricas por período) com os contadores
+    incrementais, que estão sempre atualizados
+    """
+    counter_stats = dashboard_counters.read_counter_stats(db)
+    if snapshot is None:
+        return DashboardStatsResponse(**dashboard_snapshot.compute_dashboard_stats(db), **counter_stats)
+    return dashboard_snapshot.build_stats_response(snapshot, counter_stats)
+
+
+def _load_dashboard_stats(db: Session) -> DashboardStatsResponse:
+    snapshot = dashboard_snapshot.get_latest_snapshot(db)
+    if snapshot is None:
+        # Sem snapshot gravado (ou outro worker gerando o primeiro): calcula direto
+        snapshot = dashboard_snapshot.refresh_dashboard_snapshot(db)
+    return _build_stats_response(db, snapshot)
+
 
 @router.get("/stats", response_model=DashboardStatsResponse)
 async def get_dashboard_stats(
+    response: Response,
     db: Session = Depends(get_db),
     current_user: UserResponse = Depends(get_current_user),
 ):
     """
-    Comentário em pt-BR: retorna estatísticas do dashboard com métricas e dados para gráficos
-    """
-    # Total de pacientes
-    total_patients = db.query(func.count(Patient.id)).scalar() or 0
-
-    # Média de idade dos pacientes
-    birth_dates = db.query(Patient.birth_date).all()
-    average_age = None
-    if birth_dates:
-        today = date.today()
-        ages = []
-        for (birth_date,) in birth_dates:
-            age = today.year - birth_date.year - ((today.month, today.day) < (birth_date.month, birth_date.day))
-            ages.append(age)
-        if ages:
-            average_age = sum(ages) / len(ages)
-
-    # Sessões nos últimos 30 dias
-    thirty_days_ago = datetime.now() - timedelta(days=30)
-    sessions_last_30_days = (
-        db.query(func.count(SessionModel.id))
-        .filter(SessionModel.session_date >= thirty_days_ago)
-        .scalar() or 0
+    Comentário em pt-BR: retorna estatísticas do dashboard a partir do snapshot materializado
+    e dos contadores incrementais. stale_after indica até quando o snapshot é considerado atual.
+    """
+    return await _coalesced(
+        response,
+        build_key("/dashboard/stats", {}),
+        db,
+        _load_dashboard_stats,
     )
 
-    # Total de kilos perdidos
-    # Para cada paciente, buscar primeira e última body_composition
-    total_weight_lost = Decimal("0.0")
-    
-    # Buscar todos os pacientes que têm pelo menos uma sessão com body_composition
-    patients_with_sessions = (
-        db.query(Patient.id)
-        .join(Cycle, Cycle.patient_id == Patient.id)
-        .join(SessionModel, SessionModel.cycle_id == Cycle.id)
-        .join(BodyComposition, BodyComposition.session_id == SessionModel.id)
-        .distinct()
-        .all()
-    )
-    
-    for (patient_id,) in patients_with_sessions:
-        # Buscar primeira sessão com body_composition
-        first_session = (
-            db.query(SessionModel)
-            .join(Cycle, Cycle.id == SessionModel.cycle_id)
-            .join(BodyComposition, BodyComposition.session_id == SessionModel.id)
-            .options(joinedload(SessionModel.body_composition))
-            .filter(Cycle.patient_id == patient_id)
-            .order_by(SessionModel.session_date)
-            .first()
-        )
-        
-        # Buscar última sessão com body_composition
-        last_session = (
-            db.query(SessionModel)
-            .join(Cycle, Cycle.id == SessionModel.cycle_id)
-            .join(BodyComposition, BodyComposition.session_id == SessionModel.id)
-            .options(joinedload(SessionModel.body_composition))
-            .filter(Cycle.patient_id == patient_id)
-            .order_by(desc(SessionModel.session_date))
-            .first()
-        )
-        
-        if first_session and last_session and first_session.id != last_session.id:
-            first_weight = first_session.body_composition.weight_kg
-            last_weight = last_session.body_composition.weight_kg
-            weight_diff = last_weight - first_weight
-            total_weight_lost += weight_diff
-
-    # Ativadores mais utilizados
-    activators_usage_raw: List[Tuple[str, int]] = (
-        db.query(Activator.name, func.count(SessionModel.id))
-        .join(SessionModel, SessionModel.activator_id == Activator.id)
-        .filter(SessionModel.activator_id.isnot(None))
-        .group_by(Activator.id, Activator.name)
-        .order_by(desc(func.count(SessionModel.id)))
-        .all()
-    )
-    
-    activators_usage = [
-        ActivatorUsageItem(name=name, count=count)
-        for name, count in activators_usage_raw
-    ]
 
-    # Medicação preferencial mais optada
-    medications_preference_raw: List[Tuple[str, int]] = (
-        db.query(Medication.name, func.count(Patient.id))
-        .join(Patient, Patient.preferred_medication_id == Medication.id)
-        .filter(Patient.preferred_medication_id.isnot(None))
-        .group_by(Medication.id, Medication.name)
-        .order_by(desc(func.count(Patient.id)))
-        .all()
-    )
-    
-    medications_preference = [
-        MedicationPreferenceItem(name=name, count=count)
-        for name, count in medications_preference_raw
-    ]
+@router.post("/stats/refresh", response_model=DashboardStatsResponse)
+async def refresh_dashboard_stats(
+    response: Response,
+    db: Session = Depends(get_db),
+    current_user: UserResponse = Depends(get_current_user),
+):
+    """
+    Comentário em pt-BR: força a atualização do snapshot do dashboard sob demanda.
+    A duração de cada unidade do cálculo é informada no header Server-Timing.
+    """
+    timings: dict = {}
+    snapshot = await run_in_threadpool(dashboard_snapshot.refresh_dashboard_snapshot, db, timings)
+    if timings:
+        response.headers["Server-Timing"] = dashboard_snapshot.format_server_timing(timings)
+    if snapshot is None:
+        snapshot = dashboard_snapshot.get_latest_snapshot(db)
+    return _build_stats_response(db, snapshot)
 
-    # Distribuição por gênero
-    gender_distribution_raw: List[Tuple[str, int]] = (
-        db.query(Patient.gender, func.count(Patient.id))
-        .group_by(Patient.gender)
-        .all()
-    )
-    
-    # Garantir que sempre temos ambos os gêneros, mesmo que com count 0
-    gender_counts = {gender.value: 0 for gender in GenderEnum}
-    for gender, count in gender_distribution_raw:
-        gender_counts[gender.value] = count
-    
-    gender_distribution = [
-        GenderDistributionItem(
-            gender="Masculino" if gender == GenderEnum.male.value else "Feminino",
-            count=count
-        )
-        for gender, count in gender_counts.items()
-    ]
 
-    # Distribuição por local de atendimento
-    treatment_location_distribution_raw: List[Tuple[str, int]] = (
-        db.query(Patient.treatment_location, func.count(Patient.id))
-        .group_by(Patient.treatment_location)
+@router.get("/age-distribution", response_model=AgeDistributionResponse)
+async def get_age_distribution(
+    bucket_width: int = Query(10, ge=1, le=100, description="Largura de cada faixa etária em anos"),
+    db: Session = Depends(get_db),
+    current_user: UserResponse = Depends(get_current_user),
+):
+    """
+    Comentário em pt-BR: retorna média de idade e histograma por faixa etária em uma única
+    consulta agrupada no banco, sem carregar as datas de nascimento
+    """
+    age = age_in_years(Patient.birth_date, date.today())
+    bucket = (age // bucket_width).label("bucket")
+    rows = (
+        db.query(bucket, func.count(Patient.id), func.sum(age))
+        .group_by(bucket)
+        .order_by(bucket)
         .all()
     )
-    
-    # Garantir que sempre temos ambos os locais, mesmo que com count 0
-    location_counts = {location.value: 0 for location in TreatmentLocationEnum}
-    for location, count in treatment_location_distribution_raw:
-        location_counts[location.value] = count
-    
-    treatment_location_distribution = [
-        TreatmentLocationDistributionItem(
-            location="Clínica" if location == TreatmentLocationEnum.clinic.value else "Domicílio",
-            count=count
-        )
-        for location, count in location_counts.items()
-    ]
 
-    return DashboardStatsResponse(
+    total_patients = sum(count for _, count, _ in rows)
+    age_sum = sum(int(ages or 0) for _, _, ages in rows)
+    average_age = round(age_sum / total_patients, 1) if total_patients else None
+
+    return AgeDistributionResponse(
+        bucket_width=bucket_width,
         total_patients=total_patients,
-        sessions_last_30_days=sessions_last_30_days,
-        total_weight_lost_kg=float(total_weight_lost),
-        average_age=round(average_age, 1) if average_age is not None else None,
-        activators_usage=activators_usage,
-        medications_preference=medications_preference,
-        gender_distribution=gender_distribution,
-        treatment_location_distribution=treatment_location_distribution,
+        average_age=average_age,
+        buckets=[
+            AgeBucketItem(
+                start_age=int(index) * bucket_width,
+                end_age=(int(index) + 1) * bucket_width,
+                count=count,
+            )
+            for index, count, _ in rows
+        ],
     )
 
 
-@router.get("/weight-loss-ranking", response_model=WeightLossRankingResponse)
-async def get_weight_loss_ranking(
-    start_date: Optional[date] = Query(None, description="Data inicial do período (formato: YYYY-MM-DD). Se não informado, usa últimos 30 dias."),
-    end_date: Optional[date] = Query(None, description="Data final do período (formato: YYYY-MM-DD). Se não informado, usa data atual."),
-    db: Session = Depends(get_db),
-    current_user: UserResponse = Depends(get_current_user),
-):
+def _previous_period(start_date: date, end_date: date) -> Tuple[date, date]:
     """
-    Comentário em pt-BR: retorna ranking dos pacientes que mais perderam peso no período especificado.
-    Se não informar datas, usa últimos 30 dias por padrão.
+    Comentário em pt-BR: período imediatamente anterior, com a mesma quantidade de dias
     """
-    # Definir período padrão se não informado
-    if end_date is None:
-        end_date = date.today()
-    
-    if start_date is None:
-        start_date = end_date - timedelta(days=30)
-    
+    previous_end_date = start_date - timedelta(days=1)
+    return previous_end_date - (end_date - start_date), previous_end_date
+
+
+def _compute_weight_loss_ranking(
+    db: Session, start_date: date, end_date: date, compare_to: Optional[CompareToEnum] = None
+) -> WeightLossRankingResponse:
+    """
+    Comentário em pt-BR: calcula o ranking de perda de peso para o período já definido.
+
+    Uma única consulta agrupada: as janelas marcam a primeira e a última pesagem de cada
+    paciente em cada período e a agregação condicional separa o período atual do anterior.
+    """
+    previous_start_date, previous_end_date = (
+        _previous_period(start_date, end_date) if compare_to else (None, None)
+    )
+
     # Converter para datetime para comparação com session_date
     start_datetime = datetime.combine(start_date, datetime.min.time())
     end_datetime = datetime.combine(end_date, datetime.max.time())
-    
-    # Buscar pacientes que tiveram sessões no período
-    patients_with_sessions_in_period = (
-        db.query(Patient.id, Patient.name)
-        .join(Cycle, Cycle.patient_id == Patient.id)
-        .join(SessionModel, SessionModel.cycle_id == Cycle.id)
+    range_start_datetime = datetime.combine(previous_start_date or start_date, datetime.min.time())
+
+    is_current = case((SessionModel.session_date >= start_datetime, 1), else_=0)
+    weighings = (
+        db.query(
+            Cycle.patient_id.label("patient_id"),
+            is_current.label("is_current"),
+            BodyComposition.weight_kg.label("weight_kg"),
+            func.row_number()
+            .over(partition_by=(Cycle.patient_id, is_current), order_by=SessionModel.session_date)
+            .label("first_rank"),
+            func.row_number()
+            .over(partition_by=(Cycle.patient_id, is_current), order_by=desc(SessionModel.session_date))
+            .label("last_rank"),
+        )
+        .select_from(SessionModel)
+        .join(Cycle, Cycle.id == SessionModel.cycle_id)
         .join(BodyComposition, BodyComposition.session_id == SessionModel.id)
         .filter(
-            SessionModel.session_date >= start_datetime,
-            SessionModel.session_date <= end_datetime
+            SessionModel.session_date >= range_start_datetime,
+            SessionModel.session_date <= end_datetime,
         )
-        .distinct()
-        .all()
+        .subquery()
     )
-    
-    ranking_items = []
-    
-    for patient_id, patient_name in patients_with_sessions_in_period:
-        # Buscar primeira sessão no período
-        first_session = (
-            db.query(SessionModel)
-            .join(Cycle, Cycle.id == SessionModel.cycle_id)
-            .join(BodyComposition, BodyComposition.session_id == SessionModel.id)
-            .options(joinedload(SessionModel.body_composition))
-            .filter(
-                Cycle.patient_id == patient_id,
-                SessionModel.session_date >= start_datetime,
-                SessionModel.session_date <= end_datetime
-            )
-            .order_by(SessionModel.session_date)
-            .first()
+
+    def weight_at(period: int, rank_column):
+        return func.max(
+            case((and_(weighings.c.is_current == period, rank_column == 1), weighings.c.weight_kg))
         )
-        
-        # Buscar última sessão no período
-        last_session = (
-            db.query(SessionModel)
-            .join(Cycle, Cycle.id == SessionModel.cycle_id)
-            .join(BodyComposition, BodyComposition.session_id == SessionModel.id)
-            .options(joinedload(SessionModel.body_composition))
-            .filter(
-                Cycle.patient_id == patient_id,
-                SessionModel.session_date >= start_datetime,
-                SessionModel.session_date <= end_datetime
-            )
-            .order_by(desc(SessionModel.session_date))
-            .first()
+
+    def sessions_in(period: int):
+        return func.sum(case((weighings.c.is_current == period, 1), else_=0))
+
+    rows = (
+        db.query(
+            Patient.id,
+            Patient.name,
+            weight_at(1, weighings.c.first_rank),
+            weight_at(1, weighings.c.last_rank),
+            sessions_in(1),
+            weight_at(0, weighings.c.first_rank),
+            weight_at(0, weighings.c.last_rank),
+            sessions_in(0),
         )
-        
-        if first_session and last_session:
-            initial_weight = float(first_session.body_composition.weight_kg)
-            final_weight = float(last_session.body_composition.weight_kg)
-            weight_loss = initial_weight - final_weight  # Positivo = perdeu peso
-            
-            # Contar sessões no período
-            sessions_count = (
-                db.query(func.count(SessionModel.id))
-                .join(Cycle, Cycle.id == SessionModel.cycle_id)
-                .join(BodyComposition, BodyComposition.session_id == SessionModel.id)
-                .filter(
-                    Cycle.patient_id == patient_id,
-                    SessionModel.session_date >= start_datetime,
-                    SessionModel.session_date <= end_datetime
-                )
-                .scalar() or 0
-            )
-            
-            ranking_items.append({
-                "patient_id": patient_id,
-                "patient_name": patient_name,
-                "weight_loss_kg": round(weight_loss, 2),
-                "initial_weight_kg": round(initial_weight, 2),
-                "final_weight_kg": round(final_weight, 2),
-                "sessions_count": sessions_count,
-            })
-    
+        .join(weighings, weighings.c.patient_id == Patient.id)
+        .group_by(Patient.id, Patient.name)
+        .having(sessions_in(1) > 0)
+        .all()
+    )
+
+    ranking_items = []
+    for (
+        patient_id,
+        patient_name,
+        initial_weight,
+        final_weight,
+        sessions_count,
+        previous_initial_weight,
+        previous_final_weight,
+        previous_sessions_count,
+    ) in rows:
+        weight_loss = round(float(initial_weight) - float(final_weight), 2)  # Positivo = perdeu peso
+        item = {
+            "patient_id": patient_id,
+            "patient_name": patient_name,
+            "weight_loss_kg": weight_loss,
+            "initial_weight_kg": round(float(initial_weight), 2),
+            "final_weight_kg": round(float(final_weight), 2),
+            "sessions_count": int(sessions_count),
+        }
+        if compare_to:
+            item["previous_sessions_count"] = int(previous_sessions_count or 0)
+            if previous_sessions_count:
+                previous_loss = round(float(previous_initial_weight) - float(previous_final_weight), 2)
+                item["previous_weight_loss_kg"] = previous_loss
+                item["weight_loss_delta_kg"] = round(weight_loss - previous_loss, 2)
+        ranking_items.append(item)
+
     # Ordenar por maior perda de peso (descendente)
-    ranking_items.sort(key=lambda x: x["weight_loss_kg"], reverse=True)
-    
+    ranking_items.sort(key=lambda x: (-x["weight_loss_kg"], x["patient_name"]))
+
     # Adicionar rank
     ranked_items = [
-        WeightLossRankingItem(
-            rank=idx + 1,
-            patient_id=item["patient_id"],
-            patient_name=item["patient_name"],
-            weight_loss_kg=item["weight_loss_kg"],
-            initial_weight_kg=item["initial_weight_kg"],
-            final_weight_kg=item["final_weight_kg"],
-            sessions_count=item["sessions_count"],
-        )
+        WeightLossRankingItem(rank=idx + 1, **item)
         for idx, item in enumerate(ranking_items)
     ]
-    
+
     return WeightLossRankingResponse(
         items=ranked_items,
         start_date=start_date,
         end_date=end_date,
+        compare_to=compare_to,
+        previous_start_date=previous_start_date,
+        previous_end_date=previous_end_date,
+    )
+
+
+@router.get("/weight-loss-ranking", response_model=WeightLossRankingResponse)
+async def get_weight_loss_ranking(
+    response: Response,
+    start_date: Optional[date] = Query(None, description="Data inicial do período (formato: YYYY-MM-DD). Se não informado, usa últimos 30 dias."),
+    end_date: Optional[date] = Query(None, description="Data final do período (formato: YYYY-MM-DD). Se não informado, usa data atual."),
+    compare_to: Optional[CompareToEnum] = Query(None, description="previous_period: inclui os valores do período anterior de mesma duração e as diferenças"),
+    db: Session = Depends(get_db),
+    current_user: UserResponse = Depends(get_current_user),
+):
+    """
+    Comentário em pt-BR: retorna ranking dos pacientes que mais perderam peso no período especificado.
+    Se não informar datas, usa últimos 30 dias por padrão.
+    """
+    start_date, end_date = _resolve_period(start_date, end_date)
+    key = build_key(
+        "/dashboard/weight-loss-ranking",
+        {"start_date": start_date, "end_date": end_date, "compare_to": compare_to and compare_to.value},
+    )
+    return await _coalesced(
+        response,
+        key,
+        db,
+        _compute_weight_loss_ranking,
+        start_date,
+        end_date,
+        compare_to,
     )
 
 
@@ -429,10 +452,49 @@ async def get_weight_gain_ranking(
     )
 
 
+def _compute_medication_dosage(
+    db: Session, start_date: date, end_date: date, compare_to: Optional[CompareToEnum] = None
+) -> MedicationDosageResponse:
+    """
+    Comentário em pt-BR: agrupa medicação e dosagem para o período já definido
+    """
+    previous_start_date, previous_end_date = (
+        _previous_period(start_date, end_date) if compare_to else (None, None)
+    )
+
+    # Pacientes distintos por medicação/dosagem, lidos do agregado diário de sessões
+    # (uma única leitura cobre os dois períodos quando há comparação)
+    medication_dosage_raw = session_rollups.medication_dosage_patients(
+        db, start_date, end_date, previous_start_date
+    )
+
+    medication_dosage_items = [
+        MedicationDosageItem(
+            medication_name=medication_name,
+            dosage_mg=float(dosage_mg) if dosage_mg is not None else 0.0,
+            patients_count=patients_count,
+            previous_patients_count=previous_patients_count if compare_to else None,
+            patients_count_delta=patients_count - previous_patients_count if compare_to else None,
+        )
+        for medication_name, dosage_mg, patients_count, previous_patients_count in medication_dosage_raw
+    ]
+
+    return MedicationDosageResponse(
+        items=medication_dosage_items,
+        start_date=start_date,
+        end_date=end_date,
+        compare_to=compare_to,
+        previous_start_date=previous_start_date,
+        previous_end_date=previous_end_date,
+    )
+
+
 @router.get("/medication-dosage", response_model=MedicationDosageResponse)
 async def get_medication_dosage(
+    response: Response,
     start_date: Optional[date] = Query(None, description="Data inicial do período (formato: YYYY-MM-DD). Se não informado, usa últimos 30 dias."),
     end_date: Optional[date] = Query(None, description="Data final do período (formato: YYYY-MM-DD). Se não informado, usa data atual."),
+    compare_to: Optional[CompareToEnum] = Query(None, description="previous_period: inclui os valores do período anterior de mesma duração e as diferenças"),
     db: Session = Depends(get_db),
     current_user: UserResponse = Depends(get_current_user),
 ):
@@ -440,48 +502,186 @@ async def get_medication_dosage(
     Comentário em pt-BR: retorna agrupamento de medicação e dosagem com quantidade de pacientes distintos que receberam aquela combinação no período especificado.
     Se não informar datas, usa últimos 30 dias por padrão.
     """
-    # Definir período padrão se não informado
-    if end_date is None:
-        end_date = date.today()
-    
-    if start_date is None:
-        start_date = end_date - timedelta(days=30)
-    
-    # Converter para datetime para comparação com session_date
-    start_datetime = datetime.combine(start_date, datetime.min.time())
-    end_datetime = datetime.combine(end_date, datetime.max.time())
-    
-    # Agrupar por medicação e dosagem, contando pacientes distintos
-    medication_dosage_raw: List[Tuple[str, Optional[Decimal], int]] = (
-        db.query(
-            Medication.name,
-            SessionModel.dosage_mg,
-            func.count(func.distinct(Cycle.patient_id))
+    start_date, end_date = _resolve_period(start_date, end_date)
+    key = build_key(
+        "/dashboard/medication-dosage",
+        {"start_date": start_date, "end_date": end_date, "compare_to": compare_to and compare_to.value},
+    )
+    return await _coalesced(
+        response,
+        key,
+        db,
+        _compute_medication_dosage,
+        start_date,
+        end_date,
+        compare_to,
+    )
+
+
+@router.get("/effectiveness", response_model=EffectivenessResponse)
+async def get_effectiveness(
+    response: Response,
+    start_date: Optional[date] = Query(None, description="Data inicial do período (formato: YYYY-MM-DD). Se não informado, usa últimos 30 dias."),
+    end_date: Optional[date] = Query(None, description="Data final do período (formato: YYYY-MM-DD). Se não informado, usa data atual."),
+    db: Session = Depends(get_db),
+    current_user: UserResponse = Depends(get_current_user),
+):
+    """
+    Comentário em pt-BR: média, mediana e p90 da perda de peso e de % de gordura entre
+    pesagens consecutivas, agrupadas pelo ativador e pela medicação/dosagem da sessão anterior
+    """
+    start_date, end_date = _resolve_period(start_date, end_date)
+    key = build_key("/dashboard/effectiveness", {"start_date": start_date, "end_date": end_date})
+    return await _coalesced(
+        response,
+        key,
+        db,
+        effectiveness.compute_effectiveness,
+        start_date,
+        end_date,
+        flight=effectiveness_flight,
+    )
+
+
+# Comentário em pt-BR: passo do generate_series e limite de baldes por granularidade
+TREND_STEPS = {
+    TrendGranularityEnum.day: ("1 day", 1),
+    TrendGranularityEnum.week: ("1 week", 7),
+    TrendGranularityEnum.month: ("1 month", 28),
+}
+MAX_TREND_BUCKETS = 400
+
+
+def _compute_trends(
+    db: Session, granularity: TrendGranularityEnum, start_date: date, end_date: date
+) -> TrendsResponse:
+    """
+    Comentário em pt-BR: monta as séries em uma única consulta. Os baldes vêm do
+    generate_series (dias sem dados aparecem zerados) e cada série é agrupada por
+    date_trunc em UTC; baldes parciais nas bordas contam só o que está no período.
+    """
+    # O campo do date_trunc vai como parâmetro (o mesmo objeto em todas as expressões)
+    field = bindparam("trend_field", granularity.value)
+    step, _ = TREND_STEPS[granularity]
+    start_at = datetime.combine(start_date, time.min, tzinfo=timezone.utc)
+    end_at = datetime.combine(end_date + timedelta(days=1), time.min, tzinfo=timezone.utc)
+
+    def bucket_of(column):
+        return func.date_trunc(field, func.timezone(literal_column("'UTC'"), column))
+
+    buckets = select(
+        func.generate_series(
+            func.date_trunc(field, cast(literal(start_date), DateTime)),
+            func.date_trunc(field, cast(literal(end_date), DateTime)),
+            cast(literal(step), Interval),
+        ).label("bucket")
+    ).cte("buckets")
+
+    session_bucket = bucket_of(SessionModel.session_date)
+    session_stats = (
+        select(
+            session_bucket.label("bucket"),
+            func.count(SessionModel.id).label("sessions_count"),
+            func.avg(BodyComposition.weight_kg).label("average_weight_kg"),
+            func.avg(BodyComposition.fat_percentage).label("average_fat_percentage"),
         )
-        .join(SessionModel, SessionModel.medication_id == Medication.id)
-        .join(Cycle, Cycle.id == SessionModel.cycle_id)
-        .filter(
-            SessionModel.session_date >= start_datetime,
-            SessionModel.session_date <= end_datetime,
-            SessionModel.dosage_mg.isnot(None)
+        .select_from(SessionModel)
+        .outerjoin(BodyComposition, BodyComposition.session_id == SessionModel.id)
+        .where(SessionModel.session_date >= start_at, SessionModel.session_date < end_at)
+        .group_by(session_bucket)
+        .cte("session_stats")
+    )
+
+    patient_bucket = bucket_of(Patient.created_at)
+    patient_stats = (
+        select(
+            patient_bucket.label("bucket"),
+            func.count(Patient.id).label("new_patients"),
         )
-        .group_by(Medication.id, Medication.name, SessionModel.dosage_mg)
-        .order_by(Medication.name, SessionModel.dosage_mg)
-        .all()
+        .where(Patient.created_at >= start_at, Patient.created_at < end_at)
+        .group_by(patient_bucket)
+        .cte("patient_stats")
     )
-    
-    medication_dosage_items = [
-        MedicationDosageItem(
-            medication_name=medication_name,
-            dosage_mg=float(dosage_mg) if dosage_mg is not None else 0.0,
-            patients_count=patients_count,
+
+    rows = db.execute(
+        select(
+            buckets.c.bucket,
+            func.coalesce(session_stats.c.sessions_count, 0),
+            func.coalesce(patient_stats.c.new_patients, 0),
+            session_stats.c.average_weight_kg,
+            session_stats.c.average_fat_percentage,
         )
-        for medication_name, dosage_mg, patients_count in medication_dosage_raw
-    ]
-    
-    return MedicationDosageResponse(
-        items=medication_dosage_items,
+        .select_from(
+            buckets.outerjoin(session_stats, session_stats.c.bucket == buckets.c.bucket)
+            .outerjoin(patient_stats, patient_stats.c.bucket == buckets.c.bucket)
+        )
+        .order_by(buckets.c.bucket)
+    ).all()
+
+    return TrendsResponse(
+        granularity=granularity,
         start_date=start_date,
         end_date=end_date,
+        items=[
+            TrendBucketItem(
+                bucket_start=bucket.date(),
+                sessions_count=sessions_count,
+                new_patients=new_patients,
+                average_weight_kg=round(float(weight), 2) if weight is not None else None,
+                average_fat_percentage=round(float(fat), 2) if fat is not None else None,
+            )
+            for bucket, sessions_count, new_patients, weight, fat in rows
+        ],
+    )
+
+
+@router.get("/trends", response_model=TrendsResponse)
+async def get_trends(
+    response: Response,
+    granularity: TrendGranularityEnum = Query(TrendGranularityEnum.week, description="Tamanho do balde: day, week ou month"),
+    start_date: Optional[date] = Query(None, description="Data inicial do período (formato: YYYY-MM-DD). Se não informado, usa últimos 30 dias."),
+    end_date: Optional[date] = Query(None, description="Data final do período (formato: YYYY-MM-DD). Se não informado, usa data atual."),
+    db: Session = Depends(get_db),
+    current_user: UserResponse = Depends(get_current_user),
+):
+    """
+    Comentário em pt-BR: retorna sessões, novos pacientes e médias de peso e % de gordura
+    por dia, semana ou mês, com os baldes sem dados preenchidos no próprio banco
+    """
+    start_date, end_date = _resolve_period(start_date, end_date)
+    _, approximate_days = TREND_STEPS[granularity]
+    if (end_date - start_date).days // approximate_days + 1 > MAX_TREND_BUCKETS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Period too long for granularity '{granularity.value}' (max {MAX_TREND_BUCKETS} buckets)",
+        )
+
+    key = build_key(
+        "/dashboard/trends",
+        {"granularity": granularity.value, "start_date": start_date, "end_date": end_date},
     )
+    return await _coalesced(
+        response,
+        key,
+        db,
+        _compute_trends,
+        granularity,
+        start_date,
+        end_date,
+    )
+
+
+@router.get("/singleflight-metrics", response_model=List[SingleFlightMetricsItem])
+async def get_singleflight_metrics(
+    current_user: UserResponse = Depends(get_current_user),
+):
+    """
+    Comentário em pt-BR: métricas de coalescência deste worker (execuções, coalescidas e cache)
+    """
+    return [
+        SingleFlightMetricsItem(route=route, **counts)
+        for route, counts in sorted(
+            {**analytics_flight.snapshot_metrics(), **effectiveness_flight.snapshot_metrics()}.items()
+        )
+    ]
 
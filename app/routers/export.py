@@ -0,0 +1,53 @@
+from fastapi import APIRouter, Depends, Query, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+from app import export
+from app.auth import get_current_user
+from app.database import get_db
+from app.jobs.parquet_snapshot import write_parquet_snapshot
+from app.schemas.export import ExportDatasetEnum, ExportFormatEnum, ParquetSnapshotResponse
+from app.schemas.user import UserResponse
+
+router = APIRouter(prefix="/export", tags=["export"])
+
+MEDIA_TYPES = {
+    ExportFormatEnum.ndjson: "application/x-ndjson",
+    ExportFormatEnum.csv: "text/csv; charset=utf-8",
+}
+
+
+@router.get("")
+def export_dataset(
+    dataset: ExportDatasetEnum = Query(
+        ExportDatasetEnum.sessions,
+        description="patients, cycles ou sessions (sessões com ciclo e composição corporal)",
+    ),
+    format: ExportFormatEnum = Query(ExportFormatEnum.ndjson, description="ndjson ou csv"),
+    db: Session = Depends(get_db),
+    current_user: UserResponse = Depends(get_current_user),
+):
+    """
+    Comentário em pt-BR: exporta o conjunto inteiro em streaming para auditoria. As linhas
+    saem do cursor do servidor em lotes, sem montar a resposta em memória; a sessão do banco
+    só é fechada depois do envio do último lote.
+    """
+    chunks = export.ndjson_chunks if format == ExportFormatEnum.ndjson else export.csv_chunks
+    return StreamingResponse(
+        chunks(db, dataset.value),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{dataset.value}.{format.value}"'},
+    )
+
+
+@router.post("/parquet-snapshot", response_model=ParquetSnapshotResponse, status_code=status.HTTP_201_CREATED)
+async def create_parquet_snapshot(
+    db: Session = Depends(get_db),
+    current_user: UserResponse = Depends(get_current_user),
+):
+    """
+    Comentário em pt-BR: grava patients, cycles, sessions, body_compositions e
+    activator_compositions em Parquet no diretório de snapshots, para análises offline
+    """
+    return await run_in_threadpool(write_parquet_snapshot, db)
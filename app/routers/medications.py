@@ -5,6 +5,7 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
+from app import dashboard_counters
 from app.auth import get_current_user
 from app.database import get_db
 from app.models.medication import Medication
@@ -109,6 +110,7 @@ async def delete_medication(
         )
 
     try:
+        dashboard_counters.drop_preferred_medication(db, medication_id)
         db.delete(medication)
         db.commit()
     except IntegrityError:
@@ -1,41 +1,79 @@
+import uuid
+from collections import Counter
 from uuid import UUID
 from typing import Optional, List
-from datetime import date
+from datetime import date, datetime, timezone
 from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func
+import numpy as np
+from sqlalchemy import Date, DateTime, Integer, and_, case, cast, extract, func, insert, or_, select
 
+from app import batch_get, bulk_delete, dashboard_counters, downsampling, session_rollups
 from app.database import get_db
-from app.models.patient import Patient
+from app.models.patient import GenderEnum, Patient, PatientStatusEnum, TreatmentLocationEnum, age_in_years
+from app.models.activator import Activator
+from app.models.activator_composition import ActivatorComposition
+from app.models.body_composition import BodyComposition
 from app.models.medication import Medication
+from app.models.patient_weight_trend import PatientWeightTrend
 from app.models.session import Session as SessionModel
 from app.schemas.patient import (
+    BodyCompositionSeriesResponse,
     BodyCompositionSummary,
+    CohortPercentileItem,
+    CohortPercentilesSummary,
+    OverduePatientItem,
+    OverduePatientsResponse,
+    PatientBatchResponse,
+    PatientBulkCreate,
+    PatientBulkItemError,
+    PatientBulkResponse,
     PatientCreate,
     PatientListItemResponse,
     PatientResponse,
     PatientSummary,
     PatientUpdate,
     PatientsListResponse,
+    SeriesDownsamplingEnum,
+    WeightTrendsRefreshResponse,
 )
-from app.schemas.cycle import CycleResponse, CycleWithSessionsResponse, CycleForPatientCreate
+from app.schemas.cycle import (
+    CycleForPatientCreate,
+    CycleResponse,
+    CycleWithSessionsCreate,
+    CycleWithSessionsResponse,
+)
+from app.schemas.bulk_delete import BulkDeleteResponse
 from app.schemas.session import SessionResponse
-from app.models.cycle import Cycle
+from app.models.cycle import Cycle, PeriodicityEnum
+from app.pagination import decode_cursor, encode_cursor
+from app.jobs import cohort_percentiles, weight_trends
 from app.auth import get_current_user
 from app.schemas.user import UserResponse
 
 router = APIRouter(prefix="/patients", tags=["patients"])
 
+# Comentário em pt-BR: passo até a próxima sessão esperada, em (meses, dias), por periodicidade
+PERIODICITY_STEPS = {
+    PeriodicityEnum.weekly: (0, 7),
+    PeriodicityEnum.biweekly: (0, 14),
+    PeriodicityEnum.monthly: (1, 0),
+}
 
-def _calculate_age(birth_date: date) -> int:
-    """
-    Comentário em pt-BR: calcula idade a partir da data de nascimento
-    """
-    today = date.today()
-    years = today.year - birth_date.year
-    if (today.month, today.day) < (birth_date.month, birth_date.day):
-        years -= 1
-    return years
+
+def _add_periodicity_step(db: Session, column, months: int, days: int):
+    # Meses e dias entram como parâmetros vinculados, nunca concatenados no SQL
+    if db.get_bind().dialect.name == "postgresql":
+        return column + func.make_interval(0, months, 0, days)
+    return func.datetime(column, f"+{months} months", f"+{days} days", type_=DateTime)
+
+
+def _days_until_today(db: Session, moment):
+    if db.get_bind().dialect.name == "postgresql":
+        return func.current_date() - cast(moment, Date)
+    return cast(func.julianday(func.date("now")) - func.julianday(func.date(moment)), Integer)
 
 
 def _validate_medication(
@@ -66,21 +104,114 @@ async def create_patient(
 
     new_patient = Patient(**patient_data.model_dump())
     db.add(new_patient)
+    dashboard_counters.apply_deltas(db, dashboard_counters.patient_deltas(new_patient))
     db.commit()
     db.refresh(new_patient)
     return PatientResponse.model_validate(new_patient)
 
 
+@router.post("/bulk", response_model=PatientBulkResponse)
+async def create_patients_bulk(
+    payload: PatientBulkCreate,
+    db: Session = Depends(get_db),
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """
+    Comentário em pt-BR: cadastro em lote para migração de clínicas. As medicações
+    preferidas são validadas numa única consulta IN e os pacientes válidos entram com um
+    único INSERT ... RETURNING (executemany) na mesma transação dos contadores.
+    """
+    medication_ids = {
+        item.preferred_medication_id
+        for item in payload.patients
+        if item.preferred_medication_id is not None
+    }
+    # Carregar as medicações também as coloca no identity map para a resposta
+    medications = (
+        {medication.id for medication in db.query(Medication).filter(Medication.id.in_(medication_ids))}
+        if medication_ids
+        else set()
+    )
+
+    rows = []
+    errors = []
+    for index, item in enumerate(payload.patients):
+        if item.preferred_medication_id is not None and item.preferred_medication_id not in medications:
+            errors.append(
+                PatientBulkItemError(index=index, field="preferred_medication_id", message="Medication not found")
+            )
+            continue
+        rows.append(item.model_dump())
+
+    created = []
+    if rows:
+        patients = db.scalars(
+            insert(Patient).returning(Patient, sort_by_parameter_order=True), rows
+        ).all()
+        deltas = Counter()
+        for patient in patients:
+            deltas.update(dashboard_counters.patient_deltas(patient))
+        dashboard_counters.apply_deltas(db, deltas)
+        # Montar a resposta antes do commit evita recarregar cada paciente expirado
+        created = [PatientResponse.model_validate(patient) for patient in patients]
+        db.commit()
+
+    return PatientBulkResponse(created=created, errors=errors)
+
+
+# Comentário em pt-BR: pacientes lidos do cursor do servidor por vez na listagem completa
+LIST_PATIENTS_BATCH_SIZE = 1000
+
+_PATIENT_LIST_COLUMNS = ("id", "name", "gender", "birth_date", "process_number", "treatment_location", "status", "created_at")
+
+
+def _stream_patients_json(db: Session):
+    """
+    Comentário em pt-BR: gera o array JSON aos pedaços, um lote do cursor por vez, com a
+    medicação preferida vinda do mesmo SELECT (LEFT JOIN) em vez de uma consulta por paciente
+    """
+    statement = (
+        select(
+            *(getattr(Patient, column) for column in _PATIENT_LIST_COLUMNS),
+            Medication.id.label("medication_id"),
+            Medication.name.label("medication_name"),
+            Medication.created_at.label("medication_created_at"),
+        )
+        .outerjoin(Medication, Medication.id == Patient.preferred_medication_id)
+        # Ordenar pela chave primária não exige ordenar a tabela inteira antes do primeiro lote
+        .order_by(Patient.id)
+        .execution_options(yield_per=LIST_PATIENTS_BATCH_SIZE)
+    )
+    result = db.execute(statement)
+    separator = "["
+    try:
+        for rows in result.partitions():
+            chunk = []
+            for row in rows:
+                payload = {column: getattr(row, column) for column in _PATIENT_LIST_COLUMNS}
+                if row.medication_id is not None:
+                    payload["preferred_medication"] = {
+                        "id": row.medication_id,
+                        "name": row.medication_name,
+                        "created_at": row.medication_created_at,
+                    }
+                chunk.append(separator + PatientResponse.model_validate(payload).model_dump_json())
+                separator = ","
+            yield "".join(chunk)
+    finally:
+        result.close()
+    yield "[]" if separator == "[" else "]"
+
+
 @router.get("", response_model=List[PatientResponse])
 async def list_patients(
     db: Session = Depends(get_db),
     current_user: UserResponse = Depends(get_current_user)
 ):
     """
-    Listar todos os pacientes
+    Listar todos os pacientes (array JSON enviado em streaming)
     """
-    patients = db.query(Patient).all()
-    return [PatientResponse.model_validate(patient) for patient in patients]
+    return StreamingResponse(_stream_patients_json(db), media_type="application/json")
 
 
 @router.get("/search", response_model=List[PatientResponse])
@@ -149,6 +280,9 @@ async def list_patients_with_metadata(
                 "current_cycle_number"
             ),
             last_session_subquery.c.last_session_date.label("last_session_date"),
+            age_in_years(Patient.birth_date, date.today()).label("age"),
+            PatientWeightTrend.slope_kg_per_week,
+            PatientWeightTrend.projected_weight_kg,
         )
         .outerjoin(
             cycle_count_subquery, cycle_count_subquery.c.patient_id == Patient.id
@@ -156,6 +290,7 @@ async def list_patients_with_metadata(
         .outerjoin(
             last_session_subquery, last_session_subquery.c.patient_id == Patient.id
         )
+        .outerjoin(PatientWeightTrend, PatientWeightTrend.patient_id == Patient.id)
     )
 
     if search:
@@ -171,17 +306,26 @@ async def list_patients_with_metadata(
     )
 
     response_items: List[PatientListItemResponse] = []
-    for patient, current_cycle_number, last_session_date in results:
+    for (
+        patient,
+        current_cycle_number,
+        last_session_date,
+        age,
+        weight_trend_kg_per_week,
+        projected_weight_kg,
+    ) in results:
         response_items.append(
             PatientListItemResponse(
                 id=patient.id,
                 name=patient.name,
                 process_number=patient.process_number,
                 gender=patient.gender,
-                age=_calculate_age(patient.birth_date),
+                age=age,
                 current_cycle_number=current_cycle_number or 0,
                 last_session_date=last_session_date,
                 created_at=patient.created_at,
+                weight_trend_kg_per_week=weight_trend_kg_per_week,
+                projected_weight_kg=projected_weight_kg,
             )
         )
 
@@ -196,6 +340,151 @@ async def list_patients_with_metadata(
     )
 
 
+@router.post("/weight-trends/refresh", response_model=WeightTrendsRefreshResponse)
+async def refresh_weight_trends(
+    db: Session = Depends(get_db),
+    current_user: UserResponse = Depends(get_current_user),
+):
+    """
+    Comentário em pt-BR: recalcula em lote a tendência de peso (kg/semana) e a projeção para
+    o fim do ciclo atual de todos os pacientes
+    """
+    result = await run_in_threadpool(weight_trends.refresh_weight_trends, db)
+    if result is None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Weight trends refresh already running",
+        )
+    patients_fitted, computed_at = result
+    return WeightTrendsRefreshResponse(patients_fitted=patients_fitted, computed_at=computed_at)
+
+
+@router.get("/overdue", response_model=OverduePatientsResponse)
+async def list_overdue_patients(
+    limit: int = Query(50, gt=0, le=200),
+    cursor: Optional[str] = Query(None, description="Cursor retornado na página anterior"),
+    db: Session = Depends(get_db),
+    current_user: UserResponse = Depends(get_current_user),
+):
+    """
+    Comentário em pt-BR: lista pacientes ativos com sessão atrasada, calculando a data esperada
+    a partir da periodicidade do ciclo mais recente em uma única consulta (paginação keyset).
+
+    ``days_overdue`` depende da data atual, então nenhum índice entrega essa ordem: cada página
+    reavalia a lista, limitada aos ciclos atuais dos pacientes ativos e às sessões desses
+    ciclos. O cursor (days_overdue, patient_id) só evita pular ou repetir itens entre páginas.
+    """
+    # Ciclo mais recente de cada paciente ativo (ix_cycles_patient_id_cycle_date)
+    ranked_cycles = (
+        db.query(
+            Cycle.id.label("cycle_id"),
+            Cycle.patient_id.label("patient_id"),
+            Cycle.periodicity.label("periodicity"),
+            Cycle.max_sessions.label("max_sessions"),
+            Cycle.cycle_date.label("cycle_date"),
+            func.row_number()
+            .over(
+                partition_by=Cycle.patient_id,
+                order_by=(Cycle.cycle_date.desc(), Cycle.created_at.desc()),
+            )
+            .label("cycle_rank"),
+        )
+        .join(Patient, Patient.id == Cycle.patient_id)
+        .filter(Patient.status == PatientStatusEnum.active)
+        .subquery()
+    )
+    current_cycles = (
+        db.query(ranked_cycles).filter(ranked_cycles.c.cycle_rank == 1).subquery()
+    )
+
+    # Sessões só dos ciclos atuais (ix_sessions_cycle_id_session_date), não de todo o histórico
+    cycle_sessions = (
+        db.query(
+            SessionModel.cycle_id.label("cycle_id"),
+            func.count(SessionModel.id).label("sessions_count"),
+            func.max(SessionModel.session_date).label("last_session_date"),
+        )
+        .join(current_cycles, current_cycles.c.cycle_id == SessionModel.cycle_id)
+        .group_by(SessionModel.cycle_id)
+        .subquery()
+    )
+
+    next_session_date = case(
+        *[
+            (
+                current_cycles.c.periodicity == periodicity,
+                _add_periodicity_step(db, cycle_sessions.c.last_session_date, months, days),
+            )
+            for periodicity, (months, days) in PERIODICITY_STEPS.items()
+        ]
+    )
+    # Sem sessões no ciclo atual, a primeira sessão é esperada na data do ciclo
+    expected_session_date = case(
+        (cycle_sessions.c.last_session_date.is_(None), current_cycles.c.cycle_date),
+        else_=next_session_date,
+    )
+    days_overdue = _days_until_today(db, expected_session_date)
+
+    overdue = (
+        db.query(
+            Patient.id.label("patient_id"),
+            Patient.name.label("name"),
+            Patient.process_number.label("process_number"),
+            Patient.treatment_location.label("treatment_location"),
+            current_cycles.c.cycle_id,
+            current_cycles.c.periodicity,
+            cycle_sessions.c.last_session_date,
+            expected_session_date.label("expected_session_date"),
+            days_overdue.label("days_overdue"),
+        )
+        .join(current_cycles, current_cycles.c.patient_id == Patient.id)
+        .outerjoin(cycle_sessions, cycle_sessions.c.cycle_id == current_cycles.c.cycle_id)
+        .filter(
+            # Ciclos completos aguardam um novo ciclo e não geram atraso
+            func.coalesce(cycle_sessions.c.sessions_count, 0) < current_cycles.c.max_sessions,
+        )
+        .subquery()
+    )
+
+    query = db.query(overdue).filter(overdue.c.days_overdue > 0)
+
+    cursor_values = decode_cursor(cursor, 2)
+    if cursor_values is not None:
+        try:
+            cursor_days, cursor_id = int(cursor_values[0]), UUID(str(cursor_values[1]))
+        except (TypeError, ValueError):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor",
+            )
+        query = query.filter(
+            or_(
+                overdue.c.days_overdue < cursor_days,
+                and_(
+                    overdue.c.days_overdue == cursor_days,
+                    overdue.c.patient_id > cursor_id,
+                ),
+            )
+        )
+
+    rows = (
+        query.order_by(overdue.c.days_overdue.desc(), overdue.c.patient_id.asc())
+        .limit(limit + 1)
+        .all()
+    )
+
+    has_next = len(rows) > limit
+    rows = rows[:limit]
+    items = [OverduePatientItem.model_validate(row._asdict()) for row in rows]
+
+    next_cursor = None
+    if has_next and items:
+        last_item = items[-1]
+        next_cursor = encode_cursor([last_item.days_overdue, str(last_item.patient_id)])
+
+    return OverduePatientsResponse(items=items, next_cursor=next_cursor, has_next=has_next)
+
+
 def _build_body_composition_summary(
     session: Optional[SessionModel],
 ) -> Optional[BodyCompositionSummary]:
@@ -218,6 +507,95 @@ def _build_body_composition_summary(
     )
 
 
+def _build_cohort_percentiles(
+    db: Session, patient: Patient, session: Optional[SessionModel]
+) -> Optional[CohortPercentilesSummary]:
+    """
+    Comentário em pt-BR: percentis da última composição corporal, consultados nas tabelas
+    pré-calculadas mantidas em memória
+    """
+    if session is None or session.body_composition is None:
+        return None
+
+    composition = session.body_composition
+    # Mesma expressão de idade usada no cálculo das tabelas
+    age = db.query(age_in_years(Patient.birth_date, date.today())).filter(Patient.id == patient.id).scalar()
+    result = cohort_percentiles.lookup_percentiles(
+        db,
+        patient.gender,
+        age,
+        {metric: getattr(composition, metric) for metric in cohort_percentiles.METRICS},
+    )
+    if result is None:
+        return None
+
+    band_start, items = result
+    return CohortPercentilesSummary(
+        age_band_start=band_start,
+        age_band_end=band_start + cohort_percentiles.AGE_BAND_YEARS - 1,
+        items=[
+            CohortPercentileItem(metric=metric, value=value, percentile=percentile, sample_size=sample_size)
+            for metric, value, percentile, sample_size in items
+        ],
+    )
+
+
+@router.delete(
+    "",
+    response_model=BulkDeleteResponse,
+    dependencies=[Depends(bulk_delete.require_enabled)],
+)
+async def delete_patients_bulk(
+    status_filter: Optional[PatientStatusEnum] = Query(None, alias="status"),
+    treatment_location: Optional[TreatmentLocationEnum] = Query(None),
+    gender: Optional[GenderEnum] = Query(None),
+    created_before: Optional[datetime] = Query(None, description="Pacientes criados antes deste instante"),
+    delete_all: bool = Query(False, alias="all", description="Necessário para remover sem nenhum filtro"),
+    dry_run: bool = Query(False, description="Apenas conta o que seria removido"),
+    db: Session = Depends(get_db),
+    current_user: UserResponse = Depends(get_current_user),
+):
+    """
+    Comentário em pt-BR: remove em massa os pacientes que atendem aos filtros, com ciclos,
+    sessões e composições corporais vinculados. Usado pela CLI administrativa.
+    """
+    criteria = []
+    if status_filter is not None:
+        criteria.append(Patient.status == status_filter)
+    if treatment_location is not None:
+        criteria.append(Patient.treatment_location == treatment_location)
+    if gender is not None:
+        criteria.append(Patient.gender == gender)
+    if created_before is not None:
+        criteria.append(Patient.created_at < created_before)
+    bulk_delete.require_scope(criteria, delete_all)
+
+    return await run_in_threadpool(bulk_delete.delete_patients, db, criteria, dry_run)
+
+
+@router.get("/batch", response_model=PatientBatchResponse)
+async def get_patients_batch(
+    ids: str = Query(..., description=f"Ids separados por vírgula (máximo {batch_get.MAX_BATCH_IDS})"),
+    db: Session = Depends(get_db),
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """
+    Comentário em pt-BR: busca vários pacientes numa única consulta IN, já com a
+    medicação preferida, em vez de uma chamada por id
+    """
+    requested = batch_get.parse_ids(ids)
+    patients = (
+        db.query(Patient)
+        .options(joinedload(Patient.preferred_medication))
+        .filter(Patient.id.in_(requested))
+        .all()
+    )
+    items, missing = batch_get.in_request_order(
+        requested, {patient.id: PatientResponse.model_validate(patient) for patient in patients}
+    )
+    return PatientBatchResponse(items=items, missing_ids=missing)
+
+
 @router.get("/{patient_id}", response_model=PatientResponse)
 async def get_patient(
     patient_id: UUID,
@@ -258,8 +636,17 @@ async def update_patient(
     preferred_medication_id = update_data.get("preferred_medication_id")
     _validate_medication(db, preferred_medication_id)
 
+    previous_location = patient.treatment_location
+    counter_deltas = dashboard_counters.patient_deltas(patient, sign=-1)
     for field, value in update_data.items():
         setattr(patient, field, value)
+    counter_deltas.update(dashboard_counters.patient_deltas(patient))
+    dashboard_counters.apply_deltas(db, counter_deltas)
+
+    # O agregado diário é separado por local de atendimento
+    if patient.treatment_location != previous_location:
+        db.flush()
+        session_rollups.refresh_days(db, session_rollups.days_for_patient(db, patient_id))
     
     db.commit()
     db.refresh(patient)
@@ -282,7 +669,16 @@ async def delete_patient(
             detail="Patient not found"
         )
     
+    counter_deltas = dashboard_counters.patient_deltas(patient, sign=-1)
+    counter_deltas.update(
+        dashboard_counters.session_activator_deltas_for_patient(db, patient_id)
+    )
+    dashboard_counters.apply_deltas(db, counter_deltas)
+    affected_days = session_rollups.days_for_patient(db, patient_id)
+
     db.delete(patient)
+    db.flush()
+    session_rollups.refresh_days(db, affected_days)
     db.commit()
     return None
 
@@ -332,11 +728,109 @@ async def get_patient_summary(
         "last_session_date": last_session.session_date if last_session else None,
         "body_composition_initial": _build_body_composition_summary(first_session),
         "body_composition_latest": _build_body_composition_summary(last_session),
+        "weight_trend": db.get(PatientWeightTrend, patient_id),
+        "cohort_percentiles": _build_cohort_percentiles(db, patient, last_session),
     }
 
     return PatientSummary.model_validate(summary_payload)
 
 
+def _load_body_composition_series(
+    db: Session,
+    patient_id: UUID,
+    start_date: Optional[date],
+    end_date: Optional[date],
+    max_points: Optional[int],
+    method: SeriesDownsamplingEnum,
+) -> BodyCompositionSeriesResponse:
+    """
+    Comentário em pt-BR: lê só as colunas do gráfico, percorrendo ciclos do paciente e
+    sessões pelos índices (patient_id, cycle_date) e (cycle_id, session_date), e reduz a
+    série em numpy quando passa de ``max_points``
+    """
+    query = (
+        db.query(
+            SessionModel.session_date,
+            extract("epoch", SessionModel.session_date),
+            BodyComposition.weight_kg,
+            BodyComposition.fat_percentage,
+        )
+        .select_from(Cycle)
+        .join(SessionModel, SessionModel.cycle_id == Cycle.id)
+        .join(BodyComposition, BodyComposition.session_id == SessionModel.id)
+        .filter(Cycle.patient_id == patient_id)
+    )
+    if start_date is not None:
+        query = query.filter(SessionModel.session_date >= datetime.combine(start_date, datetime.min.time()))
+    if end_date is not None:
+        query = query.filter(SessionModel.session_date <= datetime.combine(end_date, datetime.max.time()))
+    rows = query.order_by(SessionModel.session_date).all()
+
+    dates = [row[0] for row in rows]
+    seconds = np.asarray([row[1] for row in rows], dtype=float)
+    weights = np.asarray([row[2] for row in rows], dtype=float)
+    fat = np.asarray([row[3] for row in rows], dtype=float)
+    total_points = len(rows)
+
+    downsampled = max_points is not None and total_points > max_points
+    if downsampled and method == SeriesDownsamplingEnum.lttb:
+        # O LTTB escolhe pontos reais guiado pelo peso; as demais colunas seguem os mesmos índices
+        selected = downsampling.lttb_indices(seconds, weights, max_points)
+        dates = [dates[index] for index in selected]
+        weights, fat = weights[selected], fat[selected]
+    elif downsampled:
+        buckets = downsampling.bucket_means(seconds, {"weight_kg": weights, "fat_percentage": fat}, max_points)
+        dates = [datetime.fromtimestamp(value, tz=timezone.utc) for value in buckets["x"]]
+        weights, fat = buckets["weight_kg"], buckets["fat_percentage"]
+
+    return BodyCompositionSeriesResponse(
+        patient_id=patient_id,
+        start_date=start_date,
+        end_date=end_date,
+        total_points=total_points,
+        points=len(dates),
+        downsampling=method if downsampled else None,
+        dates=dates,
+        weight_kg=np.round(weights, 2).tolist(),
+        fat_percentage=np.round(fat, 2).tolist(),
+    )
+
+
+@router.get("/{patient_id}/body-composition", response_model=BodyCompositionSeriesResponse)
+async def get_body_composition_series(
+    patient_id: UUID,
+    start_date: Optional[date] = Query(None, description="Data inicial da série (formato: YYYY-MM-DD)"),
+    end_date: Optional[date] = Query(None, description="Data final da série (formato: YYYY-MM-DD)"),
+    max_points: Optional[int] = Query(
+        None, ge=3, le=5000, description="Número máximo de pontos; séries maiores são reduzidas"
+    ),
+    method: SeriesDownsamplingEnum = Query(
+        SeriesDownsamplingEnum.lttb,
+        description="lttb mantém pontos reais preservando picos; bucket devolve médias por intervalo",
+    ),
+    db: Session = Depends(get_db),
+    current_user: UserResponse = Depends(get_current_user),
+):
+    """
+    Comentário em pt-BR: histórico de peso e % de gordura do paciente em formato colunar
+    """
+    if start_date and end_date and start_date > end_date:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="start_date must be before end_date",
+        )
+    patient = db.query(Patient.id).filter(Patient.id == patient_id).first()
+    if not patient:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Patient not found",
+        )
+
+    return await run_in_threadpool(
+        _load_body_composition_series, db, patient_id, start_date, end_date, max_points, method
+    )
+
+
 @router.post(
     "/{patient_id}/cycles",
     response_model=CycleResponse,
@@ -366,6 +860,94 @@ async def create_cycle_for_patient(
     return CycleResponse.model_validate(new_cycle)
 
 
+def _missing_ids(db: Session, model, ids) -> bool:
+    ids = set(ids)
+    if not ids:
+        return False
+    return db.query(func.count(model.id)).filter(model.id.in_(ids)).scalar() != len(ids)
+
+
+@router.post(
+    "/{patient_id}/cycles/with-sessions",
+    response_model=CycleWithSessionsResponse,
+    status_code=status.HTTP_201_CREATED,
+)
+async def create_cycle_with_sessions(
+    patient_id: UUID,
+    cycle_data: CycleWithSessionsCreate,
+    db: Session = Depends(get_db),
+    current_user: UserResponse = Depends(get_current_user),
+):
+    """
+    Comentário em pt-BR: cria um ciclo com todas as suas sessões e composições corporais
+    numa única transação. max_sessions é validado no payload e as medicações e ativadores
+    referenciados são conferidos uma vez cada, com IN; as sessões entram em lote.
+    """
+    patient = db.query(Patient.id).filter(Patient.id == patient_id).first()
+    if not patient:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Patient not found",
+        )
+    if _missing_ids(db, Medication, (item.medication_id for item in cycle_data.sessions)):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Medication not found",
+        )
+    if _missing_ids(db, Activator, (item.activator_id for item in cycle_data.sessions if item.activator_id)):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Activator not found",
+        )
+
+    new_cycle = Cycle(patient_id=patient_id, **cycle_data.model_dump(exclude={"sessions"}))
+    db.add(new_cycle)
+    db.flush()
+
+    session_rows = []
+    body_composition_rows = []
+    for item in cycle_data.sessions:
+        session_payload = item.model_dump()
+        body_composition_payload = session_payload.pop("body_composition")
+        session_id = uuid.uuid4()
+        session_rows.append({"id": session_id, "cycle_id": new_cycle.id, **session_payload})
+        body_composition_rows.append(
+            {"patient_id": patient_id, "session_id": session_id, **body_composition_payload}
+        )
+    if session_rows:
+        db.execute(insert(SessionModel), session_rows)
+        db.execute(insert(BodyComposition), body_composition_rows)
+        dashboard_counters.apply_deltas(
+            db, dashboard_counters.activator_deltas(item.activator_id for item in cycle_data.sessions)
+        )
+        db.flush()
+        session_rollups.refresh_days(
+            db, {session_rollups.session_day(item.session_date) for item in cycle_data.sessions}
+        )
+    db.commit()
+
+    cycle = (
+        db.query(Cycle)
+        .options(
+            joinedload(Cycle.sessions).joinedload(SessionModel.body_composition),
+            joinedload(Cycle.sessions).joinedload(SessionModel.medication),
+            joinedload(Cycle.sessions)
+            .joinedload(SessionModel.activator)
+            .joinedload(Activator.compositions)
+            .joinedload(ActivatorComposition.substance),
+        )
+        .filter(Cycle.id == new_cycle.id)
+        .first()
+    )
+    return CycleWithSessionsResponse(
+        **CycleResponse.model_validate(cycle).model_dump(),
+        sessions=[
+            SessionResponse.model_validate(session)
+            for session in sorted(cycle.sessions, key=lambda session: session.session_date)
+        ],
+    )
+
+
 @router.get(
     "/{patient_id}/cycles", response_model=List[CycleWithSessionsResponse]
 )
@@ -1,8 +1,14 @@
+import csv
+import io
+from datetime import date, datetime
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import and_, or_
 from sqlalchemy.orm import Session, joinedload
-from typing import List
+from typing import Optional
 
+from app import batch_get, body_composition_quality, dashboard_counters, scale_import, session_rollups
 from app.database import get_db
 from app.models.session import Session as SessionModel
 from app.models.cycle import Cycle
@@ -10,7 +16,15 @@ from app.models.medication import Medication
 from app.models.activator import Activator
 from app.models.activator_composition import ActivatorComposition
 from app.models.body_composition import BodyComposition
-from app.schemas.session import SessionCreate, SessionUpdate, SessionResponse
+from app.pagination import decode_datetime_id_cursor, encode_cursor
+from app.schemas.session import (
+    ScaleImportResponse,
+    SessionBatchResponse,
+    SessionCreate,
+    SessionResponse,
+    SessionUpdate,
+    SessionsPageResponse,
+)
 from app.auth import get_current_user
 from app.schemas.user import UserResponse
 
@@ -86,6 +100,11 @@ async def create_session(
         **body_composition_payload,
     )
     db.add(body_composition)
+    dashboard_counters.apply_deltas(
+        db, dashboard_counters.activator_deltas([new_session.activator_id])
+    )
+    db.flush()
+    session_rollups.refresh_days(db, [session_rollups.session_day(new_session.session_date)])
 
     db.commit()
     
@@ -109,26 +128,111 @@ async def create_session(
             detail="Failed to reload session after creation"
         )
     
-    return SessionResponse.model_validate(session_with_relations)
+    return SessionResponse.model_validate(session_with_relations).model_copy(
+        update={
+            "quality_flags": body_composition_quality.check_session(db, session_with_relations)
+        }
+    )
 
 
-@router.get("/cycles/{cycle_id}/sessions", response_model=List[SessionResponse])
+@router.post("/sessions/import", response_model=ScaleImportResponse)
+async def import_scale_readings(
+    file: UploadFile = File(..., description="CSV exportado pela balança de bioimpedância"),
+    dry_run: bool = Query(False, description="Apenas valida e gera o relatório, sem gravar"),
+    db: Session = Depends(get_db),
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """
+    Comentário em pt-BR: importa leituras da balança em lote (uma sessão com composição
+    corporal por linha). Linhas inválidas voltam no relatório e não impedem as demais.
+    """
+    stream = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    try:
+        return await run_in_threadpool(scale_import.import_scale_readings, db, stream, dry_run)
+    except (scale_import.ScaleImportError, UnicodeDecodeError, csv.Error) as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(exc)
+        )
+    finally:
+        stream.detach()
+
+
+@router.get("/cycles/{cycle_id}/sessions", response_model=SessionsPageResponse)
 async def list_cycle_sessions(
     cycle_id: UUID,
+    start_date: Optional[date] = Query(None, description="Sessões a partir desta data (YYYY-MM-DD)"),
+    end_date: Optional[date] = Query(None, description="Sessões até esta data (YYYY-MM-DD)"),
+    limit: int = Query(50, gt=0, le=200),
+    cursor: Optional[str] = Query(None, description="Cursor retornado na página anterior"),
     db: Session = Depends(get_db),
     current_user: UserResponse = Depends(get_current_user)
 ):
     """
-    Listar todas as sessões de um ciclo específico
+    Listar as sessões de um ciclo em ordem cronológica, com paginação keyset em
+    (session_date, id) servida por ix_sessions_cycle_id_session_date
     """
     # Verificar se o ciclo existe
-    cycle = db.query(Cycle).filter(Cycle.id == cycle_id).first()
+    cycle = db.query(Cycle.id).filter(Cycle.id == cycle_id).first()
     if not cycle:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Cycle not found"
         )
-    
+
+    query = db.query(SessionModel).filter(SessionModel.cycle_id == cycle_id)
+    if start_date is not None:
+        query = query.filter(SessionModel.session_date >= datetime.combine(start_date, datetime.min.time()))
+    if end_date is not None:
+        query = query.filter(SessionModel.session_date <= datetime.combine(end_date, datetime.max.time()))
+
+    cursor_values = decode_datetime_id_cursor(cursor)
+    if cursor_values is not None:
+        cursor_date, cursor_id = cursor_values
+        query = query.filter(
+            or_(
+                SessionModel.session_date > cursor_date,
+                and_(SessionModel.session_date == cursor_date, SessionModel.id > cursor_id),
+            )
+        )
+
+    sessions = (
+        query.options(
+            joinedload(SessionModel.medication),
+            joinedload(SessionModel.activator)
+            .joinedload(Activator.compositions)
+            .joinedload(ActivatorComposition.substance),
+            joinedload(SessionModel.body_composition),
+        )
+        .order_by(SessionModel.session_date, SessionModel.id)
+        .limit(limit + 1)
+        .all()
+    )
+    has_next = len(sessions) > limit
+    sessions = sessions[:limit]
+
+    next_cursor = None
+    if has_next and sessions:
+        next_cursor = encode_cursor([sessions[-1].session_date.isoformat(), str(sessions[-1].id)])
+
+    return SessionsPageResponse(
+        items=[SessionResponse.model_validate(session) for session in sessions],
+        next_cursor=next_cursor,
+        has_next=has_next,
+    )
+
+
+@router.get("/sessions/batch", response_model=SessionBatchResponse)
+async def get_sessions_batch(
+    ids: str = Query(..., description=f"Ids separados por vírgula (máximo {batch_get.MAX_BATCH_IDS})"),
+    db: Session = Depends(get_db),
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """
+    Comentário em pt-BR: busca várias sessões numa única consulta IN, com o mesmo
+    carregamento antecipado de GET /sessions/{id}
+    """
+    requested = batch_get.parse_ids(ids)
     sessions = (
         db.query(SessionModel)
         .options(
@@ -138,10 +242,13 @@ async def list_cycle_sessions(
             .joinedload(ActivatorComposition.substance),
             joinedload(SessionModel.body_composition),
         )
-        .filter(SessionModel.cycle_id == cycle_id)
+        .filter(SessionModel.id.in_(requested))
         .all()
     )
-    return [SessionResponse.model_validate(session) for session in sessions]
+    items, missing = batch_get.in_request_order(
+        requested, {session.id: SessionResponse.model_validate(session) for session in sessions}
+    )
+    return SessionBatchResponse(items=items, missing_ids=missing)
 
 
 @router.get("/sessions/{session_id}", response_model=SessionResponse)
@@ -210,8 +317,12 @@ async def update_session(
     if "activator_id" in update_data and update_data["activator_id"] is not None:
         _validate_activator(db, update_data["activator_id"])
 
+    affected_days = {session_rollups.session_day(session.session_date)}
+    counter_deltas = dashboard_counters.activator_deltas([session.activator_id], sign=-1)
     for field, value in update_data.items():
         setattr(session, field, value)
+    counter_deltas.update(dashboard_counters.activator_deltas([session.activator_id]))
+    dashboard_counters.apply_deltas(db, counter_deltas)
 
     if body_composition_payload:
         if session.body_composition is None:
@@ -223,7 +334,10 @@ async def update_session(
         else:
             for field, value in body_composition_payload.items():
                 setattr(session.body_composition, field, value)
-    
+
+    db.flush()
+    affected_days.add(session_rollups.session_day(session.session_date))
+    session_rollups.refresh_days(db, affected_days)
     db.commit()
     
     # Recarregar a sessão com todos os relacionamentos necessários
@@ -246,7 +360,11 @@ async def update_session(
             detail="Failed to reload session after update"
         )
     
-    return SessionResponse.model_validate(session_with_relations)
+    return SessionResponse.model_validate(session_with_relations).model_copy(
+        update={
+            "quality_flags": body_composition_quality.check_session(db, session_with_relations)
+        }
+    )
 
 
 @router.delete("/sessions/{session_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -265,7 +383,13 @@ async def delete_session(
             detail="Session not found"
         )
     
+    dashboard_counters.apply_deltas(
+        db, dashboard_counters.activator_deltas([session.activator_id], sign=-1)
+    )
+    affected_day = session_rollups.session_day(session.session_date)
     db.delete(session)
+    db.flush()
+    session_rollups.refresh_days(db, [affected_day])
     db.commit()
     return None
 
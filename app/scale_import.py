@@ -0,0 +1,318 @@
+import csv
+import io
+import uuid
+from datetime import timezone
+from typing import Dict, Iterator, List, Optional, Set, TextIO, Tuple
+from uuid import UUID
+
+from pydantic import ValidationError
+from sqlalchemy import func, insert, text
+from sqlalchemy.orm import Session
+
+from app import dashboard_counters, session_rollups
+from app.models.activator import Activator
+from app.models.body_composition import BodyComposition
+from app.models.cycle import Cycle
+from app.models.medication import Medication
+from app.models.session import Session as SessionModel
+from app.schemas.session import ScaleImportResponse, ScaleImportRowError, ScaleReadingRow
+
+# Comentário em pt-BR: linhas validadas e carregadas por vez; as consultas de validação
+# (ciclos, medicações, ativadores) são feitas uma vez por lote com IN
+BATCH_SIZE = 5000
+MAX_REPORTED_ERRORS = 1000
+
+REQUIRED_COLUMNS = [name for name, field in ScaleReadingRow.model_fields.items() if field.is_required()]
+
+_STAGING_TABLE = "scale_import_staging"
+_STAGING_COLUMNS = (
+    "session_id",
+    "body_composition_id",
+    "patient_id",
+    "cycle_id",
+    "medication_id",
+    "activator_id",
+    "dosage_mg",
+    "session_date",
+    "notes",
+    "weight_kg",
+    "fat_percentage",
+    "fat_kg",
+    "muscle_mass_percentage",
+    "h2o_percentage",
+    "metabolic_age",
+    "visceral_fat",
+)
+_SESSION_COLUMNS = ("cycle_id", "medication_id", "activator_id", "dosage_mg", "session_date", "notes")
+_BODY_COMPOSITION_COLUMNS = (
+    "weight_kg",
+    "fat_percentage",
+    "fat_kg",
+    "muscle_mass_percentage",
+    "h2o_percentage",
+    "metabolic_age",
+    "visceral_fat",
+)
+
+
+class ScaleImportError(ValueError):
+    """O arquivo não pode ser importado (cabeçalho inválido)."""
+
+
+class _Lookups:
+    """
+    Comentário em pt-BR: ciclos, medicações e ativadores já consultados durante a importação,
+    com as vagas restantes de cada ciclo (max_sessions menos sessões existentes e importadas)
+    """
+
+    def __init__(self) -> None:
+        self.cycles: Dict[UUID, Optional[Tuple[UUID, int]]] = {}
+        self.medications: Dict[UUID, bool] = {}
+        self.activators: Dict[UUID, bool] = {}
+
+    def load(self, db: Session, rows: List[ScaleReadingRow]) -> None:
+        cycle_ids = {row.cycle_id for row in rows} - self.cycles.keys()
+        if cycle_ids:
+            used = dict(
+                db.query(SessionModel.cycle_id, func.count(SessionModel.id))
+                .filter(SessionModel.cycle_id.in_(cycle_ids))
+                .group_by(SessionModel.cycle_id)
+                .all()
+            )
+            found = db.query(Cycle.id, Cycle.patient_id, Cycle.max_sessions).filter(Cycle.id.in_(cycle_ids)).all()
+            for cycle_id, patient_id, max_sessions in found:
+                self.cycles[cycle_id] = (patient_id, max_sessions - used.get(cycle_id, 0))
+            for cycle_id in cycle_ids - {cycle_id for cycle_id, _, _ in found}:
+                self.cycles[cycle_id] = None
+
+        self._load_ids(db, Medication, {row.medication_id for row in rows}, self.medications)
+        self._load_ids(db, Activator, {row.activator_id for row in rows if row.activator_id}, self.activators)
+
+    @staticmethod
+    def _load_ids(db: Session, model, ids: Set[UUID], known: Dict[UUID, bool]) -> None:
+        missing = ids - known.keys()
+        if not missing:
+            return
+        found = {row[0] for row in db.query(model.id).filter(model.id.in_(missing)).all()}
+        for identifier in missing:
+            known[identifier] = identifier in found
+
+
+def _batches(reader: csv.DictReader, batch_size: int) -> Iterator[List[Tuple[int, dict]]]:
+    batch = []
+    for raw in reader:
+        batch.append((reader.line_num, raw))
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _parse(line: int, raw: dict, errors: List[ScaleImportRowError]) -> Optional[ScaleReadingRow]:
+    # Células vazias equivalem a campos não informados
+    values = {key.strip(): value.strip() for key, value in raw.items() if key and value and value.strip()}
+    try:
+        row = ScaleReadingRow.model_validate(values)
+    except ValidationError as exc:
+        for error in exc.errors():
+            field = ".".join(str(part) for part in error["loc"]) or None
+            errors.append(ScaleImportRowError(line=line, field=field, message=error["msg"]))
+        return None
+    if row.session_date.tzinfo is None:
+        row.session_date = row.session_date.replace(tzinfo=timezone.utc)
+    return row
+
+
+def _check_references(
+    line: int, row: ScaleReadingRow, lookups: _Lookups, errors: List[ScaleImportRowError]
+) -> Optional[UUID]:
+    """
+    Comentário em pt-BR: mesmas regras do POST /cycles/{id}/sessions. Retorna o paciente do
+    ciclo quando a linha é válida e reserva uma vaga no ciclo.
+    """
+    row_errors = []
+    cycle = lookups.cycles[row.cycle_id]
+    if cycle is None:
+        row_errors.append(("cycle_id", "Cycle not found"))
+    elif cycle[1] <= 0:
+        row_errors.append(("cycle_id", "Cycle has reached maximum number of sessions"))
+    if not lookups.medications[row.medication_id]:
+        row_errors.append(("medication_id", "Medication not found"))
+    if row.activator_id and not lookups.activators[row.activator_id]:
+        row_errors.append(("activator_id", "Activator not found"))
+
+    if row_errors:
+        errors.extend(ScaleImportRowError(line=line, field=field, message=message) for field, message in row_errors)
+        return None
+    patient_id, remaining = cycle
+    lookups.cycles[row.cycle_id] = (patient_id, remaining - 1)
+    return patient_id
+
+
+def _record(row: ScaleReadingRow, patient_id: UUID) -> dict:
+    return {
+        "session_id": uuid.uuid4(),
+        "body_composition_id": uuid.uuid4(),
+        "patient_id": patient_id,
+        **{column: getattr(row, column) for column in _SESSION_COLUMNS + _BODY_COMPOSITION_COLUMNS},
+    }
+
+
+def _create_staging(db: Session) -> None:
+    db.execute(
+        text(
+            f"""
+            CREATE TEMP TABLE {_STAGING_TABLE} (
+                session_id uuid NOT NULL,
+                body_composition_id uuid NOT NULL,
+                patient_id uuid NOT NULL,
+                cycle_id uuid NOT NULL,
+                medication_id uuid NOT NULL,
+                activator_id uuid,
+                dosage_mg numeric(10, 2),
+                session_date timestamptz NOT NULL,
+                notes text,
+                weight_kg numeric(7, 2) NOT NULL,
+                fat_percentage numeric(5, 2) NOT NULL,
+                fat_kg numeric(7, 2) NOT NULL,
+                muscle_mass_percentage numeric(5, 2) NOT NULL,
+                h2o_percentage numeric(5, 2) NOT NULL,
+                metabolic_age integer NOT NULL,
+                visceral_fat integer NOT NULL
+            ) ON COMMIT DROP
+            """
+        )
+    )
+
+
+def _copy_to_staging(db: Session, records: List[dict]) -> None:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for record in records:
+        # None vira campo vazio sem aspas, que o COPY em CSV lê como NULL
+        writer.writerow(
+            [record[column].isoformat() if column == "session_date" else record[column] for column in _STAGING_COLUMNS]
+        )
+    buffer.seek(0)
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY {_STAGING_TABLE} ({', '.join(_STAGING_COLUMNS)}) FROM STDIN WITH (FORMAT csv)", buffer
+        )
+    finally:
+        cursor.close()
+
+
+def _insert_from_staging(db: Session) -> None:
+    # Inserção em conjunto a partir da tabela temporária, sem ida e volta por linha
+    session_columns = ", ".join(_SESSION_COLUMNS)
+    composition_columns = ", ".join(_BODY_COMPOSITION_COLUMNS)
+    db.execute(
+        text(
+            f"INSERT INTO sessions (id, {session_columns}) "
+            f"SELECT session_id, {session_columns} FROM {_STAGING_TABLE}"
+        )
+    )
+    db.execute(
+        text(
+            f"INSERT INTO body_compositions (id, patient_id, session_id, {composition_columns}) "
+            f"SELECT body_composition_id, patient_id, session_id, {composition_columns} FROM {_STAGING_TABLE}"
+        )
+    )
+
+
+def _insert_rows(db: Session, records: List[dict]) -> None:
+    # Alternativa fora do Postgres: executemany com um INSERT por tabela e lote
+    db.execute(
+        insert(SessionModel.__table__),
+        [{"id": record["session_id"], **{column: record[column] for column in _SESSION_COLUMNS}} for record in records],
+    )
+    db.execute(
+        insert(BodyComposition.__table__),
+        [
+            {
+                "id": record["body_composition_id"],
+                "patient_id": record["patient_id"],
+                "session_id": record["session_id"],
+                **{column: record[column] for column in _BODY_COMPOSITION_COLUMNS},
+            }
+            for record in records
+        ],
+    )
+
+
+def import_scale_readings(
+    db: Session, stream: TextIO, dry_run: bool = False, batch_size: int = BATCH_SIZE
+) -> ScaleImportResponse:
+    """
+    Comentário em pt-BR: importa o CSV da balança em lotes numa única transação.
+
+    Linhas inválidas ficam no relatório de erros e as demais são gravadas. No Postgres os
+    lotes vão por COPY para uma tabela temporária e entram em sessions/body_compositions com
+    dois INSERT ... SELECT no final. Contadores do dashboard e agregados diários são mantidos
+    na mesma transação; com ``dry_run`` nada é gravado.
+    """
+    reader = csv.DictReader(stream)
+    header = {column.strip() for column in reader.fieldnames or []}
+    missing_columns = [column for column in REQUIRED_COLUMNS if column not in header]
+    if missing_columns:
+        raise ScaleImportError(f"Missing required columns: {', '.join(missing_columns)}")
+
+    use_copy = db.get_bind().dialect.name == "postgresql"
+    if use_copy and not dry_run:
+        _create_staging(db)
+
+    lookups = _Lookups()
+    errors: List[ScaleImportRowError] = []
+    error_count = 0
+    rejected_lines: Set[int] = set()
+    total_rows = imported = 0
+    activator_ids: List[Optional[UUID]] = []
+    days = set()
+
+    try:
+        for batch in _batches(reader, batch_size):
+            total_rows += len(batch)
+            batch_errors: List[ScaleImportRowError] = []
+            parsed = [(line, _parse(line, raw, batch_errors)) for line, raw in batch]
+            parsed = [(line, row) for line, row in parsed if row is not None]
+            lookups.load(db, [row for _, row in parsed])
+
+            records = []
+            for line, row in parsed:
+                patient_id = _check_references(line, row, lookups, batch_errors)
+                if patient_id is not None:
+                    records.append(_record(row, patient_id))
+                    activator_ids.append(row.activator_id)
+                    days.add(session_rollups.session_day(row.session_date))
+
+            rejected_lines.update(error.line for error in batch_errors)
+            error_count += len(batch_errors)
+            batch_errors.sort(key=lambda error: error.line)
+            errors.extend(batch_errors[: max(MAX_REPORTED_ERRORS - len(errors), 0)])
+            imported += len(records)
+            if records and not dry_run:
+                (_copy_to_staging if use_copy else _insert_rows)(db, records)
+
+        if dry_run:
+            db.rollback()
+        else:
+            if use_copy:
+                _insert_from_staging(db)
+            dashboard_counters.apply_deltas(db, dashboard_counters.activator_deltas(activator_ids))
+            db.flush()
+            session_rollups.refresh_days(db, days)
+            db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    return ScaleImportResponse(
+        total_rows=total_rows,
+        imported=imported,
+        rejected=len(rejected_lines),
+        dry_run=dry_run,
+        errors=errors,
+        errors_truncated=error_count > len(errors),
+    )
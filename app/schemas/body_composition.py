@@ -1,5 +1,6 @@
 from datetime import datetime
 from decimal import Decimal
+from typing import Dict, List, Optional
 from uuid import UUID
 
 from pydantic import BaseModel, ConfigDict
@@ -33,3 +34,37 @@ class BodyCompositionResponse(BodyCompositionBase):
 
     model_config = ConfigDict(from_attributes=True)
 
+
+class QualityFlag(BaseModel):
+    """
+    Comentário em pt-BR: indício de erro de digitação em uma composição corporal.
+    ``reference`` é o valor de comparação (pesagem vizinha, fat_kg esperado ou média da coorte).
+    """
+
+    code: str
+    field: str
+    value: float
+    reference: Optional[float] = None
+
+
+class BodyCompositionOutlierItem(BaseModel):
+    """
+    Comentário em pt-BR: composição corporal sinalizada pela validação
+    """
+
+    body_composition_id: UUID
+    session_id: UUID
+    patient_id: UUID
+    session_date: datetime
+    flags: List[QualityFlag]
+
+
+class BodyCompositionOutliersResponse(BaseModel):
+    """
+    Comentário em pt-BR: resultado da validação de todas as composições corporais
+    """
+
+    checked: int
+    flagged: int
+    counts_by_code: Dict[str, int]
+    items: List[BodyCompositionOutlierItem]
@@ -0,0 +1,15 @@
+from typing import Dict
+
+from pydantic import BaseModel
+
+
+class BulkDeleteResponse(BaseModel):
+    """
+    Comentário em pt-BR: resultado de uma remoção em massa. ``matched`` são os registros
+    removidos (ou que seriam removidos com dry_run) e ``related`` os dependentes apagados
+    junto por cascata (ciclos, sessões)
+    """
+
+    dry_run: bool
+    matched: int
+    related: Dict[str, int] = {}
@@ -1,10 +1,10 @@
-from pydantic import BaseModel, ConfigDict, Field, field_validator
+from pydantic import BaseModel, ConfigDict, Field, field_validator, model_validator
 from datetime import datetime
 from uuid import UUID
 from typing import Optional, List
 
 from app.models.cycle import PeriodicityEnum, CycleTypeEnum
-from app.schemas.session import SessionResponse
+from app.schemas.session import CycleSessionCreate, SessionResponse
 
 
 class CycleBase(BaseModel):
@@ -31,6 +31,20 @@ class CycleForPatientCreate(CycleBase):
     """
 
 
+class CycleWithSessionsCreate(CycleBase):
+    """
+    Comentário em pt-BR: ciclo histórico criado de uma vez com suas sessões
+    """
+
+    sessions: List[CycleSessionCreate] = Field(default_factory=list)
+
+    @model_validator(mode="after")
+    def validate_sessions_count(self) -> "CycleWithSessionsCreate":
+        if len(self.sessions) > self.max_sessions:
+            raise ValueError("o número de sessões excede max_sessions")
+        return self
+
+
 class CycleUpdate(BaseModel):
     max_sessions: Optional[int] = None
     periodicity: Optional[PeriodicityEnum] = None
@@ -60,3 +74,21 @@ class CycleResponse(BaseModel):
 class CycleWithSessionsResponse(CycleResponse):
     sessions: List[SessionResponse] = Field(default_factory=list)
 
+
+class CyclesPageResponse(BaseModel):
+    """
+    Comentário em pt-BR: página de ciclos com paginação keyset (mais recentes primeiro)
+    """
+
+    items: List[CycleResponse]
+    next_cursor: Optional[str]
+    has_next: bool
+
+
+class CycleBatchResponse(BaseModel):
+    """
+    Comentário em pt-BR: registros encontrados na ordem pedida e ids inexistentes
+    """
+
+    items: List[CycleResponse]
+    missing_ids: List[UUID]
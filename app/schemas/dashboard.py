@@ -1,5 +1,6 @@
+import enum
 from typing import List, Optional
-from datetime import date
+from datetime import date, datetime
 from pydantic import BaseModel
 from uuid import UUID
 
@@ -36,6 +37,32 @@ class TreatmentLocationDistributionItem(BaseModel):
     count: int
 
 
+class AgeBucketItem(BaseModel):
+    """
+    Comentário em pt-BR: faixa do histograma de idades (início inclusivo, fim exclusivo)
+    """
+    start_age: int
+    end_age: int
+    count: int
+
+
+class AgeDistributionResponse(BaseModel):
+    """
+    Comentário em pt-BR: estatísticas de idade e histograma calculados no banco
+    """
+    bucket_width: int
+    total_patients: int
+    average_age: Optional[float]
+    buckets: List[AgeBucketItem]
+
+
+class CompareToEnum(str, enum.Enum):
+    """
+    Comentário em pt-BR: período de comparação dos relatórios do dashboard
+    """
+    previous_period = "previous_period"
+
+
 class WeightLossRankingItem(BaseModel):
     """
     Comentário em pt-BR: item do ranking de perda de peso
@@ -47,6 +74,10 @@ class WeightLossRankingItem(BaseModel):
     initial_weight_kg: float
     final_weight_kg: float
     sessions_count: int
+    # Preenchidos apenas com compare_to (None quando o paciente não teve sessões no período anterior)
+    previous_weight_loss_kg: Optional[float] = None
+    previous_sessions_count: Optional[int] = None
+    weight_loss_delta_kg: Optional[float] = None
 
 
 class WeightLossRankingResponse(BaseModel):
@@ -56,6 +87,9 @@ class WeightLossRankingResponse(BaseModel):
     items: List[WeightLossRankingItem]
     start_date: Optional[date]
     end_date: Optional[date]
+    compare_to: Optional[CompareToEnum] = None
+    previous_start_date: Optional[date] = None
+    previous_end_date: Optional[date] = None
 
 
 class WeightGainRankingItem(BaseModel):
@@ -87,6 +121,9 @@ class MedicationDosageItem(BaseModel):
     medication_name: str
     dosage_mg: float
     patients_count: int
+    # Preenchidos apenas com compare_to
+    previous_patients_count: Optional[int] = None
+    patients_count_delta: Optional[int] = None
 
 
 class MedicationDosageResponse(BaseModel):
@@ -96,6 +133,9 @@ class MedicationDosageResponse(BaseModel):
     items: List[MedicationDosageItem]
     start_date: Optional[date]
     end_date: Optional[date]
+    compare_to: Optional[CompareToEnum] = None
+    previous_start_date: Optional[date] = None
+    previous_end_date: Optional[date] = None
 
 
 class DashboardStatsResponse(BaseModel):
@@ -110,4 +150,88 @@ class DashboardStatsResponse(BaseModel):
     medications_preference: List[MedicationPreferenceItem]
     gender_distribution: List[GenderDistributionItem]
     treatment_location_distribution: List[TreatmentLocationDistributionItem]
+    snapshot_at: Optional[datetime] = None
+    stale_after: Optional[datetime] = None
+
+
+class SingleFlightMetricsItem(BaseModel):
+    """
+    Comentário em pt-BR: métricas de coalescência de requisições por rota
+    """
+    route: str
+    executed: int
+    coalesced: int
+    cached: int
 
+
+class TrendGranularityEnum(str, enum.Enum):
+    """
+    Comentário em pt-BR: granularidade dos baldes da série temporal (campo do date_trunc)
+    """
+    day = "day"
+    week = "week"
+    month = "month"
+
+
+class TrendBucketItem(BaseModel):
+    """
+    Comentário em pt-BR: valores de um balde da série temporal (baldes vazios vêm zerados)
+    """
+    bucket_start: date
+    sessions_count: int
+    new_patients: int
+    average_weight_kg: Optional[float]
+    average_fat_percentage: Optional[float]
+
+
+class TrendsResponse(BaseModel):
+    """
+    Comentário em pt-BR: séries temporais de sessões, novos pacientes e composição corporal
+    """
+    granularity: TrendGranularityEnum
+    start_date: date
+    end_date: date
+    items: List[TrendBucketItem]
+
+
+class EffectivenessStats(BaseModel):
+    """
+    Comentário em pt-BR: média, mediana e percentil 90 de uma variação (positivo = perda)
+    """
+    mean: float
+    median: float
+    p90: float
+
+
+class ActivatorEffectivenessItem(BaseModel):
+    """
+    Comentário em pt-BR: efetividade observada após sessões com o ativador
+    """
+    activator_id: UUID
+    activator_name: str
+    observations: int
+    weight_loss_kg: EffectivenessStats
+    fat_percentage_loss: EffectivenessStats
+
+
+class MedicationEffectivenessItem(BaseModel):
+    """
+    Comentário em pt-BR: efetividade observada após sessões com a medicação e dosagem
+    """
+    medication_id: UUID
+    medication_name: str
+    dosage_mg: Optional[float]
+    observations: int
+    weight_loss_kg: EffectivenessStats
+    fat_percentage_loss: EffectivenessStats
+
+
+class EffectivenessResponse(BaseModel):
+    """
+    Comentário em pt-BR: estatísticas de efetividade por ativador e por medicação/dosagem
+    """
+    start_date: date
+    end_date: date
+    observations: int
+    activators: List[ActivatorEffectivenessItem]
+    medications: List[MedicationEffectivenessItem]
@@ -0,0 +1,26 @@
+import enum
+from datetime import datetime
+from typing import Dict
+
+from pydantic import BaseModel
+
+
+class ExportDatasetEnum(str, enum.Enum):
+    patients = "patients"
+    cycles = "cycles"
+    sessions = "sessions"
+
+
+class ExportFormatEnum(str, enum.Enum):
+    ndjson = "ndjson"
+    csv = "csv"
+
+
+class ParquetSnapshotResponse(BaseModel):
+    """
+    Comentário em pt-BR: resultado de um snapshot Parquet (diretório gerado e linhas por tabela)
+    """
+
+    directory: str
+    taken_at: datetime
+    rows: Dict[str, int]
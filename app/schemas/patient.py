@@ -1,10 +1,12 @@
+import enum
 from datetime import date, datetime
 from decimal import Decimal
 from typing import List, Optional
 from uuid import UUID
 
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field
 
+from app.models.cycle import PeriodicityEnum
 from app.models.patient import GenderEnum, PatientStatusEnum, TreatmentLocationEnum
 from app.schemas.medication import MedicationResponse
 
@@ -19,6 +21,14 @@ class PatientCreate(BaseModel):
     preferred_medication_id: Optional[UUID] = None
 
 
+# Comentário em pt-BR: limite de pacientes por requisição de cadastro em lote
+MAX_BULK_PATIENTS = 1000
+
+
+class PatientBulkCreate(BaseModel):
+    patients: List[PatientCreate] = Field(..., min_length=1, max_length=MAX_BULK_PATIENTS)
+
+
 class PatientUpdate(BaseModel):
     name: Optional[str] = None
     gender: Optional[GenderEnum] = None
@@ -42,6 +52,32 @@ class PatientResponse(BaseModel):
 
     model_config = ConfigDict(from_attributes=True)
 
+
+class PatientBatchResponse(BaseModel):
+    """
+    Comentário em pt-BR: registros encontrados na ordem pedida e ids inexistentes
+    """
+
+    items: List[PatientResponse]
+    missing_ids: List[UUID]
+
+
+class PatientBulkItemError(BaseModel):
+    index: int
+    field: Optional[str] = None
+    message: str
+
+
+class PatientBulkResponse(BaseModel):
+    """
+    Comentário em pt-BR: pacientes criados (na ordem enviada) e erros por posição;
+    itens com erro não são gravados e não impedem os demais
+    """
+
+    created: List[PatientResponse]
+    errors: List[PatientBulkItemError]
+
+
 class PatientListItemResponse(BaseModel):
     """
     Comentário em pt-BR: schema resumido para listagem de pacientes com metadados agregados
@@ -54,6 +90,8 @@ class PatientListItemResponse(BaseModel):
     current_cycle_number: int
     last_session_date: Optional[datetime]
     created_at: datetime
+    weight_trend_kg_per_week: Optional[Decimal] = None
+    projected_weight_kg: Optional[Decimal] = None
 
     model_config = ConfigDict(from_attributes=True)
 
@@ -69,6 +107,30 @@ class PatientsListResponse(BaseModel):
     has_next: bool
 
 
+class OverduePatientItem(BaseModel):
+    """
+    Comentário em pt-BR: paciente ativo com sessão atrasada conforme a periodicidade do ciclo atual
+    """
+    patient_id: UUID
+    name: str
+    process_number: Optional[str]
+    treatment_location: TreatmentLocationEnum
+    cycle_id: UUID
+    periodicity: PeriodicityEnum
+    last_session_date: Optional[datetime]
+    expected_session_date: datetime
+    days_overdue: int
+
+
+class OverduePatientsResponse(BaseModel):
+    """
+    Comentário em pt-BR: envelope paginado por cursor (keyset) da lista de pacientes atrasados
+    """
+    items: List[OverduePatientItem]
+    next_cursor: Optional[str]
+    has_next: bool
+
+
 class BodyCompositionSummary(BaseModel):
     """
     Comentário em pt-BR: resumo da composição corporal para a Ficha de Cliente
@@ -84,6 +146,72 @@ class BodyCompositionSummary(BaseModel):
     visceral_fat: int
 
 
+class WeightTrendSummary(BaseModel):
+    """
+    Comentário em pt-BR: tendência de peso ajustada em lote (negativo = perdendo peso)
+    """
+
+    slope_kg_per_week: Decimal
+    projected_weight_kg: Optional[Decimal]
+    projected_for: Optional[datetime]
+    sessions_count: int
+    computed_at: datetime
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class WeightTrendsRefreshResponse(BaseModel):
+    """
+    Comentário em pt-BR: resultado do recálculo das tendências de peso
+    """
+
+    patients_fitted: int
+    computed_at: datetime
+
+
+class CohortPercentileItem(BaseModel):
+    """
+    Comentário em pt-BR: posição de uma medida do paciente entre pares do mesmo gênero e faixa etária
+    """
+
+    metric: str
+    value: float
+    percentile: float
+    sample_size: int
+
+
+class CohortPercentilesSummary(BaseModel):
+    """
+    Comentário em pt-BR: percentis da última composição corporal na coorte do paciente
+    """
+
+    age_band_start: int
+    age_band_end: int
+    items: List[CohortPercentileItem]
+
+
+class SeriesDownsamplingEnum(str, enum.Enum):
+    lttb = "lttb"
+    bucket = "bucket"
+
+
+class BodyCompositionSeriesResponse(BaseModel):
+    """
+    Comentário em pt-BR: série de composição corporal em colunas (um array por medida,
+    alinhados pela posição) para gráficos de históricos longos
+    """
+
+    patient_id: UUID
+    start_date: Optional[date]
+    end_date: Optional[date]
+    total_points: int
+    points: int
+    downsampling: Optional[SeriesDownsamplingEnum]
+    dates: List[datetime]
+    weight_kg: List[float]
+    fat_percentage: List[float]
+
+
 class PatientSummary(BaseModel):
     """
     Comentário em pt-BR: resumo consolidado do paciente para a Ficha de Cliente
@@ -102,5 +230,7 @@ class PatientSummary(BaseModel):
     last_session_date: Optional[datetime]
     body_composition_initial: Optional[BodyCompositionSummary]
     body_composition_latest: Optional[BodyCompositionSummary]
+    weight_trend: Optional[WeightTrendSummary] = None
+    cohort_percentiles: Optional[CohortPercentilesSummary] = None
 
     model_config = ConfigDict(from_attributes=True)
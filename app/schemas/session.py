@@ -1,10 +1,14 @@
 from pydantic import BaseModel, ConfigDict
 from datetime import datetime
 from uuid import UUID
-from typing import Optional
+from typing import List, Optional
 
 from app.schemas.medication import MedicationResponse
-from app.schemas.body_composition import BodyCompositionCreate, BodyCompositionResponse
+from app.schemas.body_composition import (
+    BodyCompositionCreate,
+    BodyCompositionResponse,
+    QualityFlag,
+)
 from app.schemas.activator import ActivatorResponse
 
 
@@ -18,6 +22,19 @@ class SessionCreate(BaseModel):
     body_composition: BodyCompositionCreate
 
 
+class CycleSessionCreate(BaseModel):
+    """
+    Comentário em pt-BR: sessão criada junto com o ciclo (o ciclo ainda não tem id)
+    """
+
+    session_date: datetime
+    notes: Optional[str] = None
+    medication_id: UUID
+    activator_id: Optional[UUID] = None
+    dosage_mg: Optional[float] = None
+    body_composition: BodyCompositionCreate
+
+
 class SessionUpdate(BaseModel):
     session_date: Optional[datetime] = None
     notes: Optional[str] = None
@@ -39,6 +56,58 @@ class SessionResponse(BaseModel):
     medication: Optional[MedicationResponse] = None
     activator: Optional[ActivatorResponse] = None
     body_composition: Optional[BodyCompositionResponse] = None
+    # Comentário em pt-BR: preenchido apenas na criação/atualização (validação incremental)
+    quality_flags: List[QualityFlag] = []
 
     model_config = ConfigDict(from_attributes=True)
 
+
+class SessionsPageResponse(BaseModel):
+    """
+    Comentário em pt-BR: página de sessões do ciclo com paginação keyset (ordem cronológica)
+    """
+
+    items: List[SessionResponse]
+    next_cursor: Optional[str]
+    has_next: bool
+
+
+class SessionBatchResponse(BaseModel):
+    """
+    Comentário em pt-BR: registros encontrados na ordem pedida e ids inexistentes
+    """
+
+    items: List[SessionResponse]
+    missing_ids: List[UUID]
+
+
+class ScaleReadingRow(BodyCompositionCreate):
+    """
+    Comentário em pt-BR: uma linha do CSV exportado pela balança de bioimpedância
+    """
+
+    cycle_id: UUID
+    session_date: datetime
+    medication_id: UUID
+    activator_id: Optional[UUID] = None
+    dosage_mg: Optional[float] = None
+    notes: Optional[str] = None
+
+
+class ScaleImportRowError(BaseModel):
+    line: int
+    field: Optional[str] = None
+    message: str
+
+
+class ScaleImportResponse(BaseModel):
+    """
+    Comentário em pt-BR: resultado da importação em lote; linhas com erro não são gravadas
+    """
+
+    total_rows: int
+    imported: int
+    rejected: int
+    dry_run: bool
+    errors: List[ScaleImportRowError]
+    errors_truncated: bool = False
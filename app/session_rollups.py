@@ -0,0 +1,268 @@
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta, timezone
+from decimal import Decimal
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+from uuid import UUID
+
+from sqlalchemy import Date, cast, func, literal_column, text
+from sqlalchemy.orm import Session
+
+from app.models.cycle import Cycle
+from app.models.medication import Medication
+from app.models.patient import Patient
+from app.models.session import Session as SessionModel
+from app.models.session_daily_rollup import SessionDailyRollup
+
+
+def session_day(session_date: datetime) -> date:
+    """
+    Comentário em pt-BR: dia (UTC) ao qual a sessão pertence no agregado diário
+    """
+    if session_date.tzinfo is not None:
+        session_date = session_date.astimezone(timezone.utc)
+    return session_date.date()
+
+
+def _day_bounds(day: date) -> Tuple[datetime, datetime]:
+    start = datetime.combine(day, time.min, tzinfo=timezone.utc)
+    return start, start + timedelta(days=1)
+
+
+# Comentário em pt-BR: acima deste número de dias a reconstrução bloqueia a tabela inteira
+# em vez de um advisory lock por dia (cada lock ocupa uma vaga na tabela de locks)
+MAX_DAY_LOCKS = 32
+
+
+def _lock_days(db: Session, days: List[date]) -> None:
+    """
+    Comentário em pt-BR: serializa a reconstrução de um mesmo dia entre transações.
+
+    Sem o lock, duas escritas concorrentes no mesmo dia apagariam as linhas antigas sem ver
+    a inserção uma da outra e gravariam o dia duas vezes. Os locks são tomados em ordem de
+    dia para evitar deadlocks; a transação que espera só relê as sessões depois que a outra
+    terminou, então enxerga as duas escritas.
+    """
+    if db.get_bind().dialect.name != "postgresql":
+        return
+    if len(days) > MAX_DAY_LOCKS:
+        db.execute(text("LOCK TABLE session_daily_rollups IN SHARE ROW EXCLUSIVE MODE"))
+        return
+    for day in days:
+        db.execute(
+            text("SELECT pg_advisory_xact_lock(hashtext(:key))"),
+            {"key": f"session_daily_rollups:{day.isoformat()}"},
+        )
+
+
+def _utc_day(db: Session):
+    # Dia UTC da sessão calculado no banco, para agrupar vários dias numa única consulta
+    if db.get_bind().dialect.name == "postgresql":
+        return cast(func.timezone(literal_column("'UTC'"), SessionModel.session_date), Date)
+    return func.date(SessionModel.session_date, type_=Date)
+
+
+def refresh_days(db: Session, days: Iterable[date]) -> None:
+    """
+    Comentário em pt-BR: recalcula o agregado dos dias informados a partir das sessões.
+
+    É idempotente: apaga as linhas dos dias e grava novamente, então serve tanto para a
+    manutenção incremental (chamada na mesma transação da escrita) quanto para o backfill.
+    Todos os dias saem de uma única consulta agrupada sobre o intervalo
+    ``[primeiro dia, último dia + 1)``, servida por ix_sessions_session_date.
+    """
+    days = sorted(set(days))
+    if not days:
+        return
+    _lock_days(db, days)
+    db.query(SessionDailyRollup).filter(SessionDailyRollup.day.in_(days)).delete(
+        synchronize_session=False
+    )
+
+    range_start, _ = _day_bounds(days[0])
+    _, range_end = _day_bounds(days[-1])
+    day_column = _utc_day(db)
+    rows = (
+        db.query(
+            day_column,
+            SessionModel.medication_id,
+            SessionModel.dosage_mg,
+            SessionModel.activator_id,
+            Patient.treatment_location,
+            Cycle.patient_id,
+            func.count(SessionModel.id),
+        )
+        .join(Cycle, Cycle.id == SessionModel.cycle_id)
+        .join(Patient, Patient.id == Cycle.patient_id)
+        .filter(
+            SessionModel.session_date >= range_start,
+            SessionModel.session_date < range_end,
+            day_column.in_(days),
+        )
+        .group_by(
+            day_column,
+            SessionModel.medication_id,
+            SessionModel.dosage_mg,
+            SessionModel.activator_id,
+            Patient.treatment_location,
+            Cycle.patient_id,
+        )
+        .all()
+    )
+
+    groups: Dict[tuple, Tuple[int, Set[str]]] = {}
+    for day, medication_id, dosage_mg, activator_id, location, patient_id, count in rows:
+        key = (day, medication_id, dosage_mg, activator_id, location)
+        sessions_count, patient_ids = groups.get(key, (0, set()))
+        patient_ids.add(str(patient_id))
+        groups[key] = (sessions_count + count, patient_ids)
+
+    db.bulk_insert_mappings(
+        SessionDailyRollup,
+        [
+            {
+                "day": day,
+                "medication_id": medication_id,
+                "dosage_mg": dosage_mg,
+                "activator_id": activator_id,
+                "treatment_location": location,
+                "sessions_count": sessions_count,
+                "patient_ids": sorted(patient_ids),
+            }
+            for (day, medication_id, dosage_mg, activator_id, location), (sessions_count, patient_ids)
+            in groups.items()
+        ],
+    )
+
+
+def days_for_cycle(db: Session, cycle_id: UUID) -> Set[date]:
+    """
+    Comentário em pt-BR: dias afetados pelas sessões de um ciclo
+    """
+    return {
+        session_day(session_date)
+        for (session_date,) in db.query(SessionModel.session_date)
+        .filter(SessionModel.cycle_id == cycle_id)
+        .all()
+    }
+
+
+def days_for_patient(db: Session, patient_id: UUID) -> Set[date]:
+    """
+    Comentário em pt-BR: dias afetados pelas sessões de um paciente
+    """
+    return {
+        session_day(session_date)
+        for (session_date,) in db.query(SessionModel.session_date)
+        .join(Cycle, Cycle.id == SessionModel.cycle_id)
+        .filter(Cycle.patient_id == patient_id)
+        .all()
+    }
+
+
+def days_for_cycles(db: Session, cycle_ids) -> Set[date]:
+    """
+    Comentário em pt-BR: dias afetados pelas sessões de um conjunto de ciclos (subconsulta
+    ``select(Cycle.id)``), usado na remoção em massa
+    """
+    return {
+        session_day(session_date)
+        for (session_date,) in db.query(SessionModel.session_date)
+        .filter(SessionModel.cycle_id.in_(cycle_ids))
+        .distinct()
+        .all()
+    }
+
+
+def backfill(
+    db: Session,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    days_per_batch: int = 30,
+    on_progress: Optional[Callable[[date, int], None]] = None,
+) -> int:
+    """
+    Comentário em pt-BR: reconstrói o agregado no intervalo (padrão: todo o histórico),
+    com um commit a cada ``days_per_batch`` dias. Pode ser reexecutado sem duplicar linhas.
+    """
+    if start_date is None or end_date is None:
+        first, last = db.query(
+            func.min(SessionModel.session_date), func.max(SessionModel.session_date)
+        ).one()
+        if first is None:
+            return 0
+        start_date = start_date or session_day(first)
+        end_date = end_date or session_day(last)
+
+    processed = 0
+    day = start_date
+    while day <= end_date:
+        batch_end = min(day + timedelta(days=days_per_batch - 1), end_date)
+        refresh_days(db, (day + timedelta(days=offset) for offset in range((batch_end - day).days + 1)))
+        db.commit()
+        processed += (batch_end - day).days + 1
+        if on_progress is not None:
+            on_progress(batch_end, processed)
+        day = batch_end + timedelta(days=1)
+    return processed
+
+
+def sessions_since(db: Session, start_day: date) -> int:
+    """
+    Comentário em pt-BR: total de sessões a partir de um dia, lido do agregado
+    """
+    return int(
+        db.query(func.coalesce(func.sum(SessionDailyRollup.sessions_count), 0))
+        .filter(SessionDailyRollup.day >= start_day)
+        .scalar()
+    )
+
+
+def medication_dosage_patients(
+    db: Session, start_date: date, end_date: date, previous_start_date: Optional[date] = None
+) -> List[Tuple[str, Decimal, int, int]]:
+    """
+    Comentário em pt-BR: pacientes distintos por medicação e dosagem no período,
+    unindo os conjuntos diários do agregado.
+
+    Com ``previous_start_date`` a mesma leitura cobre também o período anterior
+    (de ``previous_start_date`` até a véspera de ``start_date``), e cada item traz
+    as contagens dos dois períodos.
+    """
+    rows = (
+        db.query(
+            SessionDailyRollup.day,
+            SessionDailyRollup.medication_id,
+            SessionDailyRollup.dosage_mg,
+            SessionDailyRollup.patient_ids,
+        )
+        .filter(
+            SessionDailyRollup.day >= (previous_start_date or start_date),
+            SessionDailyRollup.day <= end_date,
+            SessionDailyRollup.dosage_mg.isnot(None),
+        )
+        .all()
+    )
+
+    # Índice 0: período atual; índice 1: período anterior
+    patients_by_group: Dict[Tuple[UUID, Decimal], Tuple[Set[str], Set[str]]] = defaultdict(
+        lambda: (set(), set())
+    )
+    for day, medication_id, dosage_mg, patient_ids in rows:
+        period = 0 if day >= start_date else 1
+        patients_by_group[(medication_id, dosage_mg)][period].update(patient_ids)
+
+    if not patients_by_group:
+        return []
+
+    medication_ids = {medication_id for medication_id, _ in patients_by_group}
+    names = dict(
+        db.query(Medication.id, Medication.name)
+        .filter(Medication.id.in_(list(medication_ids)))
+        .all()
+    )
+    result = [
+        (names[medication_id], dosage_mg, len(current), len(previous))
+        for (medication_id, dosage_mg), (current, previous) in patients_by_group.items()
+        if medication_id in names
+    ]
+    return sorted(result, key=lambda item: (item[0], item[1]))
@@ -0,0 +1,87 @@
+import asyncio
+import time
+from collections import Counter, OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Mapping, Tuple
+from urllib.parse import urlencode
+
+# Comentário em pt-BR: resultados possíveis de uma chamada coalescida
+EXECUTED = "executed"
+COALESCED = "coalesced"
+CACHED = "cached"
+
+
+def build_key(route: str, params: Mapping[str, Any]) -> str:
+    """
+    Comentário em pt-BR: chave normalizada (rota + parâmetros ordenados, sem valores nulos)
+    """
+    normalized = sorted((name, str(value)) for name, value in params.items() if value is not None)
+    return f"{route}?{urlencode(normalized)}"
+
+
+class SingleFlight:
+    """
+    Comentário em pt-BR: coalescência de requisições idênticas e concorrentes por worker.
+
+    A primeira chamada de uma chave executa a função numa task própria; chamadas simultâneas
+    com a mesma chave aguardam o mesmo resultado. Se o cliente da primeira chamada desconectar,
+    só a espera dele é cancelada e a task segue para os demais. Opcionalmente o resultado fica
+    em cache por ``ttl_seconds`` após a conclusão, com no máximo ``max_entries`` chaves.
+    """
+
+    def __init__(self, ttl_seconds: float = 0.0, max_entries: int = 256):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        self._cache: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self.metrics: Counter = Counter()
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, str]:
+        route = key.split("?", 1)[0]
+
+        cached = self._cache.get(key)
+        if cached is not None:
+            expires_at, value = cached
+            if expires_at > time.monotonic():
+                self._cache.move_to_end(key)
+                self.metrics[(route, CACHED)] += 1
+                return value, CACHED
+            del self._cache[key]
+
+        task = self._in_flight.get(key)
+        if task is not None:
+            self.metrics[(route, COALESCED)] += 1
+            return await asyncio.shield(task), COALESCED
+
+        task = asyncio.ensure_future(fn())
+        self._in_flight[key] = task
+        task.add_done_callback(lambda done: self._finish(key, route, done))
+        # shield: cancelar quem iniciou não cancela a task que os demais aguardam
+        return await asyncio.shield(task), EXECUTED
+
+    def _finish(self, key: str, route: str, task: asyncio.Task) -> None:
+        del self._in_flight[key]
+        # Consumir a exceção evita o aviso quando ninguém mais aguardava
+        if task.cancelled() or task.exception() is not None:
+            return
+        self.metrics[(route, EXECUTED)] += 1
+        if self.ttl_seconds > 0:
+            self._store(key, task.result())
+
+    def _store(self, key: str, value: Any) -> None:
+        # Remove as entradas vencidas a cada inserção e descarta as menos usadas acima do limite
+        now = time.monotonic()
+        for expired in [name for name, (expires_at, _) in self._cache.items() if expires_at <= now]:
+            del self._cache[expired]
+        self._cache[key] = (now + self.ttl_seconds, value)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+
+    def snapshot_metrics(self) -> Dict[str, Dict[str, int]]:
+        """
+        Comentário em pt-BR: contagem de execuções, coalescências e acertos de cache por rota
+        """
+        routes: Dict[str, Dict[str, int]] = {}
+        for (route, outcome), count in self.metrics.items():
+            routes.setdefault(route, {EXECUTED: 0, COALESCED: 0, CACHED: 0})[outcome] = count
+        return routes
@@ -0,0 +1,119 @@
+"""
+Comentário em pt-BR: benchmark de memória do /export.
+
+Popula um banco Postgres de testes com N sessões (com composição corporal), consome a
+exportação inteira descartando a saída e falha se o pico de memória do processo crescer
+além do limite. Use um banco descartável: os dados gerados são removidos ao final, mas
+contadores e rollups do dashboard não são mantidos durante a carga.
+
+    DATABASE_URL=postgresql://... python -m bench.export_memory --rows 1000000
+"""
+import resource
+import sys
+import time
+
+import typer
+from sqlalchemy import text
+
+from app import export
+from app.database import SessionLocal
+
+BENCH_PREFIX = "bench-export-"
+SESSIONS_PER_PATIENT = 100
+
+app = typer.Typer(help="Mede o pico de memória da exportação em streaming")
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss vem em KiB no Linux e em bytes no macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _seed(db, rows: int) -> None:
+    patients = max(rows // SESSIONS_PER_PATIENT, 1)
+    statements = [
+        """
+        INSERT INTO medications (id, name) VALUES (gen_random_uuid(), :prefix || 'medication')
+        """,
+        """
+        INSERT INTO patients (id, name, gender, birth_date, treatment_location, status)
+        SELECT gen_random_uuid(), :prefix || n, 'female', DATE '1980-01-01' + (n % 9000),
+               'clinic', 'active'
+        FROM generate_series(1, :patients) AS n
+        """,
+        """
+        INSERT INTO cycles (id, patient_id, max_sessions, periodicity, type, cycle_date)
+        SELECT gen_random_uuid(), id, :per_patient, 'weekly', 'normal', TIMESTAMPTZ '2020-01-01'
+        FROM patients WHERE name LIKE :prefix || '%'
+        """,
+        """
+        INSERT INTO sessions (id, cycle_id, medication_id, session_date)
+        SELECT gen_random_uuid(), c.id, m.id, c.cycle_date + s * INTERVAL '7 days'
+        FROM cycles c
+        JOIN medications m ON m.name = :prefix || 'medication'
+        JOIN patients p ON p.id = c.patient_id AND p.name LIKE :prefix || '%'
+        CROSS JOIN generate_series(0, :per_patient - 1) AS s
+        """,
+        """
+        INSERT INTO body_compositions (
+            id, patient_id, session_id, weight_kg, fat_percentage, fat_kg,
+            muscle_mass_percentage, h2o_percentage, metabolic_age, visceral_fat
+        )
+        SELECT gen_random_uuid(), c.patient_id, s.id, 80 + random() * 20, 30, 27,
+               45, 50, 40, 10
+        FROM sessions s
+        JOIN cycles c ON c.id = s.cycle_id
+        JOIN patients p ON p.id = c.patient_id AND p.name LIKE :prefix || '%'
+        """,
+    ]
+    params = {"prefix": BENCH_PREFIX, "patients": patients, "per_patient": SESSIONS_PER_PATIENT}
+    for statement in statements:
+        db.execute(text(statement), params)
+    db.commit()
+
+
+def _cleanup(db) -> None:
+    db.execute(text("DELETE FROM patients WHERE name LIKE :prefix || '%'"), {"prefix": BENCH_PREFIX})
+    db.execute(text("DELETE FROM medications WHERE name = :prefix || 'medication'"), {"prefix": BENCH_PREFIX})
+    db.commit()
+
+
+@app.command()
+def run(
+    rows: int = typer.Option(1_000_000, min=1, help="Sessões geradas para a exportação"),
+    export_format: str = typer.Option("csv", "--format", help="csv ou ndjson"),
+    max_growth_mb: float = typer.Option(64.0, help="Crescimento máximo aceito do pico de memória"),
+    keep_data: bool = typer.Option(False, help="Não remove os dados gerados ao final"),
+) -> None:
+    """Gera os dados, exporta tudo e verifica o pico de memória."""
+    db = SessionLocal()
+    try:
+        typer.echo(f"Gerando {rows} sessões...")
+        _seed(db, rows)
+
+        chunks = export.csv_chunks if export_format == "csv" else export.ndjson_chunks
+        baseline_mb = _peak_rss_mb()
+        started = time.perf_counter()
+        exported_bytes = 0
+        for chunk in chunks(db, "sessions"):
+            exported_bytes += len(chunk)
+        elapsed = time.perf_counter() - started
+        growth_mb = _peak_rss_mb() - baseline_mb
+
+        typer.echo(
+            f"{exported_bytes / 1024 / 1024:.1f} MiB exportados em {elapsed:.1f}s; "
+            f"pico de memória +{growth_mb:.1f} MiB (limite {max_growth_mb:.0f} MiB)"
+        )
+        if growth_mb > max_growth_mb:
+            typer.echo("Falhou: a memória cresceu com o tamanho da exportação", err=True)
+            raise typer.Exit(code=1)
+    finally:
+        db.rollback()
+        if not keep_data:
+            _cleanup(db)
+        db.close()
+
+
+if __name__ == "__main__":
+    app()
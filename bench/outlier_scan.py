@@ -0,0 +1,109 @@
+"""
+Comentário em pt-BR: benchmark da varredura de outliers de composição corporal.
+
+Popula um banco Postgres de testes com N pesagens (uma a cada 50 com um pico de peso),
+executa a varredura completa e falha se ela passar do tempo limite. Use um banco
+descartável: os dados gerados são removidos ao final, mas contadores e rollups do
+dashboard não são mantidos durante a carga.
+
+    DATABASE_URL=postgresql://... python -m bench.outlier_scan --rows 1000000
+"""
+import time
+
+import typer
+from sqlalchemy import text
+
+from app.body_composition_quality import scan_outliers
+from app.database import SessionLocal
+
+BENCH_PREFIX = "bench-outliers-"
+SESSIONS_PER_PATIENT = 100
+
+app = typer.Typer(help="Mede o tempo da varredura completa de outliers")
+
+
+def _seed(db, rows: int) -> None:
+    patients = max(rows // SESSIONS_PER_PATIENT, 1)
+    statements = [
+        """
+        INSERT INTO medications (id, name) VALUES (gen_random_uuid(), :prefix || 'medication')
+        """,
+        """
+        INSERT INTO patients (id, name, gender, birth_date, treatment_location, status)
+        SELECT gen_random_uuid(), :prefix || n, 'female', DATE '1980-01-01' + (n % 9000),
+               'clinic', 'active'
+        FROM generate_series(1, :patients) AS n
+        """,
+        """
+        INSERT INTO cycles (id, patient_id, max_sessions, periodicity, type, cycle_date)
+        SELECT gen_random_uuid(), id, :per_patient, 'weekly', 'normal', TIMESTAMPTZ '2020-01-01'
+        FROM patients WHERE name LIKE :prefix || '%'
+        """,
+        """
+        INSERT INTO sessions (id, cycle_id, medication_id, session_date)
+        SELECT gen_random_uuid(), c.id, m.id, c.cycle_date + s * INTERVAL '7 days'
+        FROM cycles c
+        JOIN medications m ON m.name = :prefix || 'medication'
+        JOIN patients p ON p.id = c.patient_id AND p.name LIKE :prefix || '%'
+        CROSS JOIN generate_series(0, :per_patient - 1) AS s
+        """,
+        """
+        INSERT INTO body_compositions (
+            id, patient_id, session_id, weight_kg, fat_percentage, fat_kg,
+            muscle_mass_percentage, h2o_percentage, metabolic_age, visceral_fat
+        )
+        SELECT gen_random_uuid(), w.patient_id, w.session_id, w.weight_kg, 30, w.weight_kg * 0.3,
+               45, 50, 40, 10
+        FROM (
+            SELECT c.patient_id, s.id AS session_id,
+                   CASE WHEN random() < 0.02 THEN 160 ELSE 80 + random() * 2 END AS weight_kg
+            FROM sessions s
+            JOIN cycles c ON c.id = s.cycle_id
+            JOIN patients p ON p.id = c.patient_id AND p.name LIKE :prefix || '%'
+        ) AS w
+        """,
+    ]
+    params = {"prefix": BENCH_PREFIX, "patients": patients, "per_patient": SESSIONS_PER_PATIENT}
+    for statement in statements:
+        db.execute(text(statement), params)
+    db.commit()
+
+
+def _cleanup(db) -> None:
+    db.execute(text("DELETE FROM patients WHERE name LIKE :prefix || '%'"), {"prefix": BENCH_PREFIX})
+    db.execute(text("DELETE FROM medications WHERE name = :prefix || 'medication'"), {"prefix": BENCH_PREFIX})
+    db.commit()
+
+
+@app.command()
+def run(
+    rows: int = typer.Option(1_000_000, min=1, help="Pesagens geradas para a varredura"),
+    max_seconds: float = typer.Option(10.0, help="Tempo máximo aceito para a varredura"),
+    keep_data: bool = typer.Option(False, help="Não remove os dados gerados ao final"),
+) -> None:
+    """Gera as pesagens, executa a varredura completa e verifica o tempo."""
+    db = SessionLocal()
+    try:
+        typer.echo(f"Gerando {rows} pesagens...")
+        _seed(db, rows)
+
+        started = time.perf_counter()
+        result = scan_outliers(db)
+        elapsed = time.perf_counter() - started
+
+        typer.echo(
+            f"{result.checked} pesagens verificadas em {elapsed:.1f}s "
+            f"(limite {max_seconds:.0f}s); {result.flagged} sinalizadas: {result.counts_by_code}"
+        )
+        if elapsed > max_seconds:
+            typer.echo("Falhou: a varredura passou do tempo limite", err=True)
+            raise typer.Exit(code=1)
+    finally:
+        db.rollback()
+        if not keep_data:
+            _cleanup(db)
+        db.close()
+
+
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,120 @@
+"""
+Comentário em pt-BR: benchmark de tempo da importação do CSV da balança.
+
+Popula um banco Postgres de testes com pacientes e ciclos, gera um CSV com N leituras
+espalhadas por vários dias e mede ``import_scale_readings`` de ponta a ponta (validação,
+COPY, INSERT ... SELECT, contadores e reconstrução do agregado diário). Falha se passar do
+tempo limite. Use um banco descartável: os dados gerados são removidos ao final.
+
+    DATABASE_URL=postgresql://... python -m bench.scale_import --rows 100000 --days 730
+"""
+import csv
+import io
+import time
+from datetime import date, datetime, time as day_time, timedelta, timezone
+
+import typer
+from sqlalchemy import text
+
+from app import session_rollups
+from app.database import SessionLocal
+from app.scale_import import import_scale_readings
+
+BENCH_PREFIX = "bench-scale-"
+CYCLES = 100
+
+app = typer.Typer(help="Mede o tempo da importação em lote do CSV da balança")
+
+
+def _seed(db, rows: int) -> tuple:
+    medication_id = db.execute(
+        text("INSERT INTO medications (id, name) VALUES (gen_random_uuid(), :name) RETURNING id"),
+        {"name": f"{BENCH_PREFIX}medication"},
+    ).scalar_one()
+    db.execute(
+        text(
+            """
+            INSERT INTO patients (id, name, gender, birth_date, treatment_location, status)
+            SELECT gen_random_uuid(), :prefix || n, 'female', DATE '1980-01-01' + n, 'clinic', 'active'
+            FROM generate_series(1, :cycles) AS n
+            """
+        ),
+        {"prefix": BENCH_PREFIX, "cycles": CYCLES},
+    )
+    cycle_ids = db.execute(
+        text(
+            """
+            INSERT INTO cycles (id, patient_id, max_sessions, periodicity, type, cycle_date)
+            SELECT gen_random_uuid(), id, :max_sessions, 'weekly', 'normal', TIMESTAMPTZ '2020-01-01'
+            FROM patients WHERE name LIKE :prefix || '%'
+            RETURNING id
+            """
+        ),
+        {"prefix": BENCH_PREFIX, "max_sessions": rows // CYCLES + 1},
+    ).scalars().all()
+    db.commit()
+    return medication_id, cycle_ids
+
+
+def _csv(rows: int, days: int, medication_id, cycle_ids) -> io.StringIO:
+    first_day = datetime.combine(date(2022, 1, 1), day_time(9), tzinfo=timezone.utc)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(
+        [
+            "cycle_id", "medication_id", "session_date", "weight_kg", "fat_percentage", "fat_kg",
+            "muscle_mass_percentage", "h2o_percentage", "metabolic_age", "visceral_fat",
+        ]
+    )
+    for index in range(rows):
+        session_date = first_day + timedelta(days=index % days, minutes=index % 600)
+        writer.writerow(
+            [cycle_ids[index % len(cycle_ids)], medication_id, session_date.isoformat(), 80, 30, 24, 45, 50, 40, 10]
+        )
+    buffer.seek(0)
+    return buffer
+
+
+def _cleanup(db, medication_id, days: int) -> None:
+    db.execute(text("DELETE FROM patients WHERE name LIKE :prefix || '%'"), {"prefix": BENCH_PREFIX})
+    db.execute(text("DELETE FROM medications WHERE id = :id"), {"id": medication_id})
+    session_rollups.refresh_days(db, (date(2022, 1, 1) + timedelta(days=offset) for offset in range(days)))
+    db.commit()
+
+
+@app.command()
+def run(
+    rows: int = typer.Option(100_000, min=1, help="Leituras no CSV gerado"),
+    days: int = typer.Option(730, min=1, help="Dias distintos cobertos pelas leituras"),
+    max_seconds: float = typer.Option(30.0, help="Tempo máximo aceito para a importação"),
+) -> None:
+    """Gera os dados, importa o CSV e verifica o tempo total."""
+    db = SessionLocal()
+    medication_id = None
+    try:
+        medication_id, cycle_ids = _seed(db, rows)
+        stream = _csv(rows, days, medication_id, cycle_ids)
+
+        started = time.perf_counter()
+        result = import_scale_readings(db, stream)
+        elapsed = time.perf_counter() - started
+
+        typer.echo(
+            f"{result.imported} de {result.total_rows} leituras importadas em {elapsed:.1f}s "
+            f"({days} dias; limite {max_seconds:.0f}s)"
+        )
+        if result.imported != rows:
+            typer.echo(f"Falhou: {result.rejected} linhas rejeitadas", err=True)
+            raise typer.Exit(code=1)
+        if elapsed > max_seconds:
+            typer.echo("Falhou: a importação passou do tempo limite", err=True)
+            raise typer.Exit(code=1)
+    finally:
+        db.rollback()
+        if medication_id is not None:
+            _cleanup(db, medication_id, days)
+        db.close()
+
+
+if __name__ == "__main__":
+    app()
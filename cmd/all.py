@@ -1,59 +1,204 @@
 from __future__ import annotations
 
+import asyncio
+import csv
+import random
 from datetime import datetime, timezone
-import json
+from typing import Any, Awaitable, Callable, Iterable, List, Optional, TypeVar
+
 import httpx
 import typer
+from rich.progress import BarColumn, MofNCompleteColumn, Progress, TextColumn, TimeElapsedColumn
 
 DEFAULT_API_BASE = "http://127.0.0.1:8000"
 
+# Comentário em pt-BR: requisições simultâneas (e conexões mantidas abertas) por operação em lote
+MAX_CONCURRENCY = 20
+MAX_RETRIES = 3
+BACKOFF_SECONDS = 0.5
+REQUEST_TIMEOUT = 30
+# Mesmo limite de MAX_BULK_PATIENTS em app/schemas/patient.py
+PATIENTS_PER_REQUEST = 1000
+
+RETRY_STATUSES = {429, 502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "PUT", "DELETE"}
+
+T = TypeVar("T")
+
+
+class ApiClient:
+    """
+    Comentário em pt-BR: cliente HTTP compartilhado por todas as opções do menu.
+
+    Mantém as conexões abertas (keep-alive), limita as requisições simultâneas com um
+    semáforo, repete falhas transitórias com backoff exponencial e guarda o token do login
+    entre as ações.
+    """
 
-def register_user(api_base: str) -> None:
+    def __init__(self, api_base: str, max_concurrency: int = MAX_CONCURRENCY) -> None:
+        self.client = httpx.AsyncClient(
+            base_url=api_base,
+            timeout=REQUEST_TIMEOUT,
+            limits=httpx.Limits(max_connections=max_concurrency, max_keepalive_connections=max_concurrency),
+        )
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.token: Optional[str] = None
+
+    async def __aenter__(self) -> "ApiClient":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.client.aclose()
+
+    @property
+    def headers(self) -> dict:
+        return {"Authorization": f"Bearer {self.token}"} if self.token else {}
+
+    async def request(self, method: str, path: str, **kwargs: Any) -> httpx.Response:
+        """Envia a requisição com o token em cache, repetindo falhas transitórias."""
+        kwargs["headers"] = {**self.headers, **kwargs.get("headers", {})}
+        attempt = 0
+        while True:
+            try:
+                async with self.semaphore:
+                    response = await self.client.request(method, path, **kwargs)
+            except httpx.TransportError as exc:
+                # Comentário em pt-BR: POST só é repetido se a requisição nem chegou ao servidor
+                retriable = method in IDEMPOTENT_METHODS or isinstance(
+                    exc, (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+                )
+                if not retriable or attempt >= MAX_RETRIES:
+                    raise
+                delay = None
+            else:
+                delay = _retry_after(response)
+                if not _should_retry(method, response.status_code, delay) or attempt >= MAX_RETRIES:
+                    if response.status_code == 401:
+                        # Token expirado ou inválido: o próximo comando pede outro
+                        self.token = None
+                    return response
+                if delay is not None:
+                    delay = min(delay, REQUEST_TIMEOUT)
+
+            attempt += 1
+            await asyncio.sleep(delay if delay is not None else _backoff(attempt))
+
+    async def login(self, username: str, password: str) -> httpx.Response:
+        response = await self.request("POST", "/auth/login", data={"username": username, "password": password})
+        if response.status_code == 200:
+            self.token = response.json().get("access_token")
+        return response
+
+    async def ensure_token(self) -> bool:
+        """Usa o token em cache ou faz o login (ou recebe um token) uma única vez."""
+        if self.token:
+            return True
+        token = input("Informe o token JWT (Enter para fazer login): ").strip()
+        if token:
+            self.token = token
+            return True
+        username = input("Informe o username: ").strip()
+        password = input("Informe a senha: ").strip()
+        response = await self.login(username, password)
+        if response.status_code != 200:
+            typer.echo(f"Erro no login: {response.text}")
+            return False
+        return True
+
+
+def _should_retry(method: str, status_code: int, retry_after: Optional[float]) -> bool:
+    """
+    Comentário em pt-BR: 502/504 de um proxy não garantem que o servidor deixou de processar
+    a requisição; um POST repetido poderia duplicar registros. Métodos não idempotentes só
+    são repetidos em 429 e em 503 com Retry-After, quando a requisição foi recusada.
+    """
+    if method in IDEMPOTENT_METHODS:
+        return status_code in RETRY_STATUSES
+    return status_code == 429 or (status_code == 503 and retry_after is not None)
+
+
+def _backoff(attempt: int) -> float:
+    return BACKOFF_SECONDS * 2 ** (attempt - 1) + random.uniform(0, BACKOFF_SECONDS)
+
+
+def _retry_after(response: httpx.Response) -> Optional[float]:
+    try:
+        return float(response.headers["Retry-After"])
+    except (KeyError, ValueError):
+        return None
+
+
+async def run_concurrently(
+    items: List[T], worker: Callable[[T], Awaitable[bool]], description: str
+) -> int:
+    """
+    Comentário em pt-BR: executa ``worker`` para todos os itens com barra de progresso;
+    a concorrência é limitada pelo semáforo do ApiClient. Retorna quantos deram certo.
+    """
+    succeeded = 0
+    with Progress(
+        TextColumn("{task.description}"),
+        BarColumn(),
+        MofNCompleteColumn(),
+        TimeElapsedColumn(),
+    ) as progress:
+        task = progress.add_task(description, total=len(items))
+
+        async def run(item: T) -> None:
+            nonlocal succeeded
+            try:
+                if await worker(item):
+                    succeeded += 1
+            except Exception as exc:
+                # Comentário em pt-BR: uma resposta inesperada (ex.: corpo que não é JSON)
+                # conta como falha do item, sem abortar o restante do lote
+                progress.console.print(f"Falha em {item}: {exc!r}")
+            finally:
+                progress.advance(task)
+
+        await asyncio.gather(*(run(item) for item in items))
+    return succeeded
+
+
+def _chunks(items: List[T], size: int) -> Iterable[List[T]]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+async def register_user(api: ApiClient) -> None:
     """Realiza o fluxo de registro."""
     username = input("Informe o username: ").strip()
     password = input("Informe a senha: ").strip()
-    response = httpx.post(
-        f"{api_base}/auth/register",
-        json={"username": username, "password": password},
-        timeout=10,
-    )
+    response = await api.request("POST", "/auth/register", json={"username": username, "password": password})
     # Comentário em pt-BR: Não há necessidade de tratar a resposta, apenas informar o status
     typer.echo(f"Status: {response.status_code}")
     typer.echo(f"Response: {response.text}")
 
 
-def login_user(api_base: str) -> None:
-    """Executa o login e exibe o token."""
+async def login_user(api: ApiClient) -> None:
+    """Executa o login, exibe o token e o guarda para as próximas ações."""
     username = input("Informe o username: ").strip()
     password = input("Informe a senha: ").strip()
-    response = httpx.post(
-        f"{api_base}/auth/login",
-        data={"username": username, "password": password},
-        headers={"Content-Type": "application/x-www-form-urlencoded"},
-        timeout=10,
-    )
+    response = await api.login(username, password)
     typer.echo(f"Status: {response.status_code}")
     typer.echo(f"Response: {response.json()}")
     if response.status_code == 200:
-        typer.echo(f"Token: {response.json().get('access_token')}")
+        typer.echo(f"Token: {api.token}")
 
 
-def list_patients(api_base: str) -> None:
-    """Lista pacientes usando um token fornecido manualmente."""
-    token = input("Informe o token JWT: ").strip()
-    response = httpx.get(
-        f"{api_base}/patients",
-        headers={"Authorization": f"Bearer {token}"},
-        timeout=10,
-    )
+async def list_patients(api: ApiClient) -> None:
+    """Lista pacientes."""
+    if not await api.ensure_token():
+        return
+    response = await api.request("GET", "/patients")
     typer.echo(f"Status: {response.status_code}")
-    typer.echo(f"Response: {response.json()}")
     typer.echo(response.text)
 
 
-def create_cycle(api_base: str) -> None:
+async def create_cycle(api: ApiClient) -> None:
     """Cria um novo ciclo para um paciente."""
-    token = input("Informe o token JWT: ").strip()
+    if not await api.ensure_token():
+        return
     patient_id = input("Informe o ID do paciente: ").strip()
 
     try:
@@ -80,14 +225,10 @@ def create_cycle(api_base: str) -> None:
         "max_sessions": max_sessions,
         "periodicity": periodicity,
         "type": cycle_type,
+        "cycle_date": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
     }
 
-    response = httpx.post(
-        f"{api_base}/cycles",
-        json=cycle_data,
-        headers={"Authorization": f"Bearer {token}"},
-        timeout=10,
-    )
+    response = await api.request("POST", "/cycles", json=cycle_data)
     typer.echo(f"Status: {response.status_code}")
     if response.status_code == 201:
         typer.echo("Ciclo criado com sucesso!")
@@ -96,9 +237,10 @@ def create_cycle(api_base: str) -> None:
         typer.echo(f"Erro: {response.text}")
 
 
-def create_session(api_base: str) -> None:
+async def create_session(api: ApiClient) -> None:
     """Cria uma nova sessão dentro de um ciclo."""
-    token = input("Informe o token JWT: ").strip()
+    if not await api.ensure_token():
+        return
     cycle_id = input("Informe o ID do ciclo: ").strip()
     session_date = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")  # input("Informe a data e hora da sessão (YYYY-MM-DDTHH:MM:SSZ): ").strip()
     notes = input("Informe as observações (opcional, pressione Enter para pular): ").strip()
@@ -111,12 +253,7 @@ def create_session(api_base: str) -> None:
     if notes:
         session_data["notes"] = notes
 
-    response = httpx.post(
-        f"{api_base}/cycles/{cycle_id}/sessions",
-        json=session_data,
-        headers={"Authorization": f"Bearer {token}"},
-        timeout=10,
-    )
+    response = await api.request("POST", f"/cycles/{cycle_id}/sessions", json=session_data)
     typer.echo(f"Status: {response.status_code}")
     if response.status_code == 201:
         typer.echo("Sessão criada com sucesso!")
@@ -125,147 +262,141 @@ def create_session(api_base: str) -> None:
         typer.echo(f"Erro: {response.text}")
 
 
-def clear_cycles_and_sessions(api_base: str) -> None:
-    """Remove todos os ciclos e, por cascata, as sessões."""
-    token = input("Informe o token JWT: ").strip()
-    confirmation = input("Tem certeza que deseja remover todos os ciclos e sessões? (y/N): ").strip().lower()
-    if confirmation != "y":
-        typer.echo("Operação cancelada.")
+async def import_patients(api: ApiClient) -> None:
+    """Cadastra pacientes de um CSV em lotes enviados em paralelo para POST /patients/bulk."""
+    if not await api.ensure_token():
         return
-
-    headers = {"Authorization": f"Bearer {token}"}
-    response = httpx.get(f"{api_base}/cycles", headers=headers, timeout=10)
-    if response.status_code != 200:
-        typer.echo(f"Erro ao listar ciclos: {response.text}")
+    path = input("Informe o caminho do CSV (name,gender,birth_date,...): ").strip()
+    try:
+        with open(path, newline="", encoding="utf-8") as handle:
+            rows = [{key: value for key, value in row.items() if value} for row in csv.DictReader(handle)]
+    except OSError as exc:
+        typer.echo(f"Erro ao ler o arquivo: {exc}")
         return
-
-    cycles = response.json()
-    removed = 0
-    for cycle in cycles:
-        cycle_id = cycle.get("id")
-        delete_response = httpx.delete(f"{api_base}/cycles/{cycle_id}", headers=headers, timeout=10)
-        if delete_response.status_code == 204:
-            removed += 1
-        else:
-            typer.echo(f"Falha ao remover ciclo {cycle_id}: {delete_response.text}")
-
-    typer.echo(f"Ciclos removidos: {removed}. Sessões vinculadas foram removidas automaticamente.")
-
-
-def clear_users(api_base: str) -> None:
-    """Remove todos os usuários via API."""
-    token = input("Informe o token JWT: ").strip()
-    confirmation = input(
-        "Tem certeza que deseja remover TODOS os usuários? (y/N): "
-    ).strip().lower()
-    if confirmation != "y":
-        typer.echo("Operação cancelada.")
+    if not rows:
+        typer.echo("Nenhum paciente encontrado no arquivo.")
         return
 
-    headers = {"Authorization": f"Bearer {token}"}
-    response = httpx.get(f"{api_base}/auth/users", headers=headers, timeout=10)
-    if response.status_code != 200:
-        typer.echo(f"Erro ao listar usuários: {response.text}")
-        return
+    errors = 0
 
-    users = response.json()
-    if not users:
-        typer.echo("Nenhum usuário encontrado para remoção.")
+    async def send(batch: List[dict]) -> bool:
+        nonlocal errors
+        response = await api.request("POST", "/patients/bulk", json={"patients": batch})
+        if response.status_code != 200:
+            errors += len(batch)
+            return False
+        errors += len(response.json()["errors"])
+        return True
+
+    await run_concurrently(list(_chunks(rows, PATIENTS_PER_REQUEST)), send, "Cadastrando pacientes")
+    typer.echo(f"Pacientes cadastrados: {len(rows) - errors}. Com erro: {errors}.")
+
+
+async def delete_patients_from_file(api: ApiClient) -> None:
+    """Remove os pacientes listados num arquivo (um ID por linha), em paralelo."""
+    if not await api.ensure_token():
+        return
+    path = input("Informe o caminho do arquivo de IDs: ").strip()
+    try:
+        with open(path, encoding="utf-8") as handle:
+            patient_ids = [line.strip() for line in handle if line.strip()]
+    except OSError as exc:
+        typer.echo(f"Erro ao ler o arquivo: {exc}")
         return
 
-    removed = 0
-    for user in users:
-        user_id = user.get("id")
-        delete_response = httpx.delete(
-            f"{api_base}/auth/users/{user_id}", headers=headers, timeout=10
-        )
-        if delete_response.status_code == 204:
-            removed += 1
-        else:
-            typer.echo(f"Falha ao remover usuário {user_id}: {delete_response.text}")
+    async def delete(patient_id: str) -> bool:
+        response = await api.request("DELETE", f"/patients/{patient_id}")
+        return response.status_code in (204, 404)
 
-    typer.echo(f"Usuários removidos: {removed}.")
+    removed = await run_concurrently(patient_ids, delete, "Removendo pacientes")
+    typer.echo(f"Pacientes removidos: {removed} de {len(patient_ids)}.")
 
 
-def clear_patients(api_base: str) -> None:
-    """Remove todos os pacientes e registros relacionados via API."""
-    token = input("Informe o token JWT: ").strip()
-    confirmation = input(
-        "Tem certeza que deseja remover TODOS os pacientes e dados relacionados? (y/N): "
-    ).strip().lower()
+async def bulk_delete(api: ApiClient, path: str, description: str) -> None:
+    """Remove em massa via endpoint de DELETE com filtros, mostrando antes a contagem."""
+    if not await api.ensure_token():
+        return
+    # Comentário em pt-BR: sem filtros os endpoints exigem all=true; o dry_run só conta
+    params = {"all": "true"}
+
+    preview = await api.request("DELETE", path, params={**params, "dry_run": "true"})
+    if preview.status_code != 200:
+        typer.echo(f"Erro ao contar {description}: {preview.text}")
+        return
+
+    counts = preview.json()
+    if counts["matched"] == 0:
+        typer.echo(f"Nenhum registro de {description} encontrado para remoção.")
+        return
+
+    related = ", ".join(f"{count} {name}" for name, count in counts["related"].items())
+    summary = f"{counts['matched']} {description}" + (f" ({related})" if related else "")
+    confirmation = input(f"Serão removidos {summary}. Confirma? (y/N): ").strip().lower()
     if confirmation != "y":
         typer.echo("Operação cancelada.")
         return
 
-    headers = {"Authorization": f"Bearer {token}"}
-    response = httpx.get(f"{api_base}/patients", headers=headers, timeout=10)
+    response = await api.request("DELETE", path, params=params)
     if response.status_code != 200:
-        typer.echo(f"Erro ao listar pacientes: {response.text}")
+        typer.echo(f"Erro ao remover {description}: {response.text}")
         return
+    typer.echo(f"Removidos: {response.json()['matched']} {description}.")
 
-    patients = response.json()
-    if not patients:
-        typer.echo("Nenhum paciente encontrado para remoção.")
-        return
 
-    removed = 0
-    for patient in patients:
-        patient_id = patient.get("id")
-        delete_response = httpx.delete(
-            f"{api_base}/patients/{patient_id}", headers=headers, timeout=10
-        )
-        if delete_response.status_code == 204:
-            removed += 1
-        else:
-            typer.echo(f"Falha ao remover paciente {patient_id}: {delete_response.text}")
+async def clear_cycles_and_sessions(api: ApiClient) -> None:
+    """Remove todos os ciclos e, por cascata, as sessões."""
+    await bulk_delete(api, "/cycles", "ciclos")
+
 
-    typer.echo(
-        f"Pacientes removidos: {removed}. Ciclos, sessões e composições vinculadas foram removidos automaticamente.",
-    )
+async def clear_users(api: ApiClient) -> None:
+    """Remove todos os usuários via API (exceto o usuário autenticado)."""
+    await bulk_delete(api, "/auth/users", "usuários")
+
+
+async def clear_patients(api: ApiClient) -> None:
+    """Remove todos os pacientes e registros relacionados via API."""
+    await bulk_delete(api, "/patients", "pacientes")
+
+
+ACTIONS = {
+    "1": ("Criar usuário", register_user),
+    "2": ("Logar e obter token", login_user),
+    "3": ("Listar pacientes", list_patients),
+    "4": ("Criar novo ciclo para um paciente", create_cycle),
+    "5": ("Criar nova sessão em um ciclo", create_session),
+    "6": ("Limpar ciclos e sessões", clear_cycles_and_sessions),
+    "7": ("Limpar usuários", clear_users),
+    "8": ("Limpar pacientes", clear_patients),
+    "9": ("Cadastrar pacientes a partir de CSV", import_patients),
+    "10": ("Remover pacientes a partir de arquivo de IDs", delete_patients_from_file),
+}
+
+
+async def run_menu(api_base: str) -> None:
+    """Menu simples para acessar os endpoints principais com um único cliente HTTP."""
+    async with ApiClient(api_base) as api:
+        while True:
+            options = "\n".join(f"{key} - {label}" for key, (label, _) in ACTIONS.items())
+            print(f"\nSelecione uma opção:\n{options}\n0 - Sair")
+            choice = input("Opção: ").strip()
+
+            if choice == "0":
+                typer.echo("Saindo...")
+                break
+            action = ACTIONS.get(choice)
+            if action is None:
+                typer.echo("Opção inválida.")
+                continue
+            try:
+                await action[1](api)
+            except httpx.HTTPError as exc:
+                typer.echo(f"Erro de comunicação com a API: {exc!r}")
 
 
 def main() -> None:
-    """Menu simples para acessar os endpoints principais."""
     api_base = input(f"Informe a API base [{DEFAULT_API_BASE}]: ").strip() or DEFAULT_API_BASE
-
-    while True:
-        print(
-            "\nSelecione uma opção:\n"
-            "1 - Criar usuário\n"
-            "2 - Logar e obter token\n"
-            "3 - Listar pacientes\n"
-            "4 - Criar novo ciclo para um paciente\n"
-            "5 - Criar nova sessão em um ciclo\n"
-            "6 - Limpar ciclos e sessões\n"
-            "7 - Limpar usuários\n"
-            "8 - Limpar pacientes\n"
-            "0 - Sair"
-        )
-        choice = input("Opção: ").strip()
-
-        if choice == "1":
-            register_user(api_base)
-        elif choice == "2":
-            login_user(api_base)
-        elif choice == "3":
-            list_patients(api_base)
-        elif choice == "4":
-            create_cycle(api_base)
-        elif choice == "5":
-            create_session(api_base)
-        elif choice == "6":
-            clear_cycles_and_sessions(api_base)
-        elif choice == "7":
-            clear_users(api_base)
-        elif choice == "8":
-            clear_patients(api_base)
-        elif choice == "0":
-            typer.echo("Saindo...")
-            break
-        else:
-            typer.echo("Opção inválida.")
+    asyncio.run(run_menu(api_base))
 
 
 if __name__ == "__main__":
     main()
-
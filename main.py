@@ -1,3 +1,5 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -10,9 +12,21 @@ from app.routers import (
     activators,
     medications,
     dashboard,
+    body_compositions,
+    export,
 )
+from app.jobs.scheduler import start_scheduler, stop_scheduler
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Rotinas em background (snapshot do dashboard)
+    tasks = start_scheduler()
+    yield
+    await stop_scheduler(tasks)
+
 
-app = FastAPI(title="PPE - Pilares da Saúde API")
+app = FastAPI(title="PPE - Pilares da Saúde API", lifespan=lifespan)
 
 # Configuração CORS
 app.add_middleware(
@@ -32,6 +46,8 @@ app.include_router(substances.router)
 app.include_router(activators.router)
 app.include_router(medications.router)
 app.include_router(dashboard.router)
+app.include_router(body_compositions.router)
+app.include_router(export.router)
 
 
 @app.get("/")
@@ -1,5 +1,12 @@
+import os
 import uuid
 
+# Desativa as rotinas em background durante os testes
+os.environ.setdefault("DASHBOARD_SNAPSHOT_REFRESH_MINUTES", "0")
+os.environ.setdefault("WEIGHT_TRENDS_REFRESH_MINUTES", "0")
+os.environ.setdefault("COHORT_PERCENTILES_REFRESH_MINUTES", "0")
+os.environ.setdefault("DASHBOARD_EFFECTIVENESS_CACHE_SECONDS", "0")
+
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
@@ -31,6 +38,35 @@ def db_session():
         Base.metadata.drop_all(bind=engine)
 
 
+@pytest.fixture
+def bulk_delete_enabled(monkeypatch):
+    """
+    Comentário em pt-BR: liga os endpoints de remoção em massa apenas no teste que pedir
+    """
+    from app import bulk_delete
+
+    monkeypatch.setattr(bulk_delete, "ENABLED", True)
+
+
+# Comentário em pt-BR: rotinas com SQL específico do Postgres só rodam com este banco configurado
+POSTGRES_TEST_URL = os.getenv("TEST_POSTGRES_URL")
+
+
+@pytest.fixture
+def pg_session():
+    if not POSTGRES_TEST_URL:
+        pytest.skip("TEST_POSTGRES_URL não configurada")
+    pg_engine = create_engine(POSTGRES_TEST_URL)
+    Base.metadata.create_all(bind=pg_engine)
+    session = sessionmaker(autocommit=False, autoflush=False, bind=pg_engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(bind=pg_engine)
+        pg_engine.dispose()
+
+
 @pytest.fixture
 def client(db_session):
     def override_get_db():
@@ -22,3 +22,37 @@ def test_register_and_login_returns_token(client, unique_username):
     assert token_data["access_token"]
 
 
+def test_bulk_delete_users_keeps_current_user(client, unique_username, bulk_delete_enabled):
+    password = "Test1234!"
+    for username in (unique_username, f"other_{unique_username}"):
+        assert client.post("/auth/register", json={"username": username, "password": password}).status_code == 201
+    login = client.post("/auth/login", data={"username": unique_username, "password": password})
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+    assert client.delete("/auth/users", headers=headers).status_code == 400
+    preview = client.delete("/auth/users", params={"all": True, "dry_run": True}, headers=headers)
+    assert preview.json() == {"dry_run": True, "matched": 1, "related": {}}
+
+    removed = client.delete("/auth/users", params={"all": True}, headers=headers)
+    assert removed.json()["matched"] == 1
+    users = client.get("/auth/users", headers=headers).json()
+    assert [user["username"] for user in users] == [unique_username]
+
+
+def test_bulk_delete_is_forbidden_unless_enabled(client, unique_username, monkeypatch):
+    import importlib
+
+    from app import bulk_delete
+
+    monkeypatch.delenv("ENABLE_BULK_DELETE", raising=False)
+    importlib.reload(bulk_delete)
+    assert bulk_delete.ENABLED is False
+
+    password = "Test1234!"
+    assert client.post("/auth/register", json={"username": unique_username, "password": password}).status_code == 201
+    login = client.post("/auth/login", data={"username": unique_username, "password": password})
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+    for path in ("/auth/users", "/patients", "/cycles"):
+        response = client.delete(path, params={"all": True, "dry_run": True}, headers=headers)
+        assert response.status_code == 403
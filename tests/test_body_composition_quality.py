@@ -0,0 +1,146 @@
+import uuid
+
+
+def build_body_composition_payload(weight_kg: float, fat_percentage: float = 30.0) -> dict:
+    return {
+        "weight_kg": weight_kg,
+        "fat_percentage": fat_percentage,
+        "fat_kg": round(weight_kg * fat_percentage / 100, 2),
+        "muscle_mass_percentage": 45.0,
+        "h2o_percentage": 50.2,
+        "metabolic_age": 38,
+        "visceral_fat": 12,
+    }
+
+
+def authenticate_client(client, unique_username):
+    user_payload = {
+        "username": unique_username,
+        "password": "Test1234!",
+    }
+    register_response = client.post("/auth/register", json=user_payload)
+    assert register_response.status_code == 201
+
+    login_response = client.post(
+        "/auth/login",
+        data={
+            "username": user_payload["username"],
+            "password": user_payload["password"],
+        },
+    )
+    token = login_response.json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def create_cycle_with_medication(client, headers):
+    medication_response = client.post(
+        "/medications", json={"name": f"Med Qualidade {uuid.uuid4().hex[:6]}"}, headers=headers
+    )
+    assert medication_response.status_code == 201
+    patient_response = client.post(
+        "/patients",
+        json={
+            "name": "Paciente Qualidade",
+            "gender": "female",
+            "birth_date": "1990-03-15",
+            "treatment_location": "clinic",
+            "status": "active",
+        },
+        headers=headers,
+    )
+    assert patient_response.status_code == 201
+    cycle_response = client.post(
+        f"/patients/{patient_response.json()['id']}/cycles",
+        json={"max_sessions": 8, "periodicity": "weekly", "type": "normal", "cycle_date": "2024-01-10T09:00:00Z"},
+        headers=headers,
+    )
+    assert cycle_response.status_code == 201
+    return cycle_response.json(), medication_response.json()
+
+
+def post_session(client, headers, cycle, medication, session_date, body_composition):
+    response = client.post(
+        f"/cycles/{cycle['id']}/sessions",
+        json={
+            "cycle_id": cycle["id"],
+            "session_date": session_date,
+            "medication_id": medication["id"],
+            "body_composition": body_composition,
+        },
+        headers=headers,
+    )
+    assert response.status_code == 201
+    return response.json()
+
+
+def test_session_writes_report_quality_flags(client, unique_username):
+    headers = authenticate_client(client, unique_username)
+    cycle, medication = create_cycle_with_medication(client, headers)
+
+    first = post_session(client, headers, cycle, medication, "2024-01-10T09:00:00Z", build_body_composition_payload(80.0))
+    assert first["quality_flags"] == []
+    post_session(client, headers, cycle, medication, "2024-01-17T09:00:00Z", build_body_composition_payload(81.0))
+
+    # Peso digitado com a vírgula no lugar errado
+    typo = post_session(client, headers, cycle, medication, "2024-01-24T09:00:00Z", build_body_composition_payload(8.1))
+    assert [(flag["code"], flag["value"], flag["reference"]) for flag in typo["quality_flags"]] == [
+        ("weight_jump", 8.1, 81.0)
+    ]
+
+    # A pesagem seguinte volta ao patamar anterior e não é sinalizada
+    recovered = post_session(client, headers, cycle, medication, "2024-01-31T09:00:00Z", build_body_composition_payload(80.5))
+    assert recovered["quality_flags"] == []
+
+    inconsistent = build_body_composition_payload(80.0)
+    inconsistent["fat_kg"] = 40.0
+    update_response = client.put(
+        f"/sessions/{first['id']}", json={"body_composition": inconsistent}, headers=headers
+    )
+    assert update_response.status_code == 200
+    assert [flag["code"] for flag in update_response.json()["quality_flags"]] == ["fat_kg_inconsistent"]
+    assert update_response.json()["quality_flags"][0]["reference"] == 24.0
+
+
+def test_outliers_scan_flags_the_whole_cohort(client, unique_username):
+    headers = authenticate_client(client, unique_username)
+    cycle, medication = create_cycle_with_medication(client, headers)
+    for day, weight in [(10, 80.0), (17, 81.0), (24, 810.0), (31, 80.5)]:
+        post_session(
+            client, headers, cycle, medication, f"2024-01-{day}T09:00:00Z", build_body_composition_payload(weight)
+        )
+
+    response = client.get("/body-compositions/outliers", headers=headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["checked"] == 4
+    assert data["flagged"] == 1
+    assert data["counts_by_code"] == {"weight_jump": 1}
+    [item] = data["items"]
+    assert item["session_date"].startswith("2024-01-24")
+    assert item["flags"][0]["value"] == 810.0
+
+    filtered = client.get(
+        "/body-compositions/outliers", params={"code": "fat_kg_inconsistent"}, headers=headers
+    ).json()
+    assert filtered["flagged"] == 0 and filtered["items"] == []
+
+
+def test_outliers_scan_in_batches_keeps_patients_apart(client, db_session, unique_username):
+    from app.body_composition_quality import scan_outliers
+
+    headers = authenticate_client(client, unique_username)
+    light_cycle, medication = create_cycle_with_medication(client, headers)
+    heavy_cycle, _ = create_cycle_with_medication(client, headers)
+    for cycle, weights in [(light_cycle, [60.0, 61.0, 60.5]), (heavy_cycle, [120.0, 119.0, 240.0])]:
+        for day, weight in zip((10, 17, 24), weights):
+            post_session(
+                client, headers, cycle, medication, f"2024-01-{day}T09:00:00Z", build_body_composition_payload(weight)
+            )
+
+    # Lotes de 2 linhas: a fronteira entre pacientes e entre lotes não gera saltos falsos
+    result = scan_outliers(db_session, batch_size=2)
+    assert (result.checked, result.flagged) == (6, 1)
+    [item] = result.items
+    assert str(item.patient_id) == heavy_cycle["patient_id"]
+    assert item.flags[0].value == 240.0
+    assert item.session_date.day == 24
@@ -115,7 +115,7 @@ def test_cycle_and_session_flow(client, unique_username):
     # 4. Listar as sessões de um ciclo de um paciente
     list_sessions_response = client.get(f"/cycles/{cycle_id}/sessions", headers=headers)
     assert list_sessions_response.status_code == 200
-    cycle_sessions = list_sessions_response.json()
+    cycle_sessions = list_sessions_response.json()["items"]
     assert len(cycle_sessions) == 1
     assert cycle_sessions[0]["id"] == session_id
     assert cycle_sessions[0]["cycle_id"] == cycle_id
@@ -151,7 +151,7 @@ def test_cycle_and_session_flow(client, unique_username):
     # Verificar que agora temos 8 sessões
     list_sessions_response = client.get(f"/cycles/{cycle_id}/sessions", headers=headers)
     assert list_sessions_response.status_code == 200
-    cycle_sessions = list_sessions_response.json()
+    cycle_sessions = list_sessions_response.json()["items"]
     assert len(cycle_sessions) == 8
     for entry in cycle_sessions:
         assert "body_composition" in entry
@@ -170,3 +170,286 @@ def test_cycle_and_session_flow(client, unique_username):
     assert updated_session["notes"] == "Sessão atualizada"
     assert float(updated_session["body_composition"]["weight_kg"]) == 100.0
     assert float(updated_session["body_composition"]["fat_percentage"]) == 37.2
+
+
+def test_scale_readings_bulk_import(client, unique_username):
+    headers = authenticate_client(client, unique_username)
+    medication = create_medication(client, headers)
+    patient_response = client.post(
+        "/patients",
+        json={
+            "name": "Paciente Balança",
+            "gender": "female",
+            "birth_date": "1988-04-02",
+            "treatment_location": "clinic",
+            "status": "active",
+        },
+        headers=headers,
+    )
+    assert patient_response.status_code == 201
+    cycle_response = client.post(
+        f"/patients/{patient_response.json()['id']}/cycles",
+        json={"max_sessions": 3, "periodicity": "weekly", "type": "normal", "cycle_date": "2024-05-01T09:00:00Z"},
+        headers=headers,
+    )
+    assert cycle_response.status_code == 201
+    cycle_id = cycle_response.json()["id"]
+
+    header = (
+        "cycle_id,session_date,medication_id,activator_id,dosage_mg,weight_kg,fat_percentage,"
+        "fat_kg,muscle_mass_percentage,h2o_percentage,metabolic_age,visceral_fat"
+    )
+    lines = [
+        header,
+        f"{cycle_id},2024-05-01T09:00:00Z,{medication['id']},,2.5,90.0,35.0,31.5,45.0,50.0,40,11",
+        f"{cycle_id},2024-05-08T09:00:00Z,{medication['id']},,2.5,not-a-number,35.0,31.5,45.0,50.0,40,11",
+        f"{uuid.uuid4()},2024-05-08T09:00:00Z,{medication['id']},,,89.0,35.0,31.2,45.0,50.0,40,11",
+        f"{cycle_id},2024-05-08T09:00:00Z,{medication['id']},{uuid.uuid4()},,89.0,35.0,31.2,45.0,50.0,40,11",
+        f"{cycle_id},2024-05-08T09:00:00Z,{medication['id']},,,89.0,34.5,30.7,45.0,50.0,40,11",
+        f"{cycle_id},2024-05-15T09:00:00Z,{medication['id']},,,88.0,34.0,29.9,45.0,50.0,40,11",
+        f"{cycle_id},2024-05-22T09:00:00Z,{medication['id']},,,87.0,34.0,29.6,45.0,50.0,40,11",
+    ]
+    csv_content = "\n".join(lines) + "\n"
+
+    dry_run = client.post(
+        "/sessions/import",
+        params={"dry_run": True},
+        files={"file": ("readings.csv", csv_content, "text/csv")},
+        headers=headers,
+    )
+    assert dry_run.status_code == 200
+    assert dry_run.json()["imported"] == 3
+    assert client.get(f"/cycles/{cycle_id}/sessions", headers=headers).json()["items"] == []
+
+    response = client.post(
+        "/sessions/import",
+        files={"file": ("readings.csv", csv_content, "text/csv")},
+        headers=headers,
+    )
+    assert response.status_code == 200
+    result = response.json()
+    assert result["total_rows"] == 7
+    assert result["imported"] == 3
+    assert result["rejected"] == 4
+    assert [(error["line"], error["field"]) for error in result["errors"]] == [
+        (3, "weight_kg"),
+        (4, "cycle_id"),
+        (5, "activator_id"),
+        (8, "cycle_id"),
+    ]
+    assert result["errors"][3]["message"] == "Cycle has reached maximum number of sessions"
+
+    sessions = client.get(f"/cycles/{cycle_id}/sessions", headers=headers).json()["items"]
+    assert sorted(float(session["body_composition"]["weight_kg"]) for session in sessions) == [88.0, 89.0, 90.0]
+    assert {session["medication_id"] for session in sessions} == {medication["id"]}
+
+    missing_columns = client.post(
+        "/sessions/import",
+        files={"file": ("readings.csv", "cycle_id,weight_kg\n", "text/csv")},
+        headers=headers,
+    )
+    assert missing_columns.status_code == 400
+    assert "session_date" in missing_columns.json()["detail"]
+
+
+def test_batch_multi_get_keeps_request_order_and_reports_missing(client, unique_username):
+    headers = authenticate_client(client, unique_username)
+    medication = create_medication(client, headers)
+    patient_ids = []
+    for name in ("Paciente Lote Um", "Paciente Lote Dois"):
+        response = client.post(
+            "/patients",
+            json={"name": name, "gender": "male", "birth_date": "1982-07-07", "preferred_medication_id": medication["id"]},
+            headers=headers,
+        )
+        assert response.status_code == 201
+        patient_ids.append(response.json()["id"])
+    cycle_ids = []
+    for patient_id in patient_ids:
+        response = client.post(
+            f"/patients/{patient_id}/cycles",
+            json={"max_sessions": 4, "periodicity": "weekly", "type": "normal", "cycle_date": "2024-03-01T09:00:00Z"},
+            headers=headers,
+        )
+        assert response.status_code == 201
+        cycle_ids.append(response.json()["id"])
+    session_ids = []
+    for index, cycle_id in enumerate(cycle_ids):
+        response = client.post(
+            f"/cycles/{cycle_id}/sessions",
+            json={
+                "cycle_id": cycle_id,
+                "session_date": "2024-03-01T09:00:00Z",
+                "medication_id": medication["id"],
+                "body_composition": build_body_composition_payload(80.0 + index),
+            },
+            headers=headers,
+        )
+        assert response.status_code == 201
+        session_ids.append(response.json()["id"])
+    unknown = str(uuid.uuid4())
+
+    patients = client.get(
+        "/patients/batch", params={"ids": f"{patient_ids[1]},{unknown},{patient_ids[0]}"}, headers=headers
+    ).json()
+    assert [patient["id"] for patient in patients["items"]] == [patient_ids[1], patient_ids[0]]
+    assert patients["items"][0]["preferred_medication"]["id"] == medication["id"]
+    assert patients["missing_ids"] == [unknown]
+
+    cycles = client.get("/cycles/batch", params={"ids": ",".join(reversed(cycle_ids))}, headers=headers).json()
+    assert [cycle["id"] for cycle in cycles["items"]] == list(reversed(cycle_ids))
+    assert cycles["missing_ids"] == []
+
+    sessions = client.get(
+        "/sessions/batch", params={"ids": f"{session_ids[1]},{session_ids[0]},{session_ids[1]}"}, headers=headers
+    ).json()
+    assert [session["id"] for session in sessions["items"]] == [session_ids[1], session_ids[0]]
+    assert sessions["items"][0]["body_composition"]["weight_kg"] == "81.00"
+
+    invalid = client.get("/sessions/batch", params={"ids": "not-an-id"}, headers=headers)
+    assert invalid.status_code == 400
+    too_many = client.get(
+        "/cycles/batch", params={"ids": ",".join(str(uuid.uuid4()) for _ in range(201))}, headers=headers
+    )
+    assert too_many.status_code == 400
+
+
+def test_cycles_and_sessions_listings_are_paginated_and_filtered(client, unique_username):
+    headers = authenticate_client(client, unique_username)
+    medication = create_medication(client, headers)
+    patient_ids = []
+    for name in ("Paciente Página Um", "Paciente Página Dois"):
+        response = client.post(
+            "/patients", json={"name": name, "gender": "female", "birth_date": "1991-09-09"}, headers=headers
+        )
+        assert response.status_code == 201
+        patient_ids.append(response.json()["id"])
+
+    cycle_ids = []
+    for index, (patient_id, periodicity, cycle_date) in enumerate(
+        [
+            (patient_ids[0], "weekly", "2024-01-05T09:00:00Z"),
+            (patient_ids[0], "monthly", "2024-02-05T09:00:00Z"),
+            (patient_ids[1], "weekly", "2024-03-05T09:00:00Z"),
+        ]
+    ):
+        response = client.post(
+            f"/patients/{patient_id}/cycles",
+            json={"max_sessions": 5, "periodicity": periodicity, "type": "normal", "cycle_date": cycle_date},
+            headers=headers,
+        )
+        assert response.status_code == 201
+        cycle_ids.append(response.json()["id"])
+
+    first_page = client.get("/cycles", params={"limit": 2}, headers=headers).json()
+    assert [cycle["id"] for cycle in first_page["items"]] == [cycle_ids[2], cycle_ids[1]]
+    assert first_page["has_next"] is True
+    second_page = client.get(
+        "/cycles", params={"limit": 2, "cursor": first_page["next_cursor"]}, headers=headers
+    ).json()
+    assert [cycle["id"] for cycle in second_page["items"]] == [cycle_ids[0]]
+    assert second_page["has_next"] is False
+    assert second_page["next_cursor"] is None
+
+    filtered = client.get(
+        "/cycles", params={"patient_id": patient_ids[0], "periodicity": "weekly"}, headers=headers
+    ).json()
+    assert [cycle["id"] for cycle in filtered["items"]] == [cycle_ids[0]]
+    ranged = client.get(
+        "/cycles", params={"start_date": "2024-02-01", "end_date": "2024-03-31"}, headers=headers
+    ).json()
+    assert [cycle["id"] for cycle in ranged["items"]] == [cycle_ids[2], cycle_ids[1]]
+
+    for day in (3, 1, 2, 4):
+        response = client.post(
+            f"/cycles/{cycle_ids[0]}/sessions",
+            json={
+                "cycle_id": cycle_ids[0],
+                "session_date": f"2024-01-{day * 7:02d}T10:00:00Z",
+                "medication_id": medication["id"],
+                "body_composition": build_body_composition_payload(90.0 - day),
+            },
+            headers=headers,
+        )
+        assert response.status_code == 201
+
+    url = f"/cycles/{cycle_ids[0]}/sessions"
+    page = client.get(url, params={"limit": 3}, headers=headers).json()
+    assert [session["session_date"][:10] for session in page["items"]] == ["2024-01-07", "2024-01-14", "2024-01-21"]
+    rest = client.get(url, params={"limit": 3, "cursor": page["next_cursor"]}, headers=headers).json()
+    assert [session["session_date"][:10] for session in rest["items"]] == ["2024-01-28"]
+    assert rest["has_next"] is False
+
+    window = client.get(url, params={"start_date": "2024-01-10", "end_date": "2024-01-21"}, headers=headers).json()
+    assert [float(session["body_composition"]["weight_kg"]) for session in window["items"]] == [88.0, 87.0]
+
+    assert client.get("/cycles", params={"cursor": "invalid"}, headers=headers).status_code == 400
+
+
+def test_bulk_delete_is_filter_scoped_and_keeps_counters(client, db_session, unique_username, bulk_delete_enabled):
+    from app.dashboard_counters import reconcile_counters
+    from app.models.body_composition import BodyComposition
+    from app.models.session_daily_rollup import SessionDailyRollup
+
+    headers = authenticate_client(client, unique_username)
+    medication = create_medication(client, headers)
+    patients = {}
+    for name, location in (("Paciente Casa", "home"), ("Paciente Clínica", "clinic")):
+        response = client.post(
+            "/patients",
+            json={"name": name, "gender": "male", "birth_date": "1980-04-12", "treatment_location": location},
+            headers=headers,
+        )
+        assert response.status_code == 201
+        patients[location] = response.json()["id"]
+
+    cycles = {}
+    for location, periodicity in (("home", "weekly"), ("clinic", "weekly"), ("clinic", "monthly")):
+        response = client.post(
+            f"/patients/{patients[location]}/cycles",
+            json={"max_sessions": 5, "periodicity": periodicity, "type": "normal", "cycle_date": "2024-05-01T09:00:00Z"},
+            headers=headers,
+        )
+        assert response.status_code == 201
+        cycles[(location, periodicity)] = response.json()["id"]
+        session_response = client.post(
+            f"/cycles/{cycles[(location, periodicity)]}/sessions",
+            json={
+                "cycle_id": cycles[(location, periodicity)],
+                "session_date": "2024-05-10T10:00:00Z",
+                "medication_id": medication["id"],
+                "body_composition": build_body_composition_payload(80.0),
+            },
+            headers=headers,
+        )
+        assert session_response.status_code == 201
+
+    assert client.delete("/cycles", headers=headers).status_code == 400
+
+    preview = client.delete(
+        "/cycles", params={"patient_id": patients["clinic"], "periodicity": "monthly", "dry_run": True}, headers=headers
+    )
+    assert preview.status_code == 200
+    assert preview.json() == {"dry_run": True, "matched": 1, "related": {"sessions": 1}}
+    assert client.get(f"/cycles/{cycles[('clinic', 'monthly')]}", headers=headers).status_code == 200
+
+    removed = client.delete(
+        "/cycles", params={"patient_id": patients["clinic"], "periodicity": "monthly"}, headers=headers
+    ).json()
+    assert removed == {"dry_run": False, "matched": 1, "related": {"sessions": 1}}
+    remaining = client.get("/cycles", headers=headers).json()["items"]
+    assert {cycle["id"] for cycle in remaining} == {cycles[("home", "weekly")], cycles[("clinic", "weekly")]}
+
+    removed = client.delete("/patients", params={"treatment_location": "home"}, headers=headers).json()
+    assert removed == {"dry_run": False, "matched": 1, "related": {"cycles": 1, "sessions": 1}}
+    assert client.get(f"/patients/{patients['home']}", headers=headers).status_code == 404
+    assert client.get(f"/patients/{patients['clinic']}", headers=headers).status_code == 200
+    assert db_session.query(BodyComposition).count() == 1
+    assert db_session.query(SessionDailyRollup.sessions_count).scalar() == 1
+    assert reconcile_counters(db_session) == []
+
+    removed = client.delete("/patients", params={"all": True}, headers=headers).json()
+    assert removed["matched"] == 1
+    assert client.get("/cycles", headers=headers).json()["items"] == []
+    assert db_session.query(SessionDailyRollup).count() == 0
+    assert reconcile_counters(db_session) == []
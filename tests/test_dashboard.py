@@ -0,0 +1,512 @@
+from datetime import date
+import uuid
+
+from app import session_rollups
+from app.jobs import dashboard_snapshot
+from app.dashboard_counters import reconcile_counters
+from app.models.session_daily_rollup import SessionDailyRollup
+
+
+def authenticate_client(client, unique_username):
+    user_payload = {
+        "username": unique_username,
+        "password": "Test1234!",
+    }
+    register_response = client.post("/auth/register", json=user_payload)
+    assert register_response.status_code == 201
+
+    login_response = client.post(
+        "/auth/login",
+        data={
+            "username": user_payload["username"],
+            "password": user_payload["password"],
+        },
+    )
+    token = login_response.json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def create_medication(client, headers):
+    payload = {
+        "name": f"Med Dashboard {uuid.uuid4().hex[:6]}",
+    }
+    response = client.post("/medications", json=payload, headers=headers)
+    assert response.status_code == 201
+    return response.json()
+
+
+def create_patient(
+    client, headers, name, gender="female", medication_id=None, birth_date="1990-03-15"
+):
+    payload = {
+        "name": name,
+        "gender": gender,
+        "birth_date": birth_date,
+        "treatment_location": "clinic",
+        "status": "active",
+        "preferred_medication_id": medication_id,
+    }
+    response = client.post("/patients", json=payload, headers=headers)
+    assert response.status_code == 201
+    return response.json()
+
+
+def build_body_composition_payload(weight_kg: float) -> dict:
+    return {
+        "weight_kg": weight_kg,
+        "fat_percentage": 38.5,
+        "fat_kg": round(weight_kg * 0.385, 2),
+        "muscle_mass_percentage": 45.0,
+        "h2o_percentage": 50.2,
+        "metabolic_age": 38,
+        "visceral_fat": 12,
+    }
+
+
+def create_cycle(client, headers, patient_id):
+    payload = {
+        "max_sessions": 8,
+        "periodicity": "weekly",
+        "type": "normal",
+        "cycle_date": "2024-01-10T09:00:00Z",
+    }
+    response = client.post(f"/patients/{patient_id}/cycles", json=payload, headers=headers)
+    assert response.status_code == 201
+    return response.json()
+
+
+def create_session(
+    client, headers, cycle_id, medication_id, session_date, dosage_mg, weight_kg=100.0, activator_id=None
+):
+    payload = {
+        "cycle_id": cycle_id,
+        "session_date": session_date,
+        "medication_id": medication_id,
+        "activator_id": activator_id,
+        "dosage_mg": dosage_mg,
+        "body_composition": build_body_composition_payload(weight_kg),
+    }
+    response = client.post(f"/cycles/{cycle_id}/sessions", json=payload, headers=headers)
+    assert response.status_code == 201
+    return response.json()
+
+
+def test_dashboard_stats_served_from_snapshot(client, unique_username):
+    headers = authenticate_client(client, unique_username)
+    medication = create_medication(client, headers)
+    create_patient(client, headers, "Paciente Um", medication_id=medication["id"])
+    create_patient(client, headers, "Paciente Dois", gender="male")
+
+    response = client.get("/dashboard/stats", headers=headers)
+    assert response.status_code == 200
+    stats = response.json()
+    assert stats["total_patients"] == 2
+    assert stats["snapshot_at"] is not None
+    assert stats["stale_after"] > stats["snapshot_at"]
+    genders = {item["gender"]: item["count"] for item in stats["gender_distribution"]}
+    assert genders == {"Masculino": 1, "Feminino": 1}
+    assert stats["medications_preference"] == [
+        {"name": medication["name"], "count": 1}
+    ]
+
+    refresh_response = client.post("/dashboard/stats/refresh", headers=headers)
+    assert refresh_response.status_code == 200
+    assert refresh_response.json()["snapshot_at"] > stats["snapshot_at"]
+    timed_units = [entry.split(";")[0] for entry in refresh_response.headers["Server-Timing"].split(", ")]
+    # Totais e distribuições vêm dos contadores: só as métricas do snapshot são calculadas
+    assert timed_units == list(dashboard_snapshot.STATS_UNITS) == ["sessions_30d", "weight_lost"]
+
+
+def test_total_weight_lost_uses_first_and_last_weighing(client, db_session, unique_username):
+    headers = authenticate_client(client, unique_username)
+    medication = create_medication(client, headers)
+    tracked = create_cycle(client, headers, create_patient(client, headers, "Paciente Três Pesagens")["id"])
+    single = create_cycle(client, headers, create_patient(client, headers, "Paciente Uma Pesagem")["id"])
+    for cycle, session_date, weight in [
+        (tracked, "2024-01-08T10:00:00Z", 97.0),
+        (tracked, "2024-01-01T10:00:00Z", 100.0),
+        (tracked, "2024-01-15T10:00:00Z", 95.5),
+        (single, "2024-01-03T10:00:00Z", 80.0),
+    ]:
+        create_session(client, headers, cycle["id"], medication["id"], session_date, 2.5, weight)
+
+    assert dashboard_snapshot._total_weight_lost_unit(db_session) == {"total_weight_lost_kg": -4.5}
+
+
+def test_dashboard_counters_follow_writes(client, db_session, unique_username):
+    headers = authenticate_client(client, unique_username)
+    medication = create_medication(client, headers)
+    patient = create_patient(client, headers, "Paciente Contador", medication_id=medication["id"])
+
+    stats = client.get("/dashboard/stats", headers=headers).json()
+    assert stats["total_patients"] == 1
+    snapshot_at = stats["snapshot_at"]
+
+    # Contadores acompanham as escritas sem esperar um novo snapshot
+    other = create_patient(client, headers, "Paciente Extra", gender="male")
+    update_response = client.put(
+        f"/patients/{patient['id']}",
+        json={"treatment_location": "home", "preferred_medication_id": None},
+        headers=headers,
+    )
+    assert update_response.status_code == 200
+
+    stats = client.get("/dashboard/stats", headers=headers).json()
+    assert stats["snapshot_at"] == snapshot_at
+    assert stats["total_patients"] == 2
+    assert stats["medications_preference"] == []
+    locations = {item["location"]: item["count"] for item in stats["treatment_location_distribution"]}
+    assert locations == {"Clínica": 1, "Domicílio": 1}
+
+    delete_response = client.delete(f"/patients/{other['id']}", headers=headers)
+    assert delete_response.status_code == 204
+
+    stats = client.get("/dashboard/stats", headers=headers).json()
+    assert stats["total_patients"] == 1
+    genders = {item["gender"]: item["count"] for item in stats["gender_distribution"]}
+    assert genders == {"Masculino": 0, "Feminino": 1}
+    today = date.today()
+    assert stats["average_age"] == today.year - 1990 - ((today.month, today.day) < (3, 15))
+
+    assert reconcile_counters(db_session) == []
+
+
+def test_age_distribution_histogram(client, unique_username):
+    headers = authenticate_client(client, unique_username)
+    today = date.today()
+    for index, years in enumerate([25, 28, 41, 67]):
+        birth_date = date(today.year - years, 1, 1)
+        create_patient(client, headers, f"Paciente Idade {index}", birth_date=birth_date.isoformat())
+
+    response = client.get(
+        "/dashboard/age-distribution", params={"bucket_width": 20}, headers=headers
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total_patients"] == 4
+    assert data["average_age"] == round((25 + 28 + 41 + 67) / 4, 1)
+    assert data["buckets"] == [
+        {"start_age": 20, "end_age": 40, "count": 2},
+        {"start_age": 40, "end_age": 60, "count": 1},
+        {"start_age": 60, "end_age": 80, "count": 1},
+    ]
+
+
+def test_medication_dosage_served_from_daily_rollups(client, db_session, unique_username):
+    headers = authenticate_client(client, unique_username)
+    medication = create_medication(client, headers)
+    first = create_patient(client, headers, "Paciente Dose Um")
+    second = create_patient(client, headers, "Paciente Dose Dois")
+    first_cycle = create_cycle(client, headers, first["id"])
+    second_cycle = create_cycle(client, headers, second["id"])
+
+    create_session(client, headers, first_cycle["id"], medication["id"], "2024-01-15T10:00:00Z", 2.5)
+    create_session(client, headers, first_cycle["id"], medication["id"], "2024-01-22T10:00:00Z", 2.5)
+    moved = create_session(client, headers, second_cycle["id"], medication["id"], "2024-01-15T11:00:00Z", 2.5)
+    create_session(client, headers, second_cycle["id"], medication["id"], "2024-03-01T10:00:00Z", 5.0)
+
+    params = {"start_date": "2024-01-01", "end_date": "2024-01-31"}
+    response = client.get("/dashboard/medication-dosage", params=params, headers=headers)
+    assert response.status_code == 200
+    assert [(item["dosage_mg"], item["patients_count"]) for item in response.json()["items"]] == [(2.5, 2)]
+
+    # Mover a sessão para fora do período atualiza os dois dias afetados
+    update_response = client.put(
+        f"/sessions/{moved['id']}", json={"session_date": "2024-02-10T10:00:00Z"}, headers=headers
+    )
+    assert update_response.status_code == 200
+    response = client.get("/dashboard/medication-dosage", params=params, headers=headers)
+    assert [(item["dosage_mg"], item["patients_count"]) for item in response.json()["items"]] == [(2.5, 1)]
+
+    delete_response = client.delete(f"/cycles/{first_cycle['id']}", headers=headers)
+    assert delete_response.status_code == 204
+
+    rows_before = {
+        (row.day, row.sessions_count, tuple(row.patient_ids))
+        for row in db_session.query(SessionDailyRollup).all()
+    }
+    assert session_rollups.backfill(db_session) > 0
+    rows_after = {
+        (row.day, row.sessions_count, tuple(row.patient_ids))
+        for row in db_session.query(SessionDailyRollup).all()
+    }
+    assert rows_after == rows_before == {
+        (date(2024, 2, 10), 1, (second["id"],)),
+        (date(2024, 3, 1), 1, (second["id"],)),
+    }
+
+
+def test_rankings_compare_to_previous_period(client, unique_username):
+    headers = authenticate_client(client, unique_username)
+    medication = create_medication(client, headers)
+    steady = create_patient(client, headers, "Paciente Constante")
+    newcomer = create_patient(client, headers, "Paciente Novato")
+    steady_cycle = create_cycle(client, headers, steady["id"])
+    newcomer_cycle = create_cycle(client, headers, newcomer["id"])
+
+    for session_date, weight in [
+        ("2024-01-05T10:00:00Z", 100.0),
+        ("2024-01-20T10:00:00Z", 98.0),
+        ("2024-02-05T10:00:00Z", 97.0),
+        ("2024-02-20T10:00:00Z", 94.0),
+    ]:
+        create_session(client, headers, steady_cycle["id"], medication["id"], session_date, 2.5, weight)
+    for session_date, weight in [("2024-02-10T10:00:00Z", 80.0), ("2024-02-25T10:00:00Z", 79.0)]:
+        create_session(client, headers, newcomer_cycle["id"], medication["id"], session_date, 5.0, weight)
+
+    params = {"start_date": "2024-02-01", "end_date": "2024-02-29", "compare_to": "previous_period"}
+    response = client.get("/dashboard/weight-loss-ranking", params=params, headers=headers)
+    assert response.status_code == 200
+    ranking = response.json()
+    assert ranking["previous_start_date"] == "2024-01-03"
+    assert ranking["previous_end_date"] == "2024-01-31"
+    assert [
+        (
+            item["patient_id"],
+            item["weight_loss_kg"],
+            item["sessions_count"],
+            item["previous_weight_loss_kg"],
+            item["previous_sessions_count"],
+            item["weight_loss_delta_kg"],
+        )
+        for item in ranking["items"]
+    ] == [
+        (steady["id"], 3.0, 2, 2.0, 2, 1.0),
+        (newcomer["id"], 1.0, 2, None, 0, None),
+    ]
+
+    response = client.get("/dashboard/medication-dosage", params=params, headers=headers)
+    assert response.status_code == 200
+    assert [
+        (item["dosage_mg"], item["patients_count"], item["previous_patients_count"], item["patients_count_delta"])
+        for item in response.json()["items"]
+    ] == [(2.5, 1, 1, 0), (5.0, 1, 0, 1)]
+
+    # Sem comparação a resposta mantém o formato original
+    response = client.get(
+        "/dashboard/weight-loss-ranking",
+        params={"start_date": "2024-02-01", "end_date": "2024-02-29"},
+        headers=headers,
+    )
+    items = response.json()["items"]
+    assert [item["weight_loss_kg"] for item in items] == [3.0, 1.0]
+    assert items[0]["previous_weight_loss_kg"] is None
+
+
+def test_effectiveness_statistics_per_activator_and_dosage(client, unique_username):
+    headers = authenticate_client(client, unique_username)
+    medication = create_medication(client, headers)
+    substance = client.post("/substances", json={"name": "Substância Efetividade"}, headers=headers).json()
+    activator_response = client.post(
+        "/activators",
+        json={"name": "Ativador X", "compositions": [{"substance_id": substance["id"], "volume_ml": 10.0}]},
+        headers=headers,
+    )
+    assert activator_response.status_code == 201
+    activator = activator_response.json()
+
+    first_cycle = create_cycle(client, headers, create_patient(client, headers, "Paciente Efeito Um")["id"])
+    second_cycle = create_cycle(client, headers, create_patient(client, headers, "Paciente Efeito Dois")["id"])
+    for cycle, session_date, weight, dosage, activator_id in [
+        (first_cycle, "2024-01-01T10:00:00Z", 100.0, 2.5, activator["id"]),
+        (first_cycle, "2024-01-08T10:00:00Z", 98.0, 2.5, activator["id"]),
+        (first_cycle, "2024-01-15T10:00:00Z", 97.0, 5.0, None),
+        (first_cycle, "2024-01-22T10:00:00Z", 97.5, 5.0, None),
+        (second_cycle, "2024-01-03T10:00:00Z", 80.0, 2.5, activator["id"]),
+        (second_cycle, "2024-01-10T10:00:00Z", 76.0, 2.5, activator["id"]),
+    ]:
+        create_session(
+            client, headers, cycle["id"], medication["id"], session_date, dosage, weight, activator_id
+        )
+
+    response = client.get(
+        "/dashboard/effectiveness",
+        params={"start_date": "2024-01-01", "end_date": "2024-01-31"},
+        headers=headers,
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["observations"] == 4
+
+    # Variação atribuída ao tratamento da sessão anterior: perdas de 2, 1 e 4 kg após o ativador
+    [activator_item] = data["activators"]
+    assert activator_item["activator_name"] == "Ativador X"
+    assert activator_item["observations"] == 3
+    assert activator_item["weight_loss_kg"] == {"mean": 2.33, "median": 2.0, "p90": 3.6}
+    assert activator_item["fat_percentage_loss"] == {"mean": 0.0, "median": 0.0, "p90": 0.0}
+
+    assert [
+        (item["dosage_mg"], item["observations"], item["weight_loss_kg"]["median"])
+        for item in data["medications"]
+    ] == [(2.5, 3, 2.0), (5.0, 1, -0.5)]
+
+    # Período começando no meio do histórico: a primeira pesagem do período ainda é comparada
+    # com a última anterior ao início (15/01 -> 22/01), mas pesagens mais antigas ficam de fora
+    response = client.get(
+        "/dashboard/effectiveness",
+        params={"start_date": "2024-01-16", "end_date": "2024-01-31"},
+        headers=headers,
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["observations"] == 1
+    assert data["activators"] == []
+    assert [(item["dosage_mg"], item["weight_loss_kg"]["mean"]) for item in data["medications"]] == [(5.0, -0.5)]
+
+
+def test_dashboard_stats_fan_out_matches_sequential(client, db_session, unique_username, monkeypatch):
+    import threading
+    import time
+
+    headers = authenticate_client(client, unique_username)
+    medication = create_medication(client, headers)
+    create_patient(client, headers, "Paciente Paralelo", medication_id=medication["id"])
+    create_patient(client, headers, "Paciente Sequencial", gender="male")
+    sequential = dashboard_snapshot.compute_dashboard_stats(db_session)
+
+    # O StaticPool dos testes sempre resultaria em largura 1; força o caminho paralelo e
+    # mede quantas unidades seguram uma conexão ao mesmo tempo
+    active = peak = 0
+    lock = threading.Lock()
+    original_unit = dashboard_snapshot._timed_unit
+
+    def tracked_unit(name, unit, db):
+        nonlocal active, peak
+        with lock:
+            active += 1
+            peak = max(peak, active)
+        try:
+            time.sleep(0.01)
+            return original_unit(name, unit, db)
+        finally:
+            with lock:
+                active -= 1
+
+    monkeypatch.setattr(dashboard_snapshot, "_fan_out_width", lambda engine: 4)
+    monkeypatch.setattr(dashboard_snapshot, "_UNIT_CONNECTIONS", threading.BoundedSemaphore(2))
+    monkeypatch.setattr(dashboard_snapshot, "_timed_unit", tracked_unit)
+    timings = {}
+    parallel = dashboard_snapshot.compute_dashboard_stats(db_session, timings)
+
+    assert parallel == sequential
+    assert set(timings) == set(dashboard_snapshot.STATS_UNITS)
+    assert peak == 2
+
+
+def test_trends_rejects_too_many_buckets(client, unique_username):
+    headers = authenticate_client(client, unique_username)
+
+    response = client.get(
+        "/dashboard/trends",
+        params={"granularity": "day", "start_date": "2020-01-01", "end_date": "2024-01-01"},
+        headers=headers,
+    )
+    assert response.status_code == 400
+
+
+def test_trends_gap_fill_in_postgres(pg_session):
+    from datetime import datetime, timezone
+
+    from app.models.body_composition import BodyComposition
+    from app.models.cycle import Cycle, CycleTypeEnum, PeriodicityEnum
+    from app.models.medication import Medication
+    from app.models.patient import Patient
+    from app.models.session import Session as SessionModel
+    from app.routers import dashboard
+    from app.schemas.dashboard import TrendGranularityEnum
+
+    medication = Medication(name="Med Tendência")
+    patient = Patient(
+        name="Paciente PG",
+        gender="female",
+        birth_date=date(1985, 5, 5),
+        created_at=datetime(2024, 1, 9, 23, 30, tzinfo=timezone.utc),
+    )
+    pg_session.add_all([medication, patient])
+    pg_session.flush()
+    cycle = Cycle(patient_id=patient.id, max_sessions=8, periodicity=PeriodicityEnum.weekly, type=CycleTypeEnum.normal)
+    pg_session.add(cycle)
+    pg_session.flush()
+    for day, weight in ((2, 100), (3, 98), (16, 96)):
+        session = SessionModel(
+            cycle_id=cycle.id,
+            medication_id=medication.id,
+            session_date=datetime(2024, 1, day, 23, 0, tzinfo=timezone.utc),
+        )
+        pg_session.add(session)
+        pg_session.flush()
+        pg_session.add(
+            BodyComposition(
+                patient_id=patient.id,
+                session_id=session.id,
+                weight_kg=weight,
+                fat_percentage=30,
+                fat_kg=weight * 0.3,
+                muscle_mass_percentage=40,
+                h2o_percentage=50,
+                metabolic_age=40,
+                visceral_fat=10,
+            )
+        )
+    pg_session.commit()
+
+    weekly = dashboard._compute_trends(pg_session, TrendGranularityEnum.week, date(2024, 1, 1), date(2024, 1, 21))
+    assert [
+        (item.bucket_start, item.sessions_count, item.new_patients, item.average_weight_kg)
+        for item in weekly.items
+    ] == [
+        (date(2024, 1, 1), 2, 0, 99.0),
+        (date(2024, 1, 8), 0, 1, None),
+        (date(2024, 1, 15), 1, 0, 96.0),
+    ]
+
+    monthly = dashboard._compute_trends(pg_session, TrendGranularityEnum.month, date(2023, 12, 20), date(2024, 2, 10))
+    assert [(item.bucket_start, item.sessions_count) for item in monthly.items] == [
+        (date(2023, 12, 1), 0),
+        (date(2024, 1, 1), 3),
+        (date(2024, 2, 1), 0),
+    ]
+
+
+def test_coalesced_computation_survives_leader_cancellation(db_session):
+    import asyncio
+    import threading
+
+    from fastapi import Response
+
+    from app.models.patient import Patient
+    from app.routers import dashboard
+    from app.singleflight import SingleFlight
+
+    db_session.add(Patient(name="Paciente Líder", gender="female", birth_date=date(1990, 3, 15)))
+    db_session.commit()
+
+    flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+    sessions_used = []
+
+    def compute(own_db):
+        sessions_used.append(own_db)
+        started.set()
+        release.wait(5)
+        return own_db.query(Patient).count()
+
+    async def run():
+        leader = asyncio.ensure_future(dashboard._coalesced(Response(), "k", db_session, compute, flight=flight))
+        await asyncio.to_thread(started.wait, 5)
+        follower_response = Response()
+        follower = asyncio.ensure_future(
+            dashboard._coalesced(follower_response, "k", db_session, compute, flight=flight)
+        )
+        await asyncio.sleep(0)
+        # O cliente do líder desconecta e o FastAPI fecha a sessão da requisição
+        leader.cancel()
+        db_session.close()
+        release.set()
+        return leader, await follower, follower_response
+
+    leader, result, follower_response = asyncio.run(run())
+    assert leader.cancelled()
+    assert result == 1
+    assert follower_response.headers["X-Singleflight"] == "coalesced"
+    assert len(sessions_used) == 1 and sessions_used[0] is not db_session
@@ -0,0 +1,153 @@
+import csv
+import io
+import json
+from pathlib import Path
+import uuid
+
+import pyarrow.parquet as pq
+
+from app import export
+from app.jobs import parquet_snapshot
+
+
+def authenticate_client(client, unique_username):
+    user_payload = {
+        "username": unique_username,
+        "password": "Test1234!",
+    }
+    register_response = client.post("/auth/register", json=user_payload)
+    assert register_response.status_code == 201
+
+    login_response = client.post(
+        "/auth/login",
+        data={
+            "username": user_payload["username"],
+            "password": user_payload["password"],
+        },
+    )
+    token = login_response.json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def create_patient_with_sessions(client, headers, name, weights):
+    medication_response = client.post(
+        "/medications", json={"name": f"Med Export {uuid.uuid4().hex[:6]}"}, headers=headers
+    )
+    assert medication_response.status_code == 201
+    medication = medication_response.json()
+    patient_response = client.post(
+        "/patients",
+        json={
+            "name": name,
+            "gender": "male",
+            "birth_date": "1980-05-20",
+            "treatment_location": "home",
+            "status": "active",
+        },
+        headers=headers,
+    )
+    assert patient_response.status_code == 201
+    patient = patient_response.json()
+    cycle_response = client.post(
+        f"/patients/{patient['id']}/cycles",
+        json={"max_sessions": 8, "periodicity": "weekly", "type": "normal", "cycle_date": "2024-02-01T09:00:00Z"},
+        headers=headers,
+    )
+    assert cycle_response.status_code == 201
+    cycle = cycle_response.json()
+    for index, weight in enumerate(weights):
+        response = client.post(
+            f"/cycles/{cycle['id']}/sessions",
+            json={
+                "cycle_id": cycle["id"],
+                "session_date": f"2024-02-{index * 7 + 1:02d}T09:00:00Z",
+                "medication_id": medication["id"],
+                "body_composition": {
+                    "weight_kg": weight,
+                    "fat_percentage": 30.0,
+                    "fat_kg": round(weight * 0.3, 2),
+                    "muscle_mass_percentage": 45.0,
+                    "h2o_percentage": 50.2,
+                    "metabolic_age": 38,
+                    "visceral_fat": 12,
+                },
+            },
+            headers=headers,
+        )
+        assert response.status_code == 201
+    return patient
+
+
+def test_export_streams_sessions_as_ndjson_and_csv(client, unique_username):
+    headers = authenticate_client(client, unique_username)
+    patient = create_patient_with_sessions(client, headers, "Paciente Export", [92.0, 91.5, 90.25])
+
+    ndjson_response = client.get("/export", params={"dataset": "sessions"}, headers=headers)
+    assert ndjson_response.status_code == 200
+    assert ndjson_response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in ndjson_response.text.splitlines()]
+    assert [row["weight_kg"] for row in rows] == ["92.00", "91.50", "90.25"]
+    assert {row["patient_id"] for row in rows} == {patient["id"]}
+    assert rows[0]["session_date"].startswith("2024-02-01")
+
+    csv_response = client.get(
+        "/export", params={"dataset": "patients", "format": "csv"}, headers=headers
+    )
+    assert csv_response.status_code == 200
+    assert 'filename="patients.csv"' in csv_response.headers["content-disposition"]
+    records = list(csv.DictReader(io.StringIO(csv_response.text)))
+    assert len(records) == 1
+    assert records[0]["name"] == "Paciente Export"
+    assert records[0]["treatment_location"] == "home"
+
+    assert client.get("/export").status_code == 401
+
+
+def test_export_chunks_follow_batches(client, db_session, unique_username):
+    headers = authenticate_client(client, unique_username)
+    create_patient_with_sessions(client, headers, "Paciente Lotes", [80.0, 79.0, 78.0])
+
+    chunks = list(export.csv_chunks(db_session, "sessions", batch_size=2))
+    # Cabeçalho junto do primeiro lote, depois um pedaço por lote
+    assert len(chunks) == 2
+    assert chunks[0].startswith("session_id,patient_id,cycle_id,session_date")
+    assert len(list(csv.reader(io.StringIO("".join(chunks))))) == 4
+
+    cycle_chunks = list(export.ndjson_chunks(db_session, "cycles", batch_size=2))
+    assert len(cycle_chunks) == 1
+    assert json.loads(cycle_chunks[0])["periodicity"] == "weekly"
+
+
+def test_parquet_snapshot_writes_every_table(client, unique_username, tmp_path, monkeypatch):
+    monkeypatch.setattr(parquet_snapshot, "SNAPSHOT_DIR", str(tmp_path))
+    headers = authenticate_client(client, unique_username)
+    create_patient_with_sessions(client, headers, "Paciente Parquet", [85.0, 84.5])
+
+    response = client.post("/export/parquet-snapshot", headers=headers)
+    assert response.status_code == 201
+    snapshot = response.json()
+    assert snapshot["rows"] == {
+        "patients": 1,
+        "cycles": 1,
+        "sessions": 2,
+        "body_compositions": 2,
+        "activator_compositions": 0,
+    }
+
+    compositions = pq.read_table(f"{snapshot['directory']}/body_compositions.parquet")
+    assert sorted(str(value) for value in compositions.column("weight_kg").to_pylist()) == ["84.50", "85.00"]
+
+    patients = pq.read_table(f"{snapshot['directory']}/patients.parquet")
+    assert str(patients.schema.field("gender").type) == "dictionary<values=string, indices=int8, ordered=0>"
+    assert patients.column("gender").to_pylist() == ["male"]
+    assert patients.column("treatment_location").to_pylist() == ["home"]
+
+
+def test_parquet_snapshots_in_the_same_second_get_distinct_directories(db_session, tmp_path):
+    first = parquet_snapshot.write_parquet_snapshot(db_session, output_dir=str(tmp_path))
+    second = parquet_snapshot.write_parquet_snapshot(db_session, output_dir=str(tmp_path))
+
+    assert first["directory"] != second["directory"]
+    assert sorted(path.name for path in tmp_path.iterdir()) == sorted(
+        Path(snapshot["directory"]).name for snapshot in (first, second)
+    )
@@ -1,8 +1,10 @@
-from datetime import date, datetime, timezone
+from datetime import date, datetime, timedelta, timezone
 from decimal import Decimal
 from typing import Optional
 import uuid
 
+from app.pagination import encode_cursor
+
 
 def authenticate_client(client, unique_username):
     user_payload = {
@@ -338,3 +340,394 @@ def test_patient_summary_requires_authentication(client):
     assert response.status_code == 401
 
 
+def test_weight_trends_are_fitted_and_exposed(client, unique_username):
+    headers = authenticate_client(client, unique_username)
+    medication = create_medication(client, headers, uuid.uuid4().hex[:6])
+    patient = create_patient(client, headers, medication["id"], "Spec Tendência Peso")
+    single = create_patient(client, headers, medication["id"], "Spec Uma Pesagem")
+
+    cycle = create_cycle(
+        client, headers, patient["id"], max_sessions=8, cycle_date_iso="2024-01-10T09:00:00Z"
+    )
+    for session_date, weight in [
+        ("2024-01-10T09:00:00Z", 100.0),
+        ("2024-01-17T09:00:00Z", 99.0),
+        ("2024-01-24T09:00:00Z", 98.0),
+    ]:
+        create_session(
+            client, headers, cycle["id"], medication["id"], session_date, {"weight_kg": weight}
+        )
+    single_cycle = create_cycle(client, headers, single["id"])
+    create_session(client, headers, single_cycle["id"], medication["id"], "2024-01-10T09:00:00Z")
+
+    refresh_response = client.post("/patients/weight-trends/refresh", headers=headers)
+    assert refresh_response.status_code == 200
+    assert refresh_response.json()["patients_fitted"] == 1
+
+    summary = client.get(f"/patients/{patient['id']}/summary", headers=headers).json()
+    trend = summary["weight_trend"]
+    assert Decimal(trend["slope_kg_per_week"]) == Decimal("-1.000")
+    # Última sessão prevista: 7 semanas após o início do ciclo semanal de 8 sessões
+    assert Decimal(trend["projected_weight_kg"]) == Decimal("93.00")
+    assert trend["projected_for"].startswith("2024-02-28")
+    assert trend["sessions_count"] == 3
+
+    listing = client.get("/patients/listing", params={"search": "Spec"}, headers=headers).json()
+    trends = {item["id"]: item["weight_trend_kg_per_week"] for item in listing["items"]}
+    assert Decimal(trends[patient["id"]]) == Decimal("-1.000")
+    assert trends[single["id"]] is None
+
+    single_summary = client.get(f"/patients/{single['id']}/summary", headers=headers).json()
+    assert single_summary["weight_trend"] is None
+
+
+def test_patient_summary_includes_cohort_percentiles(client, db_session, unique_username):
+    from app.jobs.cohort_percentiles import refresh_cohort_percentiles
+
+    headers = authenticate_client(client, unique_username)
+    medication = create_medication(client, headers, uuid.uuid4().hex[:6])
+
+    # Pacientes com 35 anos completos em qualquer data de execução: faixa 30-39
+    today = date.today()
+    birth_date = date(today.year - 35, today.month, 1) - timedelta(days=180)
+
+    peers = []
+    for index, fat_percentage in enumerate([20.0, 25.0, 30.0, 35.0, 40.0]):
+        patient = create_patient(
+            client, headers, medication["id"], f"Spec Coorte {index}", birth_date=birth_date.isoformat()
+        )
+        cycle = create_cycle(client, headers, patient["id"])
+        create_session(
+            client,
+            headers,
+            cycle["id"],
+            medication["id"],
+            "2024-01-10T09:00:00Z",
+            {"fat_percentage": fat_percentage, "visceral_fat": 5 + index},
+        )
+        peers.append(patient)
+    older = create_patient(client, headers, medication["id"], "Spec Coorte Idosa", birth_date="1950-01-01")
+    older_cycle = create_cycle(client, headers, older["id"])
+    create_session(client, headers, older_cycle["id"], medication["id"], "2024-01-10T09:00:00Z")
+
+    # Uma tabela por métrica para mulheres da mesma faixa; a faixa com uma só paciente fica de fora
+    assert refresh_cohort_percentiles(db_session, min_sample_size=5) == 4
+
+    summary = client.get(f"/patients/{peers[2]['id']}/summary", headers=headers).json()
+    cohort = summary["cohort_percentiles"]
+    assert (cohort["age_band_start"], cohort["age_band_end"]) == (30, 39)
+    percentiles = {item["metric"]: item for item in cohort["items"]}
+    assert percentiles["fat_percentage"]["percentile"] == 50.0
+    assert percentiles["fat_percentage"]["sample_size"] == 5
+    assert percentiles["visceral_fat"]["percentile"] == 50.0
+
+    top = client.get(f"/patients/{peers[4]['id']}/summary", headers=headers).json()
+    assert {item["metric"]: item["percentile"] for item in top["cohort_percentiles"]["items"]}["fat_percentage"] == 100.0
+
+    older_summary = client.get(f"/patients/{older['id']}/summary", headers=headers).json()
+    assert older_summary["cohort_percentiles"] is None
+
+
+def test_body_composition_series_with_range_and_downsampling(client, unique_username):
+    headers = authenticate_client(client, unique_username)
+    medication = create_medication(client, headers, uuid.uuid4().hex[:6])
+    patient = create_patient(client, headers, medication["id"], "Spec Série Corporal")
+    cycle = create_cycle(
+        client, headers, patient["id"], max_sessions=10, cycle_date_iso="2024-03-01T09:00:00Z"
+    )
+    weights = [90.0, 89.0, 95.0, 88.0, 87.5, 87.0]
+    for day, weight in enumerate(weights, start=1):
+        create_session(
+            client,
+            headers,
+            cycle["id"],
+            medication["id"],
+            f"2024-03-{day * 4:02d}T09:00:00Z",
+            {"weight_kg": weight, "fat_percentage": 30 + day},
+        )
+
+    url = f"/patients/{patient['id']}/body-composition"
+    full = client.get(url, headers=headers).json()
+    assert full["total_points"] == full["points"] == 6
+    assert full["downsampling"] is None
+    assert full["weight_kg"] == weights
+    assert full["fat_percentage"] == [31.0, 32.0, 33.0, 34.0, 35.0, 36.0]
+    assert full["dates"][0].startswith("2024-03-04")
+
+    ranged = client.get(
+        url, params={"start_date": "2024-03-06", "end_date": "2024-03-17"}, headers=headers
+    ).json()
+    assert ranged["weight_kg"] == [89.0, 95.0, 88.0]
+
+    # O LTTB mantém as pontas e o pico real de 95 kg
+    lttb = client.get(url, params={"max_points": 3}, headers=headers).json()
+    assert lttb["downsampling"] == "lttb"
+    assert lttb["total_points"] == 6 and lttb["points"] == 3
+    assert lttb["weight_kg"] == [90.0, 95.0, 87.0]
+    assert lttb["dates"][1].startswith("2024-03-12")
+
+    bucket = client.get(url, params={"max_points": 3, "method": "bucket"}, headers=headers).json()
+    assert bucket["downsampling"] == "bucket"
+    assert bucket["weight_kg"] == [89.5, 91.5, 87.25]
+    assert bucket["fat_percentage"] == [31.5, 33.5, 35.5]
+
+    invalid = client.get(
+        url, params={"start_date": "2024-04-01", "end_date": "2024-03-01"}, headers=headers
+    )
+    assert invalid.status_code == 400
+
+    missing = client.get(f"/patients/{uuid.uuid4()}/body-composition", headers=headers)
+    assert missing.status_code == 404
+
+
+def test_bulk_patient_creation_reports_item_errors(client, unique_username):
+    headers = authenticate_client(client, unique_username)
+    medication = create_medication(client, headers, uuid.uuid4().hex[:6])
+    base = {"gender": "female", "birth_date": "1975-02-10", "treatment_location": "home"}
+
+    response = client.post(
+        "/patients/bulk",
+        json={
+            "patients": [
+                {**base, "name": "Spec Lote A", "preferred_medication_id": medication["id"]},
+                {**base, "name": "Spec Lote B", "preferred_medication_id": str(uuid.uuid4())},
+                {**base, "name": "Spec Lote C"},
+            ]
+        },
+        headers=headers,
+    )
+    assert response.status_code == 200
+    result = response.json()
+    assert [patient["name"] for patient in result["created"]] == ["Spec Lote A", "Spec Lote C"]
+    assert result["created"][0]["preferred_medication"]["id"] == medication["id"]
+    assert result["created"][1]["preferred_medication"] is None
+    assert result["created"][0]["status"] == "active"
+    assert result["errors"] == [
+        {"index": 1, "field": "preferred_medication_id", "message": "Medication not found"}
+    ]
+
+    listed = client.get(f"/patients/{result['created'][1]['id']}", headers=headers)
+    assert listed.status_code == 200
+    stats = client.get("/dashboard/stats", headers=headers).json()
+    assert stats["total_patients"] == 2
+
+    empty = client.post("/patients/bulk", json={"patients": []}, headers=headers)
+    assert empty.status_code == 422
+
+
+def test_create_cycle_with_sessions_atomically(client, unique_username):
+    headers = authenticate_client(client, unique_username)
+    medication = create_medication(client, headers, uuid.uuid4().hex[:6])
+    patient = create_patient(client, headers, medication["id"], "Spec Ciclo Histórico")
+    body_composition = {
+        "weight_kg": 82.0,
+        "fat_percentage": 31.0,
+        "fat_kg": 25.42,
+        "muscle_mass_percentage": 48.0,
+        "h2o_percentage": 53.0,
+        "metabolic_age": 41,
+        "visceral_fat": 9,
+    }
+    payload = {
+        "max_sessions": 3,
+        "periodicity": "weekly",
+        "type": "normal",
+        "cycle_date": "2023-09-04T09:00:00Z",
+        "sessions": [
+            {
+                "session_date": "2023-09-11T09:00:00Z",
+                "medication_id": medication["id"],
+                "dosage_mg": 5.0,
+                "body_composition": {**body_composition, "weight_kg": 81.0},
+            },
+            {
+                "session_date": "2023-09-04T09:00:00Z",
+                "medication_id": medication["id"],
+                "dosage_mg": 2.5,
+                "body_composition": body_composition,
+            },
+        ],
+    }
+    url = f"/patients/{patient['id']}/cycles/with-sessions"
+
+    response = client.post(url, json=payload, headers=headers)
+    assert response.status_code == 201
+    cycle = response.json()
+    assert cycle["patient_id"] == patient["id"]
+    assert [session["dosage_mg"] for session in cycle["sessions"]] == [2.5, 5.0]
+    assert cycle["sessions"][1]["body_composition"]["weight_kg"] == "81.00"
+    assert cycle["sessions"][0]["medication"]["id"] == medication["id"]
+
+    too_many = client.post(
+        url, json={**payload, "max_sessions": 1}, headers=headers
+    )
+    assert too_many.status_code == 422
+
+    unknown_medication = {
+        **payload,
+        "sessions": [{**payload["sessions"][0], "medication_id": str(uuid.uuid4())}],
+    }
+    assert client.post(url, json=unknown_medication, headers=headers).status_code == 404
+
+    cycles = client.get(f"/patients/{patient['id']}/cycles", headers=headers).json()
+    assert len(cycles) == 1
+    assert len(cycles[0]["sessions"]) == 2
+
+
+def test_list_patients_streams_json_array_with_medication(client, unique_username):
+    headers = authenticate_client(client, unique_username)
+
+    empty = client.get("/patients", headers=headers)
+    assert empty.status_code == 200
+    assert empty.json() == []
+
+    medication = create_medication(client, headers, uuid.uuid4().hex[:6])
+    with_medication = create_patient(client, headers, medication["id"], "Spec Lista Com")
+    without_medication = create_patient(client, headers, None, "Spec Lista Sem")
+
+    response = client.get("/patients", headers=headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    patients = {patient["id"]: patient for patient in response.json()}
+    assert patients[with_medication["id"]] == with_medication
+    assert patients[without_medication["id"]]["preferred_medication"] is None
+    assert patients[without_medication["id"]]["birth_date"] == "1985-06-15"
+
+
+def test_overdue_worklist_orders_by_days_overdue_with_cursor(client, unique_username):
+    headers = authenticate_client(client, unique_username)
+    medication = create_medication(client, headers, "Atraso")
+    today = datetime.now(timezone.utc).date()
+
+    def at(day: date) -> str:
+        return f"{day.isoformat()}T12:00:00Z"
+
+    def new_patient(name, periodicity, cycle_day, session_days=(), max_sessions=6):
+        patient = create_patient(client, headers, medication["id"], name)
+        response = client.post(
+            f"/patients/{patient['id']}/cycles",
+            json={"max_sessions": max_sessions, "periodicity": periodicity, "type": "normal", "cycle_date": at(cycle_day)},
+            headers=headers,
+        )
+        assert response.status_code == 201
+        for session_day in session_days:
+            create_session(client, headers, response.json()["id"], medication["id"], at(session_day))
+        return patient["id"]
+
+    # Mensal com o dia da sessão até 28 para que "+1 mês" não dependa do tamanho do mês
+    monthly_session = today - timedelta(days=45)
+    monthly_session = monthly_session.replace(day=min(monthly_session.day, 28))
+    if monthly_session.month == 12:
+        monthly_expected = monthly_session.replace(year=monthly_session.year + 1, month=1)
+    else:
+        monthly_expected = monthly_session.replace(month=monthly_session.month + 1)
+
+    expected = {
+        new_patient("Semanal", "weekly", today - timedelta(days=60), [today - timedelta(days=20)]): 13,
+        new_patient("Quinzenal", "biweekly", today - timedelta(days=60), [today - timedelta(days=30)]): 16,
+        new_patient("Mensal", "monthly", today - timedelta(days=90), [monthly_session]): (today - monthly_expected).days,
+        new_patient("Sem sessões", "weekly", today - timedelta(days=5)): 5,
+    }
+    new_patient("Em dia", "weekly", today - timedelta(days=30), [today - timedelta(days=2)])
+    new_patient("Ciclo completo", "weekly", today - timedelta(days=60), [today - timedelta(days=50)], max_sessions=1)
+    inactive = new_patient("Inativo", "weekly", today - timedelta(days=60))
+    assert client.put(f"/patients/{inactive}", json={"status": "inactive"}, headers=headers).status_code == 200
+    # Só o ciclo mais recente conta: o ciclo novo sem atraso esconde o antigo
+    renewed = new_patient("Renovado", "weekly", today - timedelta(days=90))
+    response = client.post(
+        f"/patients/{renewed}/cycles",
+        json={"max_sessions": 4, "periodicity": "weekly", "type": "normal", "cycle_date": at(today + timedelta(days=1))},
+        headers=headers,
+    )
+    assert response.status_code == 201
+
+    ordered = sorted(expected.items(), key=lambda item: (-item[1], item[0]))
+    collected, cursor = [], None
+    while True:
+        params = {"limit": 3, **({"cursor": cursor} if cursor else {})}
+        page = client.get("/patients/overdue", params=params, headers=headers)
+        assert page.status_code == 200
+        body = page.json()
+        collected.extend((item["patient_id"], item["days_overdue"]) for item in body["items"])
+        cursor = body["next_cursor"]
+        assert body["has_next"] is (cursor is not None)
+        if cursor is None:
+            break
+
+    assert collected == ordered
+    assert client.get("/patients/overdue", params={"cursor": "invalid"}, headers=headers).status_code == 400
+    # Cursor bem formado, mas com valores de tipo errado
+    for values in ([None, str(uuid.uuid4())], [{"dias": 1}, str(uuid.uuid4())]):
+        response = client.get("/patients/overdue", params={"cursor": encode_cursor(values)}, headers=headers)
+        assert response.status_code == 400
+
+
+def test_patient_status_job_binds_values_and_requires_postgres(db_session):
+    import pytest
+    from sqlalchemy.dialects import postgresql
+
+    from app.jobs import patient_status
+
+    for target_status, candidates in patient_status.TRANSITIONS.items():
+        for statement in (
+            patient_status.list_candidates_statement(candidates),
+            patient_status.batch_update_statement(candidates),
+        ):
+            sql = str(statement.compile(dialect=postgresql.dialect()))
+            # Status e tipos de ciclo só entram como parâmetros, nunca no texto do SQL
+            for literal in ("'active'", "'completed'", "'inactive'", "'normal'"):
+                assert literal not in sql
+        batch_sql = str(patient_status.batch_update_statement(candidates).compile(dialect=postgresql.dialect()))
+        assert "%(patient_ids)s" in batch_sql and "%(target_status)s" in batch_sql
+
+    with pytest.raises(patient_status.PatientStatusJobError):
+        patient_status.update_patient_statuses(db_session, inactive_after_days=90)
+
+
+def test_patient_status_job_on_postgres(pg_session):
+    from app.jobs.patient_status import update_patient_statuses
+    from app.models.cycle import Cycle, CycleTypeEnum, PeriodicityEnum
+    from app.models.medication import Medication
+    from app.models.patient import Patient, PatientStatusEnum
+    from app.models.session import Session as SessionModel
+
+    now = datetime.now(timezone.utc)
+    medication = Medication(name="Med Status")
+    pg_session.add(medication)
+    patients = {
+        name: Patient(name=name, gender="female", birth_date=date(1980, 1, 1), created_at=now - timedelta(days=400))
+        for name in ("concluído", "dormente", "em dia", "novo")
+    }
+    patients["novo"].created_at = now
+    pg_session.add_all(patients.values())
+    pg_session.flush()
+
+    def cycle(patient, max_sessions, session_ages):
+        row = Cycle(
+            patient_id=patient.id,
+            max_sessions=max_sessions,
+            periodicity=PeriodicityEnum.weekly,
+            type=CycleTypeEnum.normal,
+            cycle_date=now - timedelta(days=300),
+        )
+        pg_session.add(row)
+        pg_session.flush()
+        for age in session_ages:
+            pg_session.add(
+                SessionModel(cycle_id=row.id, medication_id=medication.id, session_date=now - timedelta(days=age))
+            )
+
+    cycle(patients["concluído"], 2, [20, 10])
+    cycle(patients["dormente"], 5, [200])
+    cycle(patients["em dia"], 5, [3])
+    pg_session.commit()
+
+    assert update_patient_statuses(pg_session, inactive_after_days=90, dry_run=True) == {"completed": 1, "inactive": 1}
+    assert update_patient_statuses(pg_session, inactive_after_days=90, batch_size=1) == {"completed": 1, "inactive": 1}
+    statuses = {patient.name: patient.status for patient in pg_session.query(Patient).all()}
+    assert statuses == {
+        "concluído": PatientStatusEnum.completed,
+        "dormente": PatientStatusEnum.inactive,
+        "em dia": PatientStatusEnum.active,
+        "novo": PatientStatusEnum.active,
+    }
@@ -0,0 +1,94 @@
+import asyncio
+
+from app.singleflight import SingleFlight, build_key
+
+
+def test_build_key_normalizes_params():
+    key_a = build_key("/dashboard/x", {"end_date": "2024-02-01", "start_date": "2024-01-01"})
+    key_b = build_key("/dashboard/x", {"start_date": "2024-01-01", "end_date": "2024-02-01", "extra": None})
+    assert key_a == key_b
+
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    executions = 0
+
+    async def compute():
+        nonlocal executions
+        executions += 1
+        await asyncio.sleep(0.05)
+        return {"value": 42}
+
+    async def run():
+        return await asyncio.gather(
+            *[flight.do("/dashboard/stats?", compute) for _ in range(5)]
+        )
+
+    results = asyncio.run(run())
+    assert executions == 1
+    assert all(value == {"value": 42} for value, _ in results)
+    assert sorted(outcome for _, outcome in results) == ["coalesced"] * 4 + ["executed"]
+    assert flight.snapshot_metrics() == {
+        "/dashboard/stats": {"executed": 1, "coalesced": 4, "cached": 0}
+    }
+
+
+def test_result_cache_and_error_propagation():
+    flight = SingleFlight(ttl_seconds=60)
+
+    async def compute():
+        return "ok"
+
+    async def fail():
+        raise ValueError("boom")
+
+    async def run():
+        first = await flight.do("k", compute)
+        second = await flight.do("k", compute)
+        try:
+            await flight.do("other", fail)
+        except ValueError:
+            failed = True
+        else:
+            failed = False
+        return first, second, failed
+
+    first, second, failed = asyncio.run(run())
+    assert first == ("ok", "executed")
+    assert second == ("ok", "cached")
+    assert failed is True
+
+
+def test_cancelled_leader_does_not_fail_followers():
+    flight = SingleFlight()
+
+    async def compute():
+        await asyncio.sleep(0.05)
+        return "ok"
+
+    async def run():
+        leader = asyncio.ensure_future(flight.do("k", compute))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flight.do("k", compute))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        return await follower, leader.cancelled()
+
+    follower_result, leader_cancelled = asyncio.run(run())
+    assert leader_cancelled is True
+    assert follower_result == ("ok", "coalesced")
+
+
+def test_cache_keeps_only_the_most_recently_used_keys():
+    flight = SingleFlight(ttl_seconds=60, max_entries=2)
+
+    async def compute():
+        return "ok"
+
+    async def run():
+        for key in ("a", "b", "a", "c"):
+            await flight.do(key, compute)
+            await asyncio.sleep(0)
+
+    asyncio.run(run())
+    assert list(flight._cache) == ["a", "c"]